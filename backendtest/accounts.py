@@ -0,0 +1,99 @@
+"""
+Account Table
+Sub-accounts of the simulated futures engines (one per strategy, user or test run). Per-account
+numbers are kept in shared columns - one plain list per field, one row per account - so an account
+costs a row rather than its own object graph, and the engines only touch the rows of accounts
+whose positions actually moved.
+"""
+
+import re
+from typing import Any, Dict, Iterator, List
+
+DEFAULT_ACCOUNT = "main"
+ACCOUNT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+def valid_account_id(account_id: Any) -> bool:
+    return isinstance(account_id, str) and ACCOUNT_ID_PATTERN.match(account_id) is not None
+
+
+class AccountTable:
+    """
+    ``columns`` maps each field to its default. Rows are kept dense: removing an account swaps the
+    last row into its place, so a row number is only valid until the next removal (use ``row``).
+    Columns are lists rather than numpy arrays because the engines update single cells per fill/tick.
+    """
+
+    def __init__(self, columns: Dict[str, float]):
+        self.defaults = dict(columns)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.columns: Dict[str, List[float]] = {name: [] for name in self.defaults}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self.rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.ids))
+
+    def add(self, account_id: str, **values) -> int:
+        if account_id in self.rows:
+            raise KeyError(f"Account already exists: {account_id}")
+        row = len(self.ids)
+        self.ids.append(account_id)
+        self.rows[account_id] = row
+        for name, column in self.columns.items():
+            column.append(values.get(name, self.defaults[name]))
+        return row
+
+    def remove(self, account_id: str) -> bool:
+        row = self.rows.pop(account_id, None)
+        if row is None:
+            return False
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.ids.pop()
+        for column in self.columns.values():
+            column.pop()
+        return True
+
+    def clear(self):
+        """Drop every row (column lists are emptied in place, so references to them stay valid)"""
+        self.ids.clear()
+        self.rows.clear()
+        for column in self.columns.values():
+            column.clear()
+
+    def row(self, account_id: str) -> int:
+        return self.rows[account_id]
+
+    def get(self, account_id: str, name: str) -> float:
+        return self.columns[name][self.rows[account_id]]
+
+    def set(self, account_id: str, name: str, value: float):
+        self.columns[name][self.rows[account_id]] = value
+
+    def fill(self, name: str, value: float):
+        column = self.columns[name]
+        column[:] = [value] * len(column)
+
+    def record(self, account_id: str) -> Dict[str, float]:
+        row = self.rows[account_id]
+        return {name: column[row] for name, column in self.columns.items()}
+
+    def to_state(self) -> Dict[str, Dict[str, float]]:
+        return {account_id: self.record(account_id) for account_id in self.ids}
+
+    def load_state(self, state: Dict[str, Dict[str, float]]):
+        """Replace all rows with ``to_state`` output; unknown fields are ignored, missing ones defaulted"""
+        self.clear()
+        for account_id, values in state.items():
+            self.add(account_id, **{name: value for name, value in values.items() if name in self.columns})
@@ -6,6 +6,7 @@ Fully asynchronous trading system with real-time indicators and AI signals
 import asyncio
 import aiohttp
 import json
+import websockets
 import logging
 import numpy as np
 import pandas as pd
@@ -47,10 +48,25 @@ except ImportError:
 import websockets
 import os
 
+from engine_providers import create_providers
+from latency_tracker import LatencyTracker
+from position_store import PositionStore
+from position_book import PositionBook, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT
+from portfolio_ledger import LedgerSource, get_portfolio_ledger
+from event_journal import EventJournal
+from signal_book import SignalBook
+from strategy_evaluator import StrategyEvaluator, expand_grid
+from event_dispatcher import Event, EventDispatcher, PRIORITY_RISK, PRIORITY_TICK, PRIORITY_CANDLE, PRIORITY_SIGNAL
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TIMEFRAME_SECONDS = {
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "1d": 86400
+}
+
 class TradingSignal(Enum):
     BUY = "BUY"
     SELL = "SELL"
@@ -99,6 +115,7 @@ class AISignal:
     model_version: str
     prediction_horizon: str
     risk_score: float
+    symbol: str = ""
     
 @dataclass
 class Position:
@@ -133,7 +150,9 @@ class AdvancedAutoTradingEngine:
         
         # Core components
         self.is_running = False
-        self.positions: Dict[str, Position] = {}
+        self.positions = PositionStore(self.config["balance"])  # open positions + closed ledger
+        self.position_book = PositionBook()  # vectorised valuation / exit checks of open positions
+        self.ledger: Optional[LedgerSource] = None  # portfolio-wide exposure, see attach_ledger
         self.market_data: Dict[str, MarketData] = {}
         self.indicators: Dict[str, TechnicalIndicators] = {}
         
@@ -148,13 +167,56 @@ class AdvancedAutoTradingEngine:
         self.max_drawdown = 0.0
         
         # Async components
-        self.trading_loop_task = None
-        self.data_feed_task = None
-        self.ai_signal_task = None
-        self.risk_monitor_task = None
+        self.feed_task = None
+        self.feed_mode = None  # "websocket" or "polling" while running
+        self._candle_buckets: Dict[str, int] = {}
+        self._feed_semaphore: Optional[asyncio.Semaphore] = None
+        self.symbol_updates: Dict[str, float] = {}  # symbol -> monotonic time of last tick
+        self.feed_stats = {"cycles": 0, "timeouts": 0, "failures": 0, "last_cycle_ms": 0.0}
+        self._indicators_pending = set()
+        self._signal_batch: Dict[str, float] = {}  # symbol -> origin_ts awaiting the next SIGNAL_BATCH
+        # Latest qualifying signal per symbol, executed best-first by EXECUTE_SIGNALS
+        self.signal_book = SignalBook(self.config["signal_book"].get("ttl_seconds", 60.0))
+        self._execution_scheduled = False
+        self._pending_alerts = set()
+        # Paper-traded strategy variants sharing this engine's feed, indicators and signals
+        self.strategies: Optional[StrategyEvaluator] = None
+        self.last_tick_to_order_ms = None
         
-        # Event system
-        self.events = asyncio.Queue()
+        # Stage latency histograms; _trace_kind is the decision path being handled ("tick"/"entry")
+        latency_config = self.config["latency"]
+        self.latency = LatencyTracker(
+            trace_slowest=latency_config.get("trace_slowest", 20),
+            sample_rate=latency_config.get("sample_rate", 1.0) if latency_config.get("sampling") else 0.0
+        )
+        self._trace_kind: Optional[str] = None
+        
+        # Event system: ticks and candle closes drive exits, risk, indicators and signals
+        self.dispatcher = EventDispatcher("auto_trading")
+        self.dispatcher.subscribe("PRICE_TICK", self._on_price_tick)
+        self.dispatcher.subscribe("CANDLE_CLOSE", self._on_candle_close)
+        self.dispatcher.subscribe("SIGNAL_BATCH", self._on_signal_batch)
+        self.dispatcher.subscribe("EXECUTE_SIGNALS", self._on_execute_signals)
+        self.dispatcher.subscribe("RISK_ALERT", self._on_risk_alert)
+        
+        # Data providers (in-process by default, HTTP for remote deployments)
+        self.providers = create_providers(self.config)
+        
+        # Crash-safe state: last snapshot + journal tail
+        state_config = self.config["state"]
+        self.journal = None
+        self._reconciled = False
+        self._config_overrides: Dict[str, Any] = {}  # changes made through update_config
+        if state_config.get("enabled", True):
+            self.journal = EventJournal(
+                state_config.get("directory", "data/engine_state"), "advanced_auto_trading",
+                fsync=state_config.get("fsync", False), compact_every=state_config.get("snapshot_every", 500)
+            )
+            self._restore_state()
+        
+        strategies_config = self.config["strategies"]  # after restore: may be a journaled override
+        if strategies_config.get("enabled"):
+            self.configure_strategies(strategies_config.get("variants"), strategies_config.get("grid"))
         
     def _load_config(self) -> Dict:
         """Load configuration from file"""
@@ -194,12 +256,42 @@ class AdvancedAutoTradingEngine:
                 "adx_period": 14
             },
             "websocket": {
+                "enabled": True,
                 "binance_url": "wss://stream.binance.com:9443/ws/",
                 "reconnect_interval": 5
             },
+            "poll_interval": 1.0,  # seconds between polls while the stream is unavailable
+            "latency": {
+                "sampling": False,  # keep per-stage traces of the slowest decisions
+                "sample_rate": 1.0,  # fraction of decisions traced while sampling
+                "trace_slowest": 20
+            },
+            "signal_book": {
+                "ttl_seconds": 60.0  # pending signals older than this are dropped unexecuted
+            },
+            "strategies": {
+                "enabled": False,  # paper-trade parameter variants alongside the live engine
+                "variants": [],  # explicit variants: overrides of min_confidence, stop_loss_pct, sizing_method...
+                "grid": {}  # or a parameter grid, e.g. {"stop_loss_pct": [1, 2, 3]}
+            },
+            "state": {
+                "enabled": True,  # snapshot + journal of positions/counters for crash-safe restarts
+                "directory": "data/engine_state",
+                "snapshot_every": 500,  # journal events between compacting snapshots
+                "closed_retained": 500,  # closed positions kept in snapshots
+                "fsync": False
+            },
+            "data_feed": {
+                "max_concurrency": 8,  # symbols refreshed at once
+                "symbol_timeout": 2.0,  # per-symbol deadline; late symbols are skipped for the cycle
+                "stale_after": 10.0  # seconds without a tick before a symbol's data is stale
+            },
             "api": {
                 "base_url": "http://localhost:8001",
                 "timeout": 10
+            },
+            "providers": {
+                "mode": "in_process"  # in_process, http (engine running outside the API process)
             }
         }
         
@@ -233,17 +325,11 @@ class AdvancedAutoTradingEngine:
         self.is_running = True
         
         try:
-            # Start all async tasks
-            self.data_feed_task = asyncio.create_task(self._data_feed_loop())
-            await asyncio.sleep(2)  # Allow data feed to initialize
-            
-            self.ai_signal_task = asyncio.create_task(self._ai_signal_loop())
-            await asyncio.sleep(1)
-            
-            self.risk_monitor_task = asyncio.create_task(self._risk_monitor_loop())
-            await asyncio.sleep(1)
-            
-            self.trading_loop_task = asyncio.create_task(self._main_trading_loop())
+            # Event consumer first, then the market feed that produces events
+            if not self._reconciled:
+                await self._reconcile_positions()
+            self.dispatcher.start()
+            self.feed_task = asyncio.create_task(self._market_feed())
             
             logger.info("✅ Advanced Auto Trading Engine fully operational")
             
@@ -258,126 +344,473 @@ class AdvancedAutoTradingEngine:
         
         self.is_running = False
         
-        # Cancel all tasks
-        tasks = [self.trading_loop_task, self.data_feed_task, 
-                self.ai_signal_task, self.risk_monitor_task]
+        if self.feed_task and not self.feed_task.done():
+            self.feed_task.cancel()
+            try:
+                await self.feed_task
+            except asyncio.CancelledError:
+                pass
+        self.feed_task = None
+        self.feed_mode = None
         
-        for task in tasks:
-            if task and not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+        await self.dispatcher.stop()
+        self.signal_book.clear()
+        self._execution_scheduled = False
         
         # Close all positions if enabled
         if self.config.get("close_positions_on_stop", True):
             await self._close_all_positions()
         
+        await self.providers.close()
+        
+        if self.journal is not None:
+            self.journal.write_snapshot(self._state_snapshot())
+        
         logger.info("✅ Advanced Auto Trading Engine stopped")
     
-    async def _data_feed_loop(self):
-        """Real-time data feed loop with WebSocket integration"""
-        logger.info("📡 Starting real-time data feed...")
+    # --- State persistence ---
+    
+    @staticmethod
+    def _position_to_state(position: Position) -> Dict:
+        data = asdict(position)
+        data["side"] = position.side.value
+        data["status"] = position.status.value
+        data["opened_at"] = position.opened_at.isoformat()
+        data["closed_at"] = position.closed_at.isoformat() if position.closed_at else None
+        return data
+    
+    @staticmethod
+    def _position_from_state(data: Dict) -> Position:
+        data = dict(data)
+        data["side"] = TradingSignal(data["side"])
+        data["status"] = PositionStatus(data["status"])
+        data["opened_at"] = datetime.fromisoformat(data["opened_at"])
+        data["closed_at"] = datetime.fromisoformat(data["closed_at"]) if data.get("closed_at") else None
+        return Position(**data)
+    
+    def _journal(self, event_type: str, data: Dict):
+        """Record a state change; compacts into a snapshot every ``snapshot_every`` events"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.append(event_type, data)
+            if self.journal.needs_snapshot:
+                self.journal.write_snapshot(self._state_snapshot())
+        except OSError as e:
+            logger.error(f"Error writing engine journal: {e}")
+    
+    def _state_snapshot(self) -> Dict:
+        signal_history = []
+        for signal in self.signal_history:
+            signal_data = asdict(signal)
+            signal_data["signal"] = signal.signal.value
+            signal_history.append(signal_data)
         
-        while self.is_running:
-            try:
-                # Get real-time price data
-                for symbol in self.config["symbols"]:
-                    market_data = await self._fetch_market_data(symbol)
-                    if market_data:
-                        self.market_data[symbol] = market_data
-                        
-                        # Calculate technical indicators
-                        indicators = await self._calculate_indicators(symbol)
-                        if indicators:
-                            self.indicators[symbol] = indicators
-                
-                await asyncio.sleep(1)  # Update every second
-                
-            except Exception as e:
-                logger.error(f"Error in data feed loop: {e}")
-                await asyncio.sleep(5)
+        stats = self.positions.stats
+        return {
+            "open_positions": [self._position_to_state(p) for p in self.positions.values()],
+            "closed_positions": [
+                self._position_to_state(p)
+                for p in self.positions.recent_closed(self.config["state"].get("closed_retained", 500))
+            ],
+            "stats": {name: getattr(stats, name) for name in stats.__slots__},
+            "trades_executed": self.trades_executed,
+            "signal_history": signal_history,
+            "config_overrides": self._config_overrides
+        }
     
-    async def _ai_signal_loop(self):
-        """AI/ML signal generation loop"""
-        logger.info("🧠 Starting AI signal generation...")
+    def _restore_position(self, position: Position):
+        self.positions.add(position)
+        self.position_book.add(
+            position.symbol, position.id, position.entry_price, position.size / position.entry_price,
+            1 if position.side == TradingSignal.BUY else -1, position.stop_loss, position.take_profit
+        )
+    
+    def _restore_state(self):
+        """Rebuild positions, counters and signal history from the last snapshot plus the journal tail"""
+        started = time.perf_counter()
+        try:
+            state, events = self.journal.load()
+        except OSError as e:
+            logger.error(f"Error reading engine state: {e}")
+            return
+        if state is None and not events:
+            return
         
-        while self.is_running:
-            try:
-                if self.config["ai_models"]["enabled"]:
-                    for symbol in self.config["symbols"]:
-                        if symbol in self.market_data and symbol in self.indicators:
-                            signal = await self._generate_ai_signal(symbol)
-                            if signal and signal.confidence >= self.config["min_confidence"]:
-                                await self.events.put(("AI_SIGNAL", signal))
-                
-                await asyncio.sleep(30)  # Generate signals every 30 seconds
-                
-            except Exception as e:
-                logger.error(f"Error in AI signal loop: {e}")
-                await asyncio.sleep(60)
+        if state:
+            self._config_overrides.update(state.get("config_overrides", {}))
+            for data in state.get("open_positions", []):
+                self._restore_position(self._position_from_state(data))
+            self.positions.closed.extend(self._position_from_state(d) for d in state.get("closed_positions", []))
+            for name, value in state.get("stats", {}).items():
+                setattr(self.positions.stats, name, value)
+            self.trades_executed = state.get("trades_executed", 0)
+            for data in state.get("signal_history", []):
+                data["signal"] = TradingSignal(data["signal"])
+                self.signal_history.append(AISignal(**data))
+        
+        for event in events:
+            data = event["data"]
+            event_type = event["type"]
+            if event_type == "open":
+                self._restore_position(self._position_from_state(data))
+                self.trades_executed += 1
+            elif event_type == "close":
+                position = self.positions.get(data["id"])
+                if position is None:
+                    continue
+                position.pnl = data["pnl"]
+                position.current_price = data["current_price"]
+                position.closed_at = datetime.fromisoformat(data["closed_at"])
+                position.unrealized_pnl = 0.0
+                position.status = PositionStatus.CLOSED
+                self.positions.close(position.id)
+                self.position_book.remove(position.id)
+            elif event_type == "modify":
+                position = self.positions.get(data["id"])
+                if position is None:
+                    continue
+                for field in ("stop_loss", "take_profit"):
+                    if data.get(field) is not None:
+                        setattr(position, field, data[field])
+                self.position_book.set_levels(
+                    position.id, stop_loss=data.get("stop_loss"), take_profit=data.get("take_profit")
+                )
+            elif event_type == "config":
+                self._config_overrides.update(data)
+        
+        self.config.update(self._config_overrides)
+        stats = self.positions.stats
+        self.win_rate = stats.win_rate
+        self.max_drawdown = stats.max_drawdown_pct
+        self.total_pnl = stats.realized_pnl
+        logger.info(
+            f"Restored engine state: {len(self.positions)} open / {len(self.positions.closed)} closed positions, "
+            f"{len(events)} journal events in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+    
+    async def _reconcile_positions(self):
+        """Align restored open positions with the persisted trade records"""
+        self._reconciled = True
+        open_ids = list(self.positions)
+        if not open_ids:
+            return
+        try:
+            persisted = await self.providers.persistence.load_positions(open_ids)
+        except Exception as e:
+            logger.error(f"Error loading persisted trades for reconciliation: {e}")
+            return
+        if persisted is None:
+            # Store can't be queried; an empty dict means none of the positions were persisted
+            return
+        
+        closed, missing = 0, 0
+        for position_id in open_ids:
+            trade = persisted.get(position_id)
+            if trade is None:
+                # Opened but never persisted (crash before the write): persist it now
+                missing += 1
+                await self._save_position_to_backend(self.positions.get(position_id))
+            elif trade.get("status") != PositionStatus.OPEN.value:
+                position = self.positions.get(position_id)
+                close_price = trade.get("close_price") or trade.get("current_price")
+                if close_price:
+                    position.current_price = close_price
+                closed += 1
+                await self._close_position(position_id, "Reconciled - closed in trade store")
+        
+        if closed or missing:
+            logger.info(f"Reconciled positions: {closed} closed from trade store, {missing} re-persisted")
+    
+    def update_config(self, changes: Dict):
+        """Apply and journal a configuration change"""
+        self.config.update(changes)
+        self._config_overrides.update(changes)
+        self._journal("config", changes)
     
-    async def _risk_monitor_loop(self):
-        """Risk monitoring and management loop"""
-        logger.info("⚠️ Starting risk monitor...")
+    def modify_position(self, position_id: str, stop_loss: Optional[float] = None,
+                        take_profit: Optional[float] = None) -> bool:
+        """Move an open position's stop loss / take profit"""
+        position = self.positions.get(position_id)
+        if position is None:
+            return False
+        if stop_loss is not None:
+            position.stop_loss = stop_loss
+        if take_profit is not None:
+            position.take_profit = take_profit
+        self.position_book.set_levels(position_id, stop_loss=stop_loss, take_profit=take_profit)
+        self._journal("modify", {"id": position_id, "stop_loss": stop_loss, "take_profit": take_profit})
+        return True
+    
+    # --- Market event sources ---
+    
+    async def _market_feed(self):
+        """Produce PRICE_TICK / CANDLE_CLOSE events from Binance streams, polling while the stream is down"""
+        logger.info("📡 Starting real-time market feed...")
+        ws_config = self.config["websocket"]
         
         while self.is_running:
-            try:
-                # Update position P&L
-                await self._update_position_pnl()
-                
-                # Check stop losses and take profits
-                await self._check_exit_conditions()
-                
-                # Monitor portfolio risk
-                await self._monitor_portfolio_risk()
-                
-                await asyncio.sleep(5)  # Check every 5 seconds
+            if ws_config.get("enabled", True):
+                try:
+                    await self._websocket_feed()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Market stream unavailable ({e}), falling back to polling")
+            
+            # Polling fallback until it is time to retry the stream
+            self.feed_mode = "polling"
+            retry_at = time.monotonic() + ws_config.get("reconnect_interval", 5)
+            while self.is_running and (time.monotonic() < retry_at or not ws_config.get("enabled", True)):
+                await self._poll_market_data()
+                await asyncio.sleep(self.config.get("poll_interval", 1.0))
+    
+    async def _websocket_feed(self):
+        """Combined miniTicker + kline stream for all configured symbols"""
+        timeframe = self.config["primary_timeframe"]
+        streams = []
+        for symbol in self.config["symbols"]:
+            streams += [f"{symbol.lower()}@miniTicker", f"{symbol.lower()}@kline_{timeframe}"]
+        
+        base_url = self.config["websocket"]["binance_url"].rstrip("/")
+        if base_url.endswith("/ws"):
+            base_url = base_url[:-3]
+        url = f"{base_url}/stream?streams={'/'.join(streams)}"
+        
+        async with websockets.connect(url, ping_interval=20) as stream:
+            self.feed_mode = "websocket"
+            logger.info(f"Market stream connected ({len(streams)} streams)")
+            async for raw in stream:
+                if not self.is_running:
+                    break
+                message = json.loads(raw)
+                data = message.get("data", message)
+                event_type = data.get("e")
                 
-            except Exception as e:
-                logger.error(f"Error in risk monitor: {e}")
-                await asyncio.sleep(10)
+                if event_type == "24hrMiniTicker":
+                    # Latest price wins while a tick for the symbol is still queued
+                    self.dispatcher.publish_latest("PRICE_TICK", data["s"], {
+                        "symbol": data["s"],
+                        "price": float(data["c"]),
+                        "volume": float(data["v"])
+                    }, PRIORITY_TICK)
+                elif event_type == "kline" and data["k"]["x"]:
+                    kline = data["k"]
+                    self.dispatcher.publish("CANDLE_CLOSE", {
+                        "symbol": data["s"],
+                        "interval": kline["i"],
+                        "close": float(kline["c"]),
+                        "volume": float(kline["v"])
+                    }, PRIORITY_CANDLE)
+    
+    async def _bounded_fetch(self, symbol: str, timeout: float) -> Optional[MarketData]:
+        """Fetch under the concurrency limit; the deadline starts once a slot is acquired"""
+        if self._feed_semaphore is None:
+            self._feed_semaphore = asyncio.Semaphore(self.config["data_feed"].get("max_concurrency", 8))
+        async with self._feed_semaphore:
+            return await asyncio.wait_for(self._fetch_market_data(symbol), timeout)
     
-    async def _main_trading_loop(self):
-        """Main trading decision and execution loop"""
-        logger.info("💹 Starting main trading loop...")
+    async def _poll_market_data(self):
+        """
+        Polling fallback: refresh all symbols concurrently (bounded), each under its own deadline,
+        candle closes derived from wall-clock buckets
+        """
+        symbols = self.config["symbols"]
+        timeout = self.config["data_feed"].get("symbol_timeout", 2.0)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._bounded_fetch(s, timeout) for s in symbols),
+            return_exceptions=True
+        )
+        self.feed_stats["cycles"] += 1
+        self.feed_stats["last_cycle_ms"] = (time.perf_counter() - started) * 1000
         
-        while self.is_running:
+        timeframe_seconds = TIMEFRAME_SECONDS.get(self.config["primary_timeframe"], 300)
+        bucket = int(time.time() // timeframe_seconds)
+        
+        for symbol, market_data in zip(symbols, results):
+            if isinstance(market_data, asyncio.TimeoutError):
+                self.feed_stats["timeouts"] += 1
+                logger.debug(f"{symbol} missed its {timeout}s refresh deadline, skipped this cycle")
+                continue
+            if not isinstance(market_data, MarketData):
+                self.feed_stats["failures"] += 1
+                continue
+            self.dispatcher.publish_latest("PRICE_TICK", symbol, {
+                "symbol": symbol,
+                "price": market_data.price,
+                "volume": market_data.volume
+            }, PRIORITY_TICK)
+            
+            previous_bucket = self._candle_buckets.get(symbol)
+            self._candle_buckets[symbol] = bucket
+            if previous_bucket is not None and bucket != previous_bucket:
+                self.dispatcher.publish("CANDLE_CLOSE", {"symbol": symbol}, PRIORITY_CANDLE)
+    
+    # --- Event handlers ---
+    
+    async def _on_price_tick(self, event: Event):
+        """Price tick: refresh market data, then exits and portfolio risk"""
+        tick = event.data
+        symbol = tick["symbol"]
+        price = tick["price"]
+        self.symbol_updates[symbol] = time.monotonic()
+        self._trace_kind = "tick"
+        self.latency.begin(symbol, "tick", event.origin_ts)
+        self.latency.record(symbol, "receive", (time.perf_counter() - event.origin_ts) * 1000, "tick")
+        
+        market_data = self.market_data.get(symbol)
+        if market_data is None:
+            self.market_data[symbol] = MarketData(
+                symbol=symbol,
+                price=price,
+                volume=tick.get("volume", 0.0),
+                timestamp=datetime.now()
+            )
+        elif tick.get("volume"):
+            market_data.volume = tick["volume"]
+        
+        # Updates price, checks SL/TP for this symbol's positions
+        with self._stage(symbol, "exit_check"):
+            await self._process_market_update({"symbol": symbol, "price": price})
+            await self._update_position_pnl()
+        with self._stage(symbol, "risk_check"):
+            await self._monitor_portfolio_risk()
+        if self.strategies is not None:
+            with self._stage(symbol, "strategies"):
+                self.strategies.on_price(symbol, price)
+        self.latency.finish(symbol, "tick", "processed", event.origin_ts)
+        self._trace_kind = None
+        
+        # First sighting of a symbol: compute indicators now rather than at the next candle close
+        if symbol not in self.indicators and symbol not in self._indicators_pending:
+            self._indicators_pending.add(symbol)
+            self.dispatcher.publish("CANDLE_CLOSE", {"symbol": symbol}, PRIORITY_CANDLE, event.origin_ts)
+    
+    async def _on_candle_close(self, event: Event):
+        """Candle close: recompute indicators and queue the symbol for the next batched signal pass"""
+        symbol = event.data["symbol"]
+        self._trace_kind = "entry"
+        self.latency.begin(symbol, "entry", event.origin_ts)
+        self.latency.record(symbol, "receive", (time.perf_counter() - event.origin_ts) * 1000, "entry")
+        try:
+            with self._stage(symbol, "indicators"):
+                indicators = await self._calculate_indicators(symbol)
+            if indicators:
+                self.indicators[symbol] = indicators
+        finally:
+            self._indicators_pending.discard(symbol)
+            self._trace_kind = None
+        
+        if not self.config["ai_models"]["enabled"]:
+            outcome = "ai_disabled"
+        elif self._is_stale(symbol):
+            logger.debug(f"Skipping signal for {symbol}: market data is stale")
+            outcome = "stale"
+        elif symbol in self.market_data and symbol in self.indicators:
+            # Candle closes arrive together; the batch runs after every queued candle (lower priority)
+            if not self._signal_batch:
+                self.dispatcher.publish("SIGNAL_BATCH", None, PRIORITY_SIGNAL)
+            self._signal_batch.setdefault(symbol, event.origin_ts)
+            return
+        else:
+            outcome = "no_data"
+        self.latency.finish(symbol, "entry", outcome, event.origin_ts)
+    
+    async def _on_signal_batch(self, event: Event):
+        """One prediction call for every symbol whose candle closed since the last batch"""
+        batch, self._signal_batch = self._signal_batch, {}
+        started = time.perf_counter()
+        signals = await self._generate_ai_signals(list(batch))
+        batch_ms = (time.perf_counter() - started) * 1000
+        
+        if self.strategies is not None:
+            # Variants apply their own thresholds, so they see every signal of the batch
+            for symbol, signal in signals.items():
+                if signal.signal != TradingSignal.HOLD and symbol in self.market_data:
+                    self.strategies.on_signal(
+                        symbol, 1 if signal.signal == TradingSignal.BUY else -1,
+                        signal.confidence, signal.risk_score, self.market_data[symbol].price
+                    )
+        
+        for symbol, origin_ts in batch.items():
+            self.latency.record(symbol, "signal", batch_ms, "entry")
+            signal = signals.get(symbol)
+            if signal is not None and signal.confidence >= self.config["min_confidence"]:
+                # Only the latest signal per symbol is kept; a pending older one is superseded
+                self.signal_book.put(symbol, signal, signal.confidence * (1.0 - signal.risk_score), origin_ts)
+            else:
+                self.latency.finish(symbol, "entry", "no_signal" if signal is None else "low_confidence", origin_ts)
+        self._schedule_execution()
+    
+    def _schedule_execution(self):
+        if self.signal_book and not self._execution_scheduled:
+            self._execution_scheduled = True
+            self.dispatcher.publish("EXECUTE_SIGNALS", None, PRIORITY_SIGNAL)
+    
+    async def _on_execute_signals(self, event: Event):
+        """Execute pending signals best-first while position capacity remains"""
+        self._execution_scheduled = False
+        for entry in self.signal_book.expire():
+            self.latency.finish(entry.symbol, "entry", "expired", entry.origin_ts)
+        
+        while self.signal_book and len(self.positions) < self.config["max_positions"]:
+            entry = self.signal_book.pop()
+            if entry is None:
+                break
+            
+            trades_before = self.trades_executed
+            self._trace_kind = "entry"
             try:
-                # Process events
-                while not self.events.empty():
-                    event_type, data = await self.events.get()
-                    
-                    if event_type == "AI_SIGNAL":
-                        await self._process_ai_signal(data)
-                    elif event_type == "MARKET_UPDATE":
-                        await self._process_market_update(data)
-                    elif event_type == "RISK_ALERT":
-                        await self._process_risk_alert(data)
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error in main trading loop: {e}")
-                await asyncio.sleep(5)
+                await self._process_ai_signal(entry.signal)
+            finally:
+                self._trace_kind = None
+            
+            opened = self.trades_executed > trades_before
+            self.latency.finish(entry.symbol, "entry", "opened" if opened else "rejected", entry.origin_ts)
+            if opened:
+                self.last_tick_to_order_ms = (time.perf_counter() - entry.origin_ts) * 1000
+                logger.info(f"Tick-to-order latency: {self.last_tick_to_order_ms:.1f}ms")
+        # Signals left over wait in the book (until they expire) for a position to close
+    
+    async def _on_risk_alert(self, event: Event):
+        self._pending_alerts.discard(event.data.get("type"))
+        await self._process_risk_alert(event.data)
+    
+    def _stage(self, symbol: str, stage: str):
+        """Time a stage of the decision path currently being handled"""
+        return self.latency.stage(symbol, stage, self._trace_kind)
+    
+    def _is_stale(self, symbol: str) -> bool:
+        last_update = self.symbol_updates.get(symbol)
+        if last_update is None:
+            return True
+        return time.monotonic() - last_update > self.config["data_feed"].get("stale_after", 10.0)
+    
+    def get_stale_symbols(self) -> List[str]:
+        return [s for s in self.config["symbols"] if self._is_stale(s)]
+    
+    def _raise_risk_alert(self, alert_data: Dict):
+        """Publish a risk alert unless one of the same type is already waiting"""
+        alert_type = alert_data.get("type")
+        if alert_type in self._pending_alerts:
+            return
+        self._pending_alerts.add(alert_type)
+        self.dispatcher.publish("RISK_ALERT", alert_data, PRIORITY_RISK)
     
     async def _fetch_market_data(self, symbol: str) -> Optional[MarketData]:
         """Fetch real-time market data"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.config['api']['base_url']}/price/{symbol.lower()}"
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return MarketData(
-                            symbol=symbol,
-                            price=float(data.get("price", 0)),
-                            volume=float(data.get("volume", 0)),
-                            timestamp=datetime.now(),
-                            bid=float(data.get("bid", 0)),
-                            ask=float(data.get("ask", 0))
-                        )
+            data = await self.providers.prices.get_market_data(symbol)
+            if data:
+                return MarketData(
+                    symbol=symbol,
+                    price=data["price"],
+                    volume=data.get("volume", 0.0),
+                    timestamp=datetime.now(),
+                    bid=data.get("bid", 0.0),
+                    ask=data.get("ask", 0.0)
+                )
         except Exception as e:
             logger.error(f"Error fetching market data for {symbol}: {e}")
         return None
@@ -385,105 +818,112 @@ class AdvancedAutoTradingEngine:
     async def _calculate_indicators(self, symbol: str) -> Optional[TechnicalIndicators]:
         """Calculate technical indicators for symbol"""
         try:
-            # Get historical data for indicator calculation
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.config['api']['base_url']}/features/indicators"
-                params = {"symbol": symbol.lower(), "limit": 100}
-                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        # Extract indicator values
-                        return TechnicalIndicators(
-                            rsi=float(data.get("rsi", 50)),
-                            macd=float(data.get("macd", 0)),
-                            macd_signal=float(data.get("macd_signal", 0)),
-                            macd_histogram=float(data.get("macd_histogram", 0)),
-                            bb_upper=float(data.get("bb_upper", 0)),
-                            bb_middle=float(data.get("bb_middle", 0)),
-                            bb_lower=float(data.get("bb_lower", 0)),
-                            stoch_k=float(data.get("stoch_k", 50)),
-                            stoch_d=float(data.get("stoch_d", 50)),
-                            williams_r=float(data.get("williams_r", -50)),
-                            atr=float(data.get("atr", 0)),
-                            adx=float(data.get("adx", 25)),
-                            cci=float(data.get("cci", 0)),
-                            sma_20=float(data.get("sma_20", 0)),
-                            ema_20=float(data.get("ema_20", 0)),
-                            volume_sma=float(data.get("volume_sma", 0)),
-                            obv=float(data.get("obv", 0))
-                        )
+            data = await self.providers.indicators.get_indicators(symbol)
+            if data:
+                # Extract indicator values
+                return TechnicalIndicators(
+                    rsi=float(data.get("rsi", 50)),
+                    macd=float(data.get("macd", 0)),
+                    macd_signal=float(data.get("macd_signal", 0)),
+                    macd_histogram=float(data.get("macd_histogram", 0)),
+                    bb_upper=float(data.get("bb_upper", 0)),
+                    bb_middle=float(data.get("bb_middle", 0)),
+                    bb_lower=float(data.get("bb_lower", 0)),
+                    stoch_k=float(data.get("stoch_k", 50)),
+                    stoch_d=float(data.get("stoch_d", 50)),
+                    williams_r=float(data.get("williams_r", -50)),
+                    atr=float(data.get("atr", 0)),
+                    adx=float(data.get("adx", 25)),
+                    cci=float(data.get("cci", 0)),
+                    sma_20=float(data.get("sma_20", 0)),
+                    ema_20=float(data.get("ema_20", 0)),
+                    volume_sma=float(data.get("volume_sma", 0)),
+                    obv=float(data.get("obv", 0))
+                )
         except Exception as e:
             logger.error(f"Error calculating indicators for {symbol}: {e}")
         return None
     
     async def _generate_ai_signal(self, symbol: str) -> Optional[AISignal]:
         """Generate AI/ML trading signal"""
+        return (await self._generate_ai_signals([symbol])).get(symbol)
+    
+    async def _generate_ai_signals(self, symbols: List[str]) -> Dict[str, AISignal]:
+        """Generate AI/ML trading signals for many symbols with one batched prediction"""
+        requests = []
+        for symbol in symbols:
+            features = self._build_features(symbol)
+            if features is not None:
+                requests.append((symbol, features))
+        if not requests:
+            return {}
+        
         try:
-            market_data = self.market_data[symbol]
-            indicators = self.indicators[symbol]
-            
-            # Prepare feature vector
-            features = {
-                "price": market_data.price,
-                "volume": market_data.volume,
-                "rsi": indicators.rsi,
-                "macd": indicators.macd,
-                "macd_signal": indicators.macd_signal,
-                "bb_position": (market_data.price - indicators.bb_lower) / (indicators.bb_upper - indicators.bb_lower),
-                "stoch_k": indicators.stoch_k,
-                "stoch_d": indicators.stoch_d,
-                "williams_r": indicators.williams_r,
-                "atr": indicators.atr,
-                "adx": indicators.adx,
-                "cci": indicators.cci
-            }
-            
-            # Get ML prediction
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.config['api']['base_url']}/ml/predict/enhanced"
-                params = {
-                    "symbol": symbol.lower(),
-                    "features": json.dumps(features),
-                    "timeframes": ",".join(self.config["timeframes"]),
-                    "include_confidence": True
-                }
-                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        signal_str = result.get("primary_signal", "HOLD")
-                        confidence = float(result.get("primary_confidence", 0))
-                        
-                        # Convert string to enum
-                        signal = TradingSignal.HOLD
-                        if signal_str == "BUY":
-                            signal = TradingSignal.BUY
-                        elif signal_str == "SELL":
-                            signal = TradingSignal.SELL
-                        
-                        # Calculate risk score based on indicators
-                        risk_score = self._calculate_risk_score(indicators, market_data)
-                        
-                        ai_signal = AISignal(
-                            signal=signal,
-                            confidence=confidence,
-                            timeframe=self.config["primary_timeframe"],
-                            indicators_used=list(features.keys()),
-                            model_version=result.get("model_version", "unknown"),
-                            prediction_horizon=result.get("prediction_horizon", "short"),
-                            risk_score=risk_score
-                        )
-                        
-                        self.signal_history.append(ai_signal)
-                        if len(self.signal_history) > 100:
-                            self.signal_history = self.signal_history[-100:]
-                        
-                        return ai_signal
-                        
+            results = await self.providers.predictions.predict_batch(requests, self.config["timeframes"])
         except Exception as e:
-            logger.error(f"Error generating AI signal for {symbol}: {e}")
-        return None
+            logger.error(f"Error generating AI signals for {len(requests)} symbols: {e}")
+            return {}
+        
+        signals = {}
+        for (symbol, features), result in zip(requests, results):
+            if result:
+                signals[symbol] = self._make_signal(symbol, features, result)
+        
+        self.signal_history.extend(signals.values())
+        if len(self.signal_history) > 100:
+            self.signal_history = self.signal_history[-100:]
+        return signals
+    
+    def _build_features(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Feature vector for the prediction provider, None when data is missing"""
+        market_data = self.market_data.get(symbol)
+        indicators = self.indicators.get(symbol)
+        if market_data is None or indicators is None:
+            return None
+        
+        bb_width = indicators.bb_upper - indicators.bb_lower
+        return {
+            "price": market_data.price,
+            "volume": market_data.volume,
+            "rsi": indicators.rsi,
+            "macd": indicators.macd,
+            "macd_signal": indicators.macd_signal,
+            "bb_position": (market_data.price - indicators.bb_lower) / bb_width if bb_width else 0.5,
+            "stoch_k": indicators.stoch_k,
+            "stoch_d": indicators.stoch_d,
+            "williams_r": indicators.williams_r,
+            "atr": indicators.atr,
+            "adx": indicators.adx,
+            "cci": indicators.cci,
+            "macd_histogram": indicators.macd_histogram,
+            "bb_upper": indicators.bb_upper,
+            "bb_lower": indicators.bb_lower,
+            "sma_20": indicators.sma_20,
+            "ema_20": indicators.ema_20,
+            "obv": indicators.obv
+        }
+    
+    def _make_signal(self, symbol: str, features: Dict[str, float], result: Dict) -> AISignal:
+        signal_str = result.get("primary_signal", "HOLD")
+        
+        # Convert string to enum
+        signal = TradingSignal.HOLD
+        if signal_str == "BUY":
+            signal = TradingSignal.BUY
+        elif signal_str == "SELL":
+            signal = TradingSignal.SELL
+        
+        return AISignal(
+            signal=signal,
+            confidence=float(result.get("primary_confidence", 0)),
+            timeframe=self.config["primary_timeframe"],
+            indicators_used=list(features.keys()),
+            model_version=result.get("model_version", "unknown"),
+            prediction_horizon=result.get("prediction_horizon", "short"),
+            # Calculate risk score based on indicators
+            risk_score=self._calculate_risk_score(self.indicators[symbol], self.market_data[symbol]),
+            symbol=symbol
+        )
     
     def _calculate_risk_score(self, indicators: TechnicalIndicators, market_data: MarketData) -> float:
         """Calculate risk score based on market conditions"""
@@ -515,25 +955,27 @@ class AdvancedAutoTradingEngine:
     async def _process_ai_signal(self, signal: AISignal):
         """Process AI signal and make trading decision"""
         try:
-            symbol = self.config["primary_symbol"]
-            
-            # Check if we can open new position
-            if len(self.positions) >= self.config["max_positions"]:
-                logger.info(f"Max positions reached ({self.config['max_positions']}), skipping signal")
-                return
-            
-            # Check signal confidence
-            if signal.confidence < self.config["min_confidence"]:
-                logger.info(f"Signal confidence {signal.confidence:.2%} below threshold {self.config['min_confidence']:.2%}")
-                return
+            symbol = signal.symbol or self.config["primary_symbol"]
             
-            # Check risk score
-            if signal.risk_score > 0.8:
-                logger.info(f"Risk score too high: {signal.risk_score:.2f}")
-                return
+            with self._stage(symbol, "risk_check"):
+                # Check if we can open new position
+                if len(self.positions) >= self.config["max_positions"]:
+                    logger.info(f"Max positions reached ({self.config['max_positions']}), skipping signal")
+                    return
+                
+                # Check signal confidence
+                if signal.confidence < self.config["min_confidence"]:
+                    logger.info(f"Signal confidence {signal.confidence:.2%} below threshold {self.config['min_confidence']:.2%}")
+                    return
+                
+                # Check risk score
+                if signal.risk_score > 0.8:
+                    logger.info(f"Risk score too high: {signal.risk_score:.2f}")
+                    return
             
             # Calculate position size
-            position_size = self._calculate_position_size(signal)
+            with self._stage(symbol, "sizing"):
+                position_size = self._calculate_position_size(signal)
             
             if position_size > 0:
                 await self._open_position(symbol, signal, position_size)
@@ -588,6 +1030,7 @@ class AdvancedAutoTradingEngine:
     async def _open_position(self, symbol: str, signal: AISignal, size: float):
         """Open a new trading position"""
         try:
+            started = time.perf_counter()
             market_data = self.market_data[symbol]
             
             # Calculate stop loss and take profit
@@ -601,7 +1044,7 @@ class AdvancedAutoTradingEngine:
                 take_profit = entry_price * (1 - self.config["take_profit_pct"] / 100)
             
             # Create position
-            position_id = f"{symbol}_{signal.signal.value}_{int(time.time())}"
+            position_id = f"{symbol}_{signal.signal.value}_{int(time.time())}_{self.trades_executed + 1}"
             position = Position(
                 id=position_id,
                 symbol=symbol,
@@ -617,13 +1060,22 @@ class AdvancedAutoTradingEngine:
                 opened_at=datetime.now()
             )
             
-            self.positions[position_id] = position
+            self.positions.add(position)
+            self.position_book.add(
+                symbol, position_id, entry_price, size / entry_price,
+                1 if signal.signal == TradingSignal.BUY else -1, stop_loss, take_profit
+            )
             self.trades_executed += 1
+            if self.ledger is not None:
+                self._publish(position)
             
             logger.info(f"🎯 Opened {signal.signal.value} position: {symbol} @ ${entry_price:.4f}, Size: ${size:.2f}, Confidence: {signal.confidence:.2%}")
+            self._journal("open", self._position_to_state(position))
+            self.latency.record(symbol, "open", (time.perf_counter() - started) * 1000, self._trace_kind)
             
             # Save to backend
-            await self._save_position_to_backend(position)
+            with self._stage(symbol, "persist"):
+                await self._save_position_to_backend(position)
             
         except Exception as e:
             logger.error(f"Error opening position: {e}")
@@ -642,87 +1094,92 @@ class AdvancedAutoTradingEngine:
                 self.market_data[symbol].price = price
                 self.market_data[symbol].timestamp = datetime.now()
             
-            # Check for stop loss / take profit triggers
-            for position_id, position in list(self.positions.items()):
-                if position.symbol == symbol and position.status == PositionStatus.OPEN:
-                    position.current_price = price
-                    
-                    # Check stop loss
-                    if position.side == TradingSignal.BUY and price <= position.stop_loss:
-                        await self._close_position(position.id, "Stop Loss Hit")
-                    elif position.side == TradingSignal.SELL and price >= position.stop_loss:
-                        await self._close_position(position.id, "Stop Loss Hit")
-                    
-                    # Check take profit
-                    elif position.side == TradingSignal.BUY and price >= position.take_profit:
-                        await self._close_position(position.id, "Take Profit Hit")
-                    elif position.side == TradingSignal.SELL and price <= position.take_profit:
-                        await self._close_position(position.id, "Take Profit Hit")
+            if self.ledger is not None:
+                self.ledger.mark(symbol, price)
+            
+            # Revalue this symbol's positions and check stop loss / take profit in one pass
+            for position_id, reason in self.position_book.revalue(symbol, price):
+                if reason == EXIT_STOP_LOSS:
+                    await self._close_position(position_id, "Stop Loss Hit")
+                elif reason == EXIT_TAKE_PROFIT:
+                    await self._close_position(position_id, "Take Profit Hit")
             
         except Exception as e:
             logger.error(f"Error processing market update: {e}")
     
+    async def ingest_tick(self, tick: Dict):
+        """Feed an external (e.g. replayed) price tick through the same PRICE_TICK path as live data"""
+        symbol = tick.get("symbol")
+        price = float(tick.get("price", 0))
+        if not symbol or not price:
+            return
+        
+        data = {"symbol": symbol, "price": price, "volume": float(tick.get("volume", 0))}
+        if self.dispatcher.is_running:
+            self.dispatcher.publish("PRICE_TICK", data, PRIORITY_TICK)
+        else:
+            await self.dispatcher.dispatch(Event("PRICE_TICK", data, PRIORITY_TICK))
+        
+        if tick.get("ts") and symbol in self.market_data:
+            self.market_data[symbol].timestamp = datetime.fromtimestamp(tick["ts"])
+    
     async def _update_position_pnl(self):
-        """Update P&L for all open positions"""
+        """Update total P&L from the position book's per-symbol unrealized totals"""
         try:
-            total_unrealized = 0.0
-            
-            for position in self.positions.values():
-                if position.status == PositionStatus.OPEN:
-                    market_data = self.market_data.get(position.symbol)
-                    if market_data:
-                        position.current_price = market_data.price
-                        
-                        # Calculate unrealized P&L
-                        if position.side == TradingSignal.BUY:
-                            position.unrealized_pnl = (position.current_price - position.entry_price) * position.size / position.entry_price
-                        else:
-                            position.unrealized_pnl = (position.entry_price - position.current_price) * position.size / position.entry_price
-                        
-                        total_unrealized += position.unrealized_pnl
+            total_unrealized = self.position_book.unrealized_total()
             
-            # Update total P&L
-            realized_pnl = sum(p.pnl for p in self.positions.values() if p.status == PositionStatus.CLOSED)
-            self.total_pnl = realized_pnl + total_unrealized
+            # Update total P&L and equity drawdown from the running aggregates
+            stats = self.positions.stats
+            self.total_pnl = stats.realized_pnl + total_unrealized
+            stats.mark_equity(self.config["balance"] + self.total_pnl)
+            self.max_drawdown = stats.max_drawdown_pct
             
         except Exception as e:
             logger.error(f"Error updating position P&L: {e}")
     
     async def _check_exit_conditions(self):
-        """Check stop loss and take profit conditions"""
+        """Check stop loss and take profit conditions at each symbol's latest price"""
         try:
-            for position in list(self.positions.values()):
-                if position.status == PositionStatus.OPEN:
-                    should_close = False
-                    close_reason = ""
-                    
-                    if position.side == TradingSignal.BUY:
-                        if position.current_price <= position.stop_loss:
-                            should_close = True
-                            close_reason = "Stop Loss"
-                        elif position.current_price >= position.take_profit:
-                            should_close = True
-                            close_reason = "Take Profit"
-                    else:
-                        if position.current_price >= position.stop_loss:
-                            should_close = True
-                            close_reason = "Stop Loss"
-                        elif position.current_price <= position.take_profit:
-                            should_close = True
-                            close_reason = "Take Profit"
-                    
-                    if should_close:
-                        await self._close_position(position.id, close_reason)
+            for symbol in list(self.position_book.books):
+                market_data = self.market_data.get(symbol)
+                if market_data:
+                    await self._process_market_update({"symbol": symbol, "price": market_data.price})
                         
         except Exception as e:
             logger.error(f"Error checking exit conditions: {e}")
     
+    def attach_ledger(self, ledger: LedgerSource):
+        """Publish open positions to the portfolio ledger, then keep it updated on open / close / tick"""
+        self.ledger = ledger
+        ledger.reset()
+        for position in self.positions.values():
+            self._sync_position(position)
+            self._publish(position)
+    
+    def _publish(self, position: Position):
+        sign = 1 if position.side == TradingSignal.BUY else -1
+        self.ledger.set_position(position.id, position.symbol, sign * position.size / position.entry_price,
+                                 position.entry_price, mark_price=position.current_price)
+    
+    def sync_positions(self):
+        """Copy current price / unrealized P&L from the position book onto the open Position objects"""
+        for position in self.positions.values():
+            self._sync_position(position)
+    
+    def _sync_position(self, position: Position):
+        snapshot = self.position_book.snapshot(position.id)
+        if snapshot is not None and not np.isnan(snapshot[0]):
+            position.current_price, position.unrealized_pnl, _ = snapshot
+    
     async def _close_position(self, position_id: str, reason: str = "Manual"):
         """Close a trading position"""
         try:
             position = self.positions.get(position_id)
             if not position or position.status != PositionStatus.OPEN:
                 return
+            started = time.perf_counter()
+            self._sync_position(position)
+            self.position_book.remove(position_id)
             
             # Calculate final P&L
             if position.side == TradingSignal.BUY:
@@ -734,19 +1191,28 @@ class AdvancedAutoTradingEngine:
             position.closed_at = datetime.now()
             position.unrealized_pnl = 0.0
             
-            # Update statistics
-            if position.pnl > 0:
-                winning_trades = sum(1 for p in self.positions.values() if p.status == PositionStatus.CLOSED and p.pnl > 0)
-            else:
-                winning_trades = sum(1 for p in self.positions.values() if p.status == PositionStatus.CLOSED and p.pnl > 0)
-            
-            closed_trades = sum(1 for p in self.positions.values() if p.status == PositionStatus.CLOSED)
-            self.win_rate = winning_trades / closed_trades if closed_trades > 0 else 0.0
+            # Move to the closed ledger; statistics update incrementally
+            self.positions.close(position_id)
+            self.win_rate = self.positions.stats.win_rate
+            if self.ledger is not None:
+                self.ledger.remove_position(position_id, position.pnl)
+            self._journal("close", {
+                "id": position_id,
+                "pnl": position.pnl,
+                "current_price": position.current_price,
+                "closed_at": position.closed_at.isoformat(),
+                "reason": reason
+            })
+            # Freed capacity: pending signals may now execute
+            if self.dispatcher.is_running:
+                self._schedule_execution()
             
             logger.info(f"🏁 Closed {position.side.value} position: {position.symbol} @ ${position.current_price:.4f}, P&L: ${position.pnl:.2f} ({reason})")
+            self.latency.record(position.symbol, "close", (time.perf_counter() - started) * 1000, self._trace_kind)
             
             # Save to backend
-            await self._save_position_to_backend(position)
+            with self._stage(position.symbol, "persist"):
+                await self._save_position_to_backend(position)
             
         except Exception as e:
             logger.error(f"Error closing position: {e}")
@@ -755,17 +1221,17 @@ class AdvancedAutoTradingEngine:
         """Monitor overall portfolio risk"""
         try:
             # Calculate total exposure
-            total_exposure = sum(p.size for p in self.positions.values() if p.status == PositionStatus.OPEN)
+            total_exposure = self.positions.open_exposure
             max_exposure = self.config["balance"] * 0.5  # 50% max exposure
             
             if total_exposure > max_exposure:
-                await self.events.put(("RISK_ALERT", {"type": "HIGH_EXPOSURE", "exposure": total_exposure}))
+                self._raise_risk_alert({"type": "HIGH_EXPOSURE", "exposure": total_exposure})
             
             # Check drawdown
             if self.total_pnl < 0:
                 drawdown_pct = abs(self.total_pnl) / self.config["balance"] * 100
                 if drawdown_pct > 10:  # 10% drawdown alert
-                    await self.events.put(("RISK_ALERT", {"type": "HIGH_DRAWDOWN", "drawdown": drawdown_pct}))
+                    self._raise_risk_alert({"type": "HIGH_DRAWDOWN", "drawdown": drawdown_pct})
                     
         except Exception as e:
             logger.error(f"Error monitoring portfolio risk: {e}")
@@ -777,7 +1243,8 @@ class AdvancedAutoTradingEngine:
             
             if alert_type == "HIGH_EXPOSURE":
                 # Close least profitable position
-                open_positions = [p for p in self.positions.values() if p.status == PositionStatus.OPEN]
+                self.sync_positions()
+                open_positions = list(self.positions.values())
                 if open_positions:
                     worst_position = min(open_positions, key=lambda p: p.unrealized_pnl)
                     await self._close_position(worst_position.id, "Risk Management - High Exposure")
@@ -795,8 +1262,7 @@ class AdvancedAutoTradingEngine:
     async def _close_all_positions(self):
         """Close all open positions"""
         try:
-            open_positions = [p for p in self.positions.values() if p.status == PositionStatus.OPEN]
-            for position in open_positions:
+            for position in list(self.positions.values()):
                 await self._close_position(position.id, "System Stop")
                 
         except Exception as e:
@@ -805,17 +1271,15 @@ class AdvancedAutoTradingEngine:
     async def _save_position_to_backend(self, position: Position):
         """Save position to backend for dashboard display"""
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.config['api']['base_url']}/auto_trading/positions"
-                data = asdict(position)
-                # Convert datetime objects to strings
-                data["opened_at"] = position.opened_at.isoformat()
-                if position.closed_at:
-                    data["closed_at"] = position.closed_at.isoformat()
-                
-                async with session.post(url, json=data, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        logger.debug(f"Position saved to backend: {position.id}")
+            data = asdict(position)
+            # Convert datetime and enum values to plain types
+            data["side"] = position.side.value
+            data["status"] = position.status.value
+            data["opened_at"] = position.opened_at.isoformat()
+            if position.closed_at:
+                data["closed_at"] = position.closed_at.isoformat()
+            
+            await self.providers.persistence.save_position(data)
                         
         except Exception as e:
             logger.debug(f"Error saving position to backend: {e}")
@@ -823,27 +1287,82 @@ class AdvancedAutoTradingEngine:
     # API methods for dashboard integration
     async def get_status(self) -> Dict:
         """Get current auto trading status"""
-        open_positions = [p for p in self.positions.values() if p.status == PositionStatus.OPEN]
-        closed_positions = [p for p in self.positions.values() if p.status == PositionStatus.CLOSED]
-        
         return {
             "enabled": self.config["enabled"],
             "is_running": self.is_running,
             "balance": self.config["balance"],
             "total_pnl": self.total_pnl,
-            "open_positions": len(open_positions),
+            "open_positions": len(self.positions),
+            "closed_positions": len(self.positions.closed),
             "total_trades": self.trades_executed,
             "win_rate": self.win_rate * 100,
             "max_drawdown": self.max_drawdown,
+            "trade_stats": self.positions.stats.to_dict(),
             "current_signals": len(self.signal_history),
             "primary_symbol": self.config["primary_symbol"],
-            "risk_per_trade": self.config["risk_per_trade"]
+            "risk_per_trade": self.config["risk_per_trade"],
+            "feed_mode": self.feed_mode,
+            "feed": dict(self.feed_stats, stale_symbols=self.get_stale_symbols() if self.is_running else []),
+            "last_tick_to_order_ms": self.last_tick_to_order_ms,
+            "events": self.dispatcher.get_stats(),
+            "signal_book": self.signal_book.get_status(),
+            "strategies": self.strategies.get_status() if self.strategies is not None else None,
+            "state_journal": self.journal.get_status() if self.journal is not None else None
         }
     
-    async def get_positions(self) -> List[Dict]:
-        """Get all positions"""
+    def get_latency_report(self, symbol: Optional[str] = None) -> Dict:
+        """Stage latency percentiles (per symbol and "*" for all) and the slowest traced decisions"""
+        return {
+            "stages": self.latency.get_summary(symbol.upper() if symbol else None),
+            "slowest_decisions": self.latency.get_slowest(),
+            "sampling": {
+                "enabled": self.latency.sample_rate > 0,
+                "sample_rate": self.latency.sample_rate,
+                "trace_slowest": self.latency.trace_slowest
+            },
+            "last_tick_to_order_ms": self.last_tick_to_order_ms
+        }
+    
+    def set_latency_sampling(self, enabled: bool, sample_rate: Optional[float] = None,
+                             trace_slowest: Optional[int] = None):
+        latency_config = self.config["latency"]
+        latency_config["sampling"] = enabled
+        if sample_rate is not None:
+            latency_config["sample_rate"] = sample_rate
+        if trace_slowest is not None:
+            latency_config["trace_slowest"] = trace_slowest
+        self.latency.configure(
+            trace_slowest=latency_config.get("trace_slowest", 20),
+            sample_rate=latency_config.get("sample_rate", 1.0) if enabled else 0.0
+        )
+    
+    def configure_strategies(self, variants: Optional[List[Dict]] = None, grid: Optional[Dict[str, List]] = None):
+        """(Re)start multi-strategy paper trading with explicit variants and/or a parameter grid"""
+        base = {key: self.config[key] for key in ("min_confidence", "stop_loss_pct", "take_profit_pct",
+                                                  "risk_per_trade", "max_positions", "balance")}
+        sizing = self.config["position_sizing"]
+        base.update(sizing_method=sizing["method"], base_amount=sizing["base_amount"],
+                    max_position_size=sizing["max_position_size"])
+        all_variants = [dict(base, **variant) for variant in variants or []]
+        if grid:
+            all_variants.extend(expand_grid(base, grid))
+        if not all_variants:
+            all_variants = [dict(base, name="live")]
+        self.strategies = StrategyEvaluator(all_variants)
+        logger.info(f"Multi-strategy paper trading with {len(self.strategies)} variants")
+        return len(self.strategies)
+    
+    def get_strategy_ranking(self, limit: Optional[int] = None, sort_by: str = "total_pnl") -> Dict:
+        if self.strategies is None:
+            return {"enabled": False, "ranking": []}
+        return {"enabled": True, **self.strategies.get_status(),
+                "ranking": self.strategies.ranking(limit, sort_by)}
+    
+    async def get_positions(self, closed_limit: int = 100) -> List[Dict]:
+        """Get open positions plus the most recent closed ones"""
+        self.sync_positions()
         positions_data = []
-        for position in self.positions.values():
+        for position in [*self.positions.values(), *self.positions.recent_closed(closed_limit)]:
             pos_data = asdict(position)
             pos_data["opened_at"] = position.opened_at.isoformat()
             if position.closed_at:
@@ -941,3 +1460,14 @@ class AdvancedAutoTradingEngine:
         except Exception as e:
             logger.error(f"Error getting current signal: {e}")
             return None
+
+# Global engine instance, created on first use (see get_advanced_auto_trading_engine)
+advanced_auto_trading_engine: Optional[AdvancedAutoTradingEngine] = None
+
+def get_advanced_auto_trading_engine() -> AdvancedAutoTradingEngine:
+    """Get or create the process-wide engine, publishing its positions to the portfolio ledger"""
+    global advanced_auto_trading_engine
+    if advanced_auto_trading_engine is None:
+        advanced_auto_trading_engine = AdvancedAutoTradingEngine()
+        advanced_auto_trading_engine.attach_ledger(get_portfolio_ledger().source("advanced_auto_trading"))
+    return advanced_auto_trading_engine
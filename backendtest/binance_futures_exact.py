@@ -4,13 +4,22 @@ Exact match to Binance Futures for real trading automation
 """
 
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Literal, Set
 from datetime import datetime
 import json
 import os
 import math
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
 from enum import Enum
 
+from order_matching import OrderMatcher
+from event_journal import EventJournal
+from accounts import AccountTable, DEFAULT_ACCOUNT, valid_account_id
+from portfolio_ledger import LedgerSource
+
 # Binance Futures Exact Enums
 class PositionSide(str, Enum):
     BOTH = "BOTH"      # One-way mode
@@ -48,7 +57,9 @@ class WorkingType(str, Enum):
     MARK_PRICE = "MARK_PRICE"
     CONTRACT_PRICE = "CONTRACT_PRICE"
 
-# Binance Futures Models
+OPEN_ORDER_STATUSES = (OrderStatus.NEW, OrderStatus.PARTIALLY_FILLED)
+
+# Binance Futures Models (API response shapes; the engine keeps numeric *State records below)
 class BinanceFuturesOrder(BaseModel):
     orderId: int
     symbol: str
@@ -72,6 +83,8 @@ class BinanceFuturesOrder(BaseModel):
     origType: OrderType
     time: int
     updateTime: int
+    activatePrice: Optional[str] = None  # TRAILING_STOP_MARKET only
+    priceRate: Optional[str] = None  # TRAILING_STOP_MARKET callback rate (%)
 
 class BinanceFuturesPosition(BaseModel):
     symbol: str
@@ -150,13 +163,277 @@ class BinanceFuturesLeverageBracket(BaseModel):
     maintMarginRatio: float
     cum: float
 
+# Internal engine state: __slots__ records holding floats/ints. Binance's decimal strings are
+# produced only at the API boundary (to_dict), so fills and ticks never round-trip through str.
+NUM = "num"  # prices / quantities: shortest decimal string, e.g. "0.001", "43000"
+AMOUNT = "amount"  # balances / PnL: fixed 8 decimals, e.g. "10000.00000000"
+
+
+def format_num(value: float) -> str:
+    text = f"{value:.8f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def format_amount(value: float) -> str:
+    text = f"{value:.8f}"
+    return "0.00000000" if text == "-0.00000000" else text
+
+
+def _parse(kind, value):
+    if value is None:
+        return None
+    if kind in (NUM, AMOUNT):
+        return float(value)
+    if kind is bool:
+        return value if isinstance(value, bool) else str(value).lower() == "true"
+    return kind(value)  # int / str / Enum
+
+
+def _format(kind, value):
+    if value is None:
+        return None
+    if kind == NUM:
+        return format_num(value)
+    if kind == AMOUNT:
+        return format_amount(value)
+    if isinstance(kind, type) and issubclass(kind, Enum):
+        return value.value
+    return value
+
+
+class _StateRecord:
+    """Fields are declared once in FIELDS as (name, kind); kinds NUM/AMOUNT are stored as float"""
+    __slots__ = ()
+    FIELDS: tuple = ()
+    OPTIONAL: tuple = ()  # fields omitted from API output while None
+
+    def __init__(self, **values):
+        for name, _ in self.FIELDS:
+            setattr(self, name, values[name] if name not in self.OPTIONAL else values.get(name))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build from an API dict (Binance strings) or a state dict (numbers); unknown keys are ignored"""
+        return cls(**{name: _parse(kind, data.get(name)) for name, kind in cls.FIELDS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Binance API representation"""
+        result = {name: _format(kind, getattr(self, name)) for name, kind in self.FIELDS}
+        for name in self.OPTIONAL:
+            if result[name] is None:
+                del result[name]
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        """Compact numeric representation for the journal / snapshots"""
+        return {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in ((name, getattr(self, name)) for name, _ in self.FIELDS)
+        }
+
+
+class FuturesOrderState(_StateRecord):
+    FIELDS = (
+        ("orderId", int), ("symbol", str), ("status", OrderStatus), ("clientOrderId", str),
+        ("price", NUM), ("avgPrice", NUM), ("origQty", NUM), ("executedQty", NUM), ("cumQuote", AMOUNT),
+        ("timeInForce", TimeInForce), ("type", OrderType), ("reduceOnly", bool), ("closePosition", bool),
+        ("side", OrderSide), ("positionSide", PositionSide), ("stopPrice", NUM), ("workingType", WorkingType),
+        ("priceProtect", bool), ("origType", OrderType), ("time", int), ("updateTime", int),
+        ("activatePrice", NUM), ("priceRate", NUM), ("account", str)
+    )
+    OPTIONAL = ("activatePrice", "priceRate", "account")
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+    # Orders and positions are serialised on every fill, so they spell out their fields
+    def to_dict(self) -> Dict[str, Any]:
+        executed_qty = format_num(self.executedQty)
+        result = {
+            "orderId": self.orderId,
+            "symbol": self.symbol,
+            "status": self.status.value,
+            "clientOrderId": self.clientOrderId,
+            "price": format_num(self.price),
+            "avgPrice": format_num(self.avgPrice),
+            "origQty": format_num(self.origQty),
+            "executedQty": executed_qty,
+            "cumQty": executed_qty,
+            "cumQuote": format_amount(self.cumQuote),
+            "timeInForce": self.timeInForce.value,
+            "type": self.type.value,
+            "reduceOnly": self.reduceOnly,
+            "closePosition": self.closePosition,
+            "side": self.side.value,
+            "positionSide": self.positionSide.value,
+            "stopPrice": format_num(self.stopPrice),
+            "workingType": self.workingType.value,
+            "priceProtect": self.priceProtect,
+            "origType": self.origType.value,
+            "time": self.time,
+            "updateTime": self.updateTime
+        }
+        if self.activatePrice is not None:
+            result["activatePrice"] = format_num(self.activatePrice)
+        if self.priceRate is not None:
+            result["priceRate"] = format_num(self.priceRate)
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "orderId": self.orderId, "symbol": self.symbol, "status": self.status.value,
+            "clientOrderId": self.clientOrderId, "price": self.price, "avgPrice": self.avgPrice,
+            "origQty": self.origQty, "executedQty": self.executedQty, "cumQuote": self.cumQuote,
+            "timeInForce": self.timeInForce.value, "type": self.type.value, "reduceOnly": self.reduceOnly,
+            "closePosition": self.closePosition, "side": self.side.value, "positionSide": self.positionSide.value,
+            "stopPrice": self.stopPrice, "workingType": self.workingType.value, "priceProtect": self.priceProtect,
+            "origType": self.origType.value, "time": self.time, "updateTime": self.updateTime,
+            "activatePrice": self.activatePrice, "priceRate": self.priceRate, "account": self.account
+        }
+
+
+class FuturesPositionState(_StateRecord):
+    FIELDS = (
+        ("symbol", str), ("positionAmt", NUM), ("entryPrice", NUM), ("markPrice", NUM),
+        ("unRealizedProfit", AMOUNT), ("liquidationPrice", NUM), ("leverage", int), ("maxNotionalValue", NUM),
+        ("marginType", str), ("isolatedMargin", AMOUNT), ("isAutoAddMargin", str), ("positionSide", PositionSide),
+        ("notional", NUM), ("isolatedWallet", AMOUNT), ("updateTime", int)
+    )
+    # Positions are polled (positionRisk / account) far more often than they change: the API dict
+    # is cached until the engine calls touch() after mutating the position
+    __slots__ = tuple(name for name, _ in FIELDS) + ("_api",)
+
+    def __init__(self, **values):
+        super().__init__(**values)
+        self._api = None
+
+    def touch(self):
+        self._api = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._api is None:
+            self._api = self._format_api()
+        return dict(self._api)
+
+    def _format_api(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "positionAmt": format_num(self.positionAmt),
+            "entryPrice": format_num(self.entryPrice),
+            "markPrice": format_num(self.markPrice),
+            "unRealizedProfit": format_amount(self.unRealizedProfit),
+            "liquidationPrice": format_num(self.liquidationPrice),
+            "leverage": str(self.leverage),
+            "maxNotionalValue": format_num(self.maxNotionalValue),
+            "marginType": self.marginType,
+            "isolatedMargin": format_amount(self.isolatedMargin),
+            "isAutoAddMargin": self.isAutoAddMargin,
+            "positionSide": self.positionSide.value,
+            "notional": format_num(self.notional),
+            "isolatedWallet": format_amount(self.isolatedWallet),
+            "updateTime": self.updateTime
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol, "positionAmt": self.positionAmt, "entryPrice": self.entryPrice,
+            "markPrice": self.markPrice, "unRealizedProfit": self.unRealizedProfit,
+            "liquidationPrice": self.liquidationPrice, "leverage": self.leverage,
+            "maxNotionalValue": self.maxNotionalValue, "marginType": self.marginType,
+            "isolatedMargin": self.isolatedMargin, "isAutoAddMargin": self.isAutoAddMargin,
+            "positionSide": self.positionSide.value, "notional": self.notional,
+            "isolatedWallet": self.isolatedWallet, "updateTime": self.updateTime
+        }
+
+
+class FuturesAccountState(_StateRecord):
+    FIELDS = (
+        ("feeTier", int), ("canTrade", bool), ("canDeposit", bool), ("canWithdraw", bool), ("updateTime", int),
+        ("multiAssetsMargin", bool), ("tradeGroupId", int), ("totalWalletBalance", AMOUNT),
+        ("totalUnrealizedProfit", AMOUNT), ("totalPositionInitialMargin", AMOUNT),
+        ("totalOpenOrderInitialMargin", AMOUNT), ("availableBalance", AMOUNT)
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+
+class FuturesBalanceState(_StateRecord):
+    FIELDS = (
+        ("accountAlias", str), ("asset", str), ("balance", AMOUNT), ("crossWalletBalance", AMOUNT),
+        ("crossUnPnl", AMOUNT), ("availableBalance", AMOUNT), ("maxWithdrawAmount", AMOUNT),
+        ("marginAvailable", bool), ("updateTime", int)
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+# A position's contribution to the account margin totals before its first revaluation
+NO_MARGINS = (0.0, 0.0, 0.0, False)
+
+DEFAULT_LEVERAGE = 20
+STARTING_BALANCE = 10000.0
+
+# Per-account columns: the wallet plus running mark-to-market totals of the account's open positions
+ACCOUNT_COLUMNS = {
+    "wallet": STARTING_BALANCE,
+    "unrealized_pnl": 0.0,
+    "initial_margin": 0.0,
+    "maint_margin": 0.0,
+    "cross_unrealized_pnl": 0.0,
+    "cross_maint_margin": 0.0
+}
+MARGIN_COLUMNS = ("unrealized_pnl", "initial_margin", "maint_margin", "cross_unrealized_pnl", "cross_maint_margin")
+
+UNKNOWN_ACCOUNT = {"code": -2015, "msg": "Invalid API-key, IP, or permissions for action."}
+
+MAX_BATCH_ORDERS = 5  # Binance limit for /fapi/v1/batchOrders
+MAX_BULK_ORDERS = 1000  # simulator-only bulk mode of the same endpoint
+MAX_BATCH_CANCELS = 10  # Binance limit for orderIdList
+
+
+def position_key(account: str, symbol: str, direction: str) -> str:
+    return f"{account}/{symbol}_{direction}"
+
+
+def key_account(key: str) -> str:
+    return key.split("/", 1)[0]
+
+
+def _account_key(key: str) -> str:
+    """Keys journaled before sub-accounts existed ("BTCUSDT_LONG") belong to the default account"""
+    return key if "/" in key else position_key(DEFAULT_ACCOUNT, *key.rsplit("_", 1))
+
+
+def _flag(value: Any) -> bool:
+    """Binance boolean parameters arrive as the strings 'true' / 'false'"""
+    return value if isinstance(value, bool) else str(value).lower() == "true"
+
+
+def _locked(method):
+    """Serialise engine mutations and the readers that iterate engine state: routes run in worker
+    threads, price updates on the event loop"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _per_account(settings: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Settings snapshots before sub-accounts were flat {symbol: value}"""
+    if settings and not all(isinstance(value, dict) for value in settings.values()):
+        return {DEFAULT_ACCOUNT: settings}
+    return settings
+
 # Enhanced Futures Trading Engine - Binance Compatible
 class BinanceFuturesTradingEngine:
     def __init__(self):
-        self.positions: Dict[str, BinanceFuturesPosition] = {}
-        self.orders: Dict[int, BinanceFuturesOrder] = {}
-        self.balances: Dict[str, BinanceFuturesBalance] = {}
-        self.account_info = BinanceFuturesAccountInfo(
+        # Sub-accounts share the engine's tables: positions keyed "account/SYMBOL_DIRECTION" (open
+        # ones only), orders tagged with their account, and one AccountTable row per account
+        self.positions: Dict[str, FuturesPositionState] = {}
+        self.orders: Dict[int, FuturesOrderState] = {}
+        self.accounts = AccountTable(ACCOUNT_COLUMNS)
+        self.accounts.add(DEFAULT_ACCOUNT)
+        self.symbol_positions: Dict[str, Set[str]] = {}  # symbol -> open position keys, all accounts
+        self.account_positions: Dict[str, Set[str]] = {}  # account -> open position keys
+        
+        # Account-wide flags (fee tier, permissions) shared by all sub-accounts
+        self.account_info = FuturesAccountState(
             feeTier=0,
             canTrade=True,
             canDeposit=True,
@@ -164,33 +441,25 @@ class BinanceFuturesTradingEngine:
             updateTime=int(datetime.now().timestamp() * 1000),
             multiAssetsMargin=False,
             tradeGroupId=0,
-            totalWalletBalance="10000.00000000",
-            totalUnrealizedProfit="0.00000000",
-            totalMarginBalance="10000.00000000",
-            totalPositionInitialMargin="0.00000000",
-            totalOpenOrderInitialMargin="0.00000000",
-            totalCrossWalletBalance="10000.00000000",
-            totalCrossUnPnl="0.00000000",
-            availableBalance="10000.00000000",
-            maxWithdrawAmount="10000.00000000"
-        )
-        
-        # Initialize USDT balance
-        self.balances["USDT"] = BinanceFuturesBalance(
-            accountAlias="SgsR",
-            asset="USDT",
-            balance="10000.00000000",
-            crossWalletBalance="10000.00000000",
-            crossUnPnl="0.00000000",
-            availableBalance="10000.00000000",
-            maxWithdrawAmount="10000.00000000",
-            marginAvailable=True,
-            updateTime=int(datetime.now().timestamp() * 1000)
+            totalWalletBalance=STARTING_BALANCE,
+            totalUnrealizedProfit=0.0,
+            totalPositionInitialMargin=0.0,
+            totalOpenOrderInitialMargin=0.0,
+            availableBalance=STARTING_BALANCE
         )
         
         self.order_id_counter = 1000000
-        self.leverage_settings: Dict[str, int] = {}  # symbol -> leverage
-        self.margin_type: Dict[str, str] = {}  # symbol -> "isolated" or "cross"
+        self.leverage_settings: Dict[str, Dict[str, int]] = {}  # account -> symbol -> leverage
+        self.margin_type: Dict[str, Dict[str, str]] = {}  # account -> symbol -> "isolated" or "cross"
+        
+        # Resting LIMIT / STOP / TAKE_PROFIT / TRAILING orders, matched on price updates
+        self.matcher = OrderMatcher()
+        self.last_prices: Dict[str, float] = {}
+        self.mark_prices: Dict[str, float] = {}
+        
+        # Persistence: snapshot of open orders / positions plus an append-only journal of changes;
+        # finished orders are moved to an archive file whenever the journal is compacted
+        self.journal = EventJournal("data", "binance_futures", compact_every=1000)
         
         # Binance-exact maintenance margin rates
         self.maintenance_margins = {
@@ -217,19 +486,115 @@ class BinanceFuturesTradingEngine:
                 {"notional_floor": 10000000, "notional_cap": float('inf'), "maint_margin_ratio": 0.5, "cum": 4007775}
             ]
         }
+        self.bracket_floors = {
+            symbol: [bracket["notional_floor"] for bracket in brackets]
+            for symbol, brackets in self.maintenance_margins.items()
+        }
+        
+        # Mark-to-market: every price update revalues the symbol's positions at the mark price and
+        # swaps their (unrealized PnL, initial margin, maint margin, is_cross) in their account's totals
+        self.position_margins: Dict[str, tuple] = {}
+        
+        # countdownCancelAll: (account, symbol) -> time (ms) at which all its open orders are cancelled
+        self.lock = threading.RLock()
+        self.countdowns: Dict[tuple, int] = {}
+        self.ledger: Optional[LedgerSource] = None  # portfolio-wide exposure, see attach_ledger
         
         self.load_data()
     
+    @contextmanager
+    def batch(self):
+        """Run several engine calls atomically (one lock hold) with a single journal write"""
+        with self.lock:
+            with self.journal.batch():
+                yield self
+            if self.journal.needs_snapshot:
+                self.save_data()
+    
+    # ------------------------------------------------------------------ sub-accounts
+    
+    @_locked
+    def create_account(self, account: str, balance: float = STARTING_BALANCE) -> Dict[str, Any]:
+        """Open a sub-account with its own wallet, positions and leverage / margin type settings"""
+        if not valid_account_id(account):
+            return {
+                "code": -1100,
+                "msg": "Illegal characters found in parameter 'account'; legal range is '^[A-Za-z0-9_-]{1,32}$'."
+            }
+        if account in self.accounts:
+            return {"code": -1102, "msg": f"Account '{account}' already exists."}
+        if balance < 0:
+            return {"code": -1102, "msg": "Parameter 'balance' was malformed."}
+        self.accounts.add(account, wallet=float(balance))
+        self._journal("account_created", {"account": account, "walletBalance": float(balance)})
+        return self.get_account_summary(account)
+    
+    @_locked
+    def delete_account(self, account: str) -> Dict[str, Any]:
+        """Remove a sub-account once it has no open positions or orders"""
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        if account == DEFAULT_ACCOUNT:
+            return {"code": -1102, "msg": "The default account cannot be deleted."}
+        if self.account_in_use(account):
+            return {"code": -1102, "msg": f"Account '{account}' has open positions or orders."}
+        self._remove_account(account)
+        self._journal("account_deleted", {"account": account})
+        return {"code": 200, "msg": "success"}
+    
+    @_locked
+    def account_in_use(self, account: str) -> bool:
+        return bool(self.account_positions.get(account)) or any(
+            order.account == account and order.status in OPEN_ORDER_STATUSES for order in self.orders.values()
+        )
+    
+    def _remove_account(self, account: str):
+        self.accounts.remove(account)
+        self.account_positions.pop(account, None)
+        self.leverage_settings.pop(account, None)
+        self.margin_type.pop(account, None)
+    
+    @_locked
+    def get_account_summary(self, account: str) -> Dict[str, Any]:
+        row = self.accounts.row(account)
+        columns = self.accounts.columns
+        wallet = columns["wallet"][row]
+        unrealized = columns["unrealized_pnl"][row]
+        return {
+            "account": account,
+            "walletBalance": format_amount(wallet),
+            "unrealizedProfit": format_amount(unrealized),
+            "marginBalance": format_amount(wallet + unrealized),
+            "availableBalance": format_amount(wallet - columns["initial_margin"][row]),
+            "positions": len(self.account_positions.get(account, ()))
+        }
+    
+    @_locked
+    def list_accounts(self) -> List[Dict[str, Any]]:
+        return [self.get_account_summary(account) for account in self.accounts]
+    
+    def get_leverage(self, symbol: str, account: str = DEFAULT_ACCOUNT, default: int = DEFAULT_LEVERAGE) -> int:
+        return self.leverage_settings.get(account, {}).get(symbol, default)
+    
+    def get_available_balance(self, account: str = DEFAULT_ACCOUNT) -> float:
+        row = self.accounts.row(account)
+        return self.accounts.columns["wallet"][row] - self.accounts.columns["initial_margin"][row]
+    
     def get_maintenance_margin_rate(self, symbol: str, notional: float) -> tuple:
         """Get maintenance margin rate and cum for a symbol and notional value"""
-        brackets = self.maintenance_margins.get(symbol, self.maintenance_margins["BTCUSDT"])
-        
-        for bracket in brackets:
-            if bracket["notional_floor"] <= notional < bracket["notional_cap"]:
-                return bracket["maint_margin_ratio"], bracket["cum"]
+        if symbol not in self.maintenance_margins:
+            symbol = "BTCUSDT"
+        brackets = self.maintenance_margins[symbol]
         
-        # Default to highest bracket
-        return 0.5, brackets[-1]["cum"]
+        # Last bracket whose floor <= notional
+        index = bisect.bisect_right(self.bracket_floors[symbol], notional) - 1
+        bracket = brackets[max(index, 0)]
+        return bracket["maint_margin_ratio"], bracket["cum"]
+    
+    def get_maintenance_margin(self, symbol: str, notional: float) -> float:
+        """Maintenance margin of a position: notional * rate - cum (maintenance amount)"""
+        maint_margin_rate, cum = self.get_maintenance_margin_rate(symbol, notional)
+        return notional * maint_margin_rate - cum
     
     def calculate_liquidation_price_binance(self, symbol: str, side: str, position_amt: float, 
                                           entry_price: float, leverage: int, 
@@ -262,20 +627,52 @@ class BinanceFuturesTradingEngine:
         if notional == 0:
             return 0
             
-        maint_margin_rate, cum = self.get_maintenance_margin_rate(symbol, notional)
-        maintenance_margin = notional * maint_margin_rate + cum
-        
-        return maintenance_margin / wallet_balance
+        return self.get_maintenance_margin(symbol, notional) / wallet_balance
+    
+    def get_cross_margin_ratio(self, account: str = DEFAULT_ACCOUNT) -> float:
+        """Account margin ratio (cross positions): maintenance margin / margin balance; >= 1 liquidates"""
+        row = self.accounts.row(account)
+        columns = self.accounts.columns
+        cross_maint_margin = columns["cross_maint_margin"][row]
+        margin_balance = columns["wallet"][row] + columns["cross_unrealized_pnl"][row]
+        if margin_balance <= 0:
+            return math.inf if cross_maint_margin > 0 else 0.0
+        return cross_maint_margin / margin_balance
     
+    @_locked
     def new_order(self, symbol: str, side: OrderSide, order_type: OrderType, 
                   quantity: str, price: Optional[str] = None, 
                   position_side: PositionSide = PositionSide.BOTH,
                   time_in_force: TimeInForce = TimeInForce.GTC,
                   reduce_only: bool = False, close_position: bool = False,
                   stop_price: Optional[str] = None, 
-                  working_type: WorkingType = WorkingType.CONTRACT_PRICE) -> Dict[str, Any]:
+                  working_type: WorkingType = WorkingType.CONTRACT_PRICE,
+                  activation_price: Optional[str] = None,
+                  callback_rate: Optional[str] = None,
+                  account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Place new order - Binance API compatible"""
         try:
+            if account not in self.accounts:
+                return dict(UNKNOWN_ACCOUNT)
+            if order_type in (OrderType.STOP, OrderType.STOP_MARKET, OrderType.TAKE_PROFIT, OrderType.TAKE_PROFIT_MARKET):
+                if not stop_price:
+                    return {
+                        "code": -1102,
+                        "msg": "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed."
+                    }
+                reference_price = self._reference_price(symbol, working_type)
+                rises = self._trigger_rises(side, order_type)
+                if reference_price and (reference_price >= float(stop_price) if rises else reference_price <= float(stop_price)):
+                    return {
+                        "code": -2021,
+                        "msg": "Order would immediately trigger."
+                    }
+            elif order_type == OrderType.TRAILING_STOP_MARKET and not callback_rate:
+                return {
+                    "code": -1102,
+                    "msg": "Mandatory parameter 'callbackRate' was not sent, was empty/null, or malformed."
+                }
+            
             order_id = self.order_id_counter
             self.order_id_counter += 1
             
@@ -284,13 +681,13 @@ class BinanceFuturesTradingEngine:
             px = float(price) if price else 0
             
             # Get current leverage
-            leverage = self.leverage_settings.get(symbol, 20)
+            leverage = self.get_leverage(symbol, account)
             
             # Calculate notional value
             notional = qty * px if px > 0 else 0
             
             # Check available balance
-            usdt_balance = float(self.balances["USDT"].availableBalance)
+            usdt_balance = self.get_available_balance(account)
             required_margin = notional / leverage if leverage > 0 else notional
             
             if required_margin > usdt_balance and not reduce_only:
@@ -300,59 +697,46 @@ class BinanceFuturesTradingEngine:
                 }
             
             # Create order
-            order = BinanceFuturesOrder(
+            now = int(datetime.now().timestamp() * 1000)
+            order = FuturesOrderState(
                 orderId=order_id,
                 symbol=symbol,
-                status=OrderStatus.NEW if order_type == OrderType.LIMIT else OrderStatus.FILLED,
+                status=OrderStatus.NEW if order_type != OrderType.MARKET else OrderStatus.FILLED,
                 clientOrderId=f"web_{order_id}",
-                price=price or "0",
-                avgPrice="0" if order_type == OrderType.LIMIT else price or "0",
-                origQty=quantity,
-                executedQty="0" if order_type == OrderType.LIMIT else quantity,
-                cumQty="0" if order_type == OrderType.LIMIT else quantity,
-                cumQuote="0",
+                price=px,
+                avgPrice=0.0 if order_type != OrderType.MARKET else px,
+                origQty=qty,
+                executedQty=0.0 if order_type != OrderType.MARKET else qty,
+                cumQuote=0.0,
                 timeInForce=time_in_force,
                 type=order_type,
                 reduceOnly=reduce_only,
                 closePosition=close_position,
                 side=side,
                 positionSide=position_side,
-                stopPrice=stop_price or "0",
+                stopPrice=float(stop_price) if stop_price else 0.0,
                 workingType=working_type,
                 priceProtect=False,
                 origType=order_type,
-                time=int(datetime.now().timestamp() * 1000),
-                updateTime=int(datetime.now().timestamp() * 1000)
+                time=now,
+                updateTime=now,
+                activatePrice=float(activation_price) if activation_price and order_type == OrderType.TRAILING_STOP_MARKET else None,
+                priceRate=float(callback_rate) if order_type == OrderType.TRAILING_STOP_MARKET else None,
+                account=account
             )
             
             self.orders[order_id] = order
             
-            # Execute market orders immediately
+            # Execute market orders immediately; everything else rests until price reaches it
             if order_type == OrderType.MARKET:
-                self._execute_order(order, px)
+                self._fill_order(order, px or self.last_prices.get(symbol, 0))
+            else:
+                self._journal("order", order.to_state())
+                self._place_resting_order(order)
             
-            return {
-                "orderId": order_id,
-                "symbol": symbol,
-                "status": order.status,
-                "clientOrderId": order.clientOrderId,
-                "price": order.price,
-                "origQty": order.origQty,
-                "executedQty": order.executedQty,
-                "cumQty": order.cumQty,
-                "cumQuote": order.cumQuote,
-                "timeInForce": order.timeInForce,
-                "type": order.type,
-                "reduceOnly": order.reduceOnly,
-                "closePosition": order.closePosition,
-                "side": order.side,
-                "positionSide": order.positionSide,
-                "stopPrice": order.stopPrice,
-                "workingType": order.workingType,
-                "priceProtect": order.priceProtect,
-                "origType": order.origType,
-                "updateTime": order.updateTime
-            }
+            response = order.to_dict()
+            del response["time"]  # not part of the new-order response
+            return response
             
         except Exception as e:
             return {
@@ -360,47 +744,494 @@ class BinanceFuturesTradingEngine:
                 "msg": f"An unknown error occurred while processing the request: {str(e)}"
             }
     
-    def _execute_order(self, order: BinanceFuturesOrder, execution_price: float):
+    def _reference_price(self, symbol: str, working_type: WorkingType) -> Optional[float]:
+        """Price a stop order's workingType is compared against"""
+        if working_type == WorkingType.MARK_PRICE:
+            return self.mark_prices.get(symbol) or self.last_prices.get(symbol)
+        return self.last_prices.get(symbol)
+    
+    @staticmethod
+    def _trigger_rises(side: OrderSide, order_type: OrderType) -> bool:
+        """BUY STOP / SELL TAKE_PROFIT trigger on a rise to stopPrice, SELL STOP / BUY TAKE_PROFIT on a fall"""
+        is_stop = order_type in (OrderType.STOP, OrderType.STOP_MARKET)
+        return is_stop == (side == OrderSide.BUY)
+    
+    def _place_resting_order(self, order: FuturesOrderState):
+        """Hand a non-market order to the matcher"""
+        if order.type == OrderType.LIMIT:
+            self._rest_limit(order)
+        elif order.type == OrderType.TRAILING_STOP_MARKET:
+            self.matcher.add_trailing(
+                order.symbol, order.orderId, order.side == OrderSide.BUY, order.priceRate,
+                self._reference_price(order.symbol, order.workingType), order.activatePrice,
+                order.workingType.value
+            )
+        else:
+            self.matcher.add_trigger(
+                order.symbol, order.orderId, self._trigger_rises(order.side, order.type),
+                order.stopPrice, order.workingType.value
+            )
+    
+    def _rest_limit(self, order: FuturesOrderState) -> bool:
+        """Fill a limit order now if it is marketable, otherwise rest it; returns True if filled"""
+        limit_price = order.price
+        is_buy = order.side == OrderSide.BUY
+        last_price = self.last_prices.get(order.symbol)
+        marketable = last_price is not None and (limit_price >= last_price if is_buy else limit_price <= last_price)
+        
+        if marketable and order.timeInForce != TimeInForce.GTX:
+            return self._fill_order(order, last_price)
+        if marketable or order.timeInForce in (TimeInForce.IOC, TimeInForce.FOK):
+            # Post-only that would take, or IOC/FOK with nothing to take
+            self._expire_order(order)
+            return False
+        self.matcher.add_limit(order.symbol, order.orderId, is_buy, limit_price)
+        return False
+    
+    def _expire_order(self, order: FuturesOrderState):
+        order.status = OrderStatus.EXPIRED
+        order.updateTime = int(datetime.now().timestamp() * 1000)
+        self._journal("order", order.to_state())
+    
+    def _fill_order(self, order: FuturesOrderState, execution_price: float) -> bool:
+        """Execute an order, applying reduceOnly / closePosition to the position it closes"""
+        if not (order.reduceOnly or order.closePosition):
+            self._execute_order(order, execution_price)
+            return True
+        
+        if order.positionSide == PositionSide.BOTH:
+            direction = "LONG" if order.side == OrderSide.SELL else "SHORT"
+        else:
+            direction = order.positionSide.value
+        position = self.positions.get(position_key(order.account, order.symbol, direction))
+        open_qty = abs(position.positionAmt) if position else 0.0
+        quantity = open_qty if order.closePosition else min(order.origQty, open_qty)
+        if quantity <= 0:
+            # Nothing left to reduce
+            self._expire_order(order)
+            return False
+        self._execute_order(order, execution_price, quantity, direction)
+        return True
+    
+    @_locked
+    def update_price(self, symbol: str, price: float, mark_price: Optional[float] = None) -> List[int]:
+        """Apply a trade (and mark) price: trigger and fill crossed resting orders; returns filled order ids"""
+        if self.countdowns:
+            self._expire_countdowns()
+        self.last_prices[symbol] = price
+        if mark_price is not None:
+            self.mark_prices[symbol] = mark_price
+        
+        triggered, fills = self.matcher.match(symbol, price, self.mark_prices.get(symbol))
+        filled = []
+        for order_id in triggered:
+            order = self.orders.get(order_id)
+            if order is None:
+                continue
+            if order.type in (OrderType.STOP, OrderType.TAKE_PROFIT):
+                # Triggered stop-limit becomes a limit order at its price
+                if self._rest_limit(order):
+                    filled.append(order_id)
+            elif self._fill_order(order, price):
+                filled.append(order_id)
+        for order_id, fill_price in fills:
+            order = self.orders.get(order_id)
+            if order is not None and self._fill_order(order, fill_price):
+                filled.append(order_id)
+        
+        # Mark-to-market after the fills, then liquidate whatever the new marks put under water
+        self._revalue_symbol(symbol, self.mark_prices.get(symbol) or price)
+        filled.extend(self._check_liquidations(symbol))
+        return filled
+    
+    @_locked
+    def watched_symbols(self) -> Set[str]:
+        """Symbols the engine needs prices for: open positions, resting orders and countdownCancelAll timers"""
+        symbols = set(self.symbol_positions)
+        symbols.update(symbol for symbol, book in self.matcher.books.items() if len(book))
+        symbols.update(symbol for _, symbol in self.countdowns)
+        return symbols
+    
+    def _revalue_symbol(self, symbol: str, mark_price: float):
+        positions = self.positions
+        for key in self.symbol_positions.get(symbol, ()):
+            self._revalue_position(key, positions[key], mark_price)
+        if self.ledger is not None:
+            self.ledger.mark(symbol, mark_price)
+    
+    def _revalue_position(self, key: str, position: FuturesPositionState, mark_price: float):
+        """Mark a position to ``mark_price`` and swap its contribution in its account's running totals"""
+        amount = position.positionAmt
+        notional = abs(amount * mark_price)
+        unrealized = (mark_price - position.entryPrice) * amount
+        initial = notional / position.leverage
+        maint = self.get_maintenance_margin(position.symbol, notional) if amount else 0.0
+        cross = position.marginType != "isolated"
+        
+        old = self.position_margins.get(key, NO_MARGINS)
+        self.position_margins[key] = (unrealized, initial, maint, cross)
+        row = self.accounts.rows[key_account(key)]
+        columns = self.accounts.columns
+        columns["unrealized_pnl"][row] += unrealized - old[0]
+        columns["initial_margin"][row] += initial - old[1]
+        columns["maint_margin"][row] += maint - old[2]
+        if old[3]:
+            columns["cross_unrealized_pnl"][row] -= old[0]
+            columns["cross_maint_margin"][row] -= old[2]
+        if cross:
+            columns["cross_unrealized_pnl"][row] += unrealized
+            columns["cross_maint_margin"][row] += maint
+        
+        position.markPrice = mark_price
+        position.unRealizedProfit = unrealized
+        position.notional = notional
+        if not cross:
+            position.isolatedWallet = abs(amount) * position.entryPrice / position.leverage
+            position.isolatedMargin = position.isolatedWallet + unrealized
+        position.touch()
+    
+    def _index_position(self, key: str, position: FuturesPositionState):
+        self.symbol_positions.setdefault(position.symbol, set()).add(key)
+        self.account_positions.setdefault(key_account(key), set()).add(key)
+    
+    def _remove_position(self, key: str):
+        """Drop a closed position: zero its margin contribution and unindex it"""
+        position = self.positions.pop(key)
+        self._revalue_position(key, position, position.markPrice)
+        del self.position_margins[key]
+        for index, name in ((self.symbol_positions, position.symbol), (self.account_positions, key_account(key))):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
+    
+    def _rebuild_margin_totals(self):
+        """Recompute the running totals from scratch (on load, and on compaction to drop float drift)"""
+        self.position_margins = {}
+        for name in MARGIN_COLUMNS:
+            self.accounts.fill(name, 0.0)
+        for key, position in self.positions.items():
+            self._revalue_position(key, position, position.markPrice)
+    
+    def _check_liquidations(self, symbol: str) -> List[int]:
+        """
+        Liquidate isolated positions of ``symbol`` whose maintenance margin exceeds their margin, then
+        cross positions (largest maintenance margin first) of each account holding ``symbol`` while that
+        account's margin ratio is >= 100%
+        """
+        keys = self.symbol_positions.get(symbol)
+        if not keys:
+            return []
+        liquidated = []
+        accounts = set()
+        for key in list(keys):
+            margins = self.position_margins[key]
+            accounts.add(key_account(key))
+            if not margins[3]:
+                position = self.positions[key]
+                if margins[2] >= position.isolatedWallet + margins[0]:
+                    liquidated.append(self._liquidate(key, position))
+        
+        for account in accounts:
+            while self.get_cross_margin_ratio(account) >= 1:
+                key = max(
+                    (key for key in self.account_positions.get(account, ())
+                     if self.position_margins[key][3] and self.position_margins[key][2] > 0),
+                    key=lambda key: self.position_margins[key][2], default=None
+                )
+                if key is None:
+                    break
+                liquidated.append(self._liquidate(key, self.positions[key]))
+        return liquidated
+    
+    def _liquidate(self, key: str, position: FuturesPositionState) -> int:
+        """Close a position at its mark price with an autoclose order and book the loss to the wallet"""
+        account = key_account(key)
+        direction = key.rsplit("_", 1)[1]
+        amount = position.positionAmt
+        mark_price = position.markPrice
+        wallets = self.accounts.columns["wallet"]
+        row = self.accounts.rows[account]
+        # The loss beyond the position's margin (isolated) or the wallet (cross) goes to the insurance fund
+        margin = position.isolatedWallet if position.marginType == "isolated" else wallets[row]
+        realized_pnl = max((mark_price - position.entryPrice) * amount, -margin)
+        now = int(datetime.now().timestamp() * 1000)
+        
+        order_id = self.order_id_counter
+        self.order_id_counter += 1
+        order = FuturesOrderState(
+            orderId=order_id,
+            symbol=position.symbol,
+            status=OrderStatus.NEW,
+            clientOrderId=f"autoclose-{now}",
+            price=mark_price,
+            avgPrice=0.0,
+            origQty=abs(amount),
+            executedQty=0.0,
+            cumQuote=0.0,
+            timeInForce=TimeInForce.IOC,
+            type=OrderType.MARKET,
+            reduceOnly=True,
+            closePosition=False,
+            side=OrderSide.SELL if amount > 0 else OrderSide.BUY,
+            positionSide=position.positionSide,
+            stopPrice=0.0,
+            workingType=WorkingType.MARK_PRICE,
+            priceProtect=False,
+            origType=OrderType.MARKET,
+            time=now,
+            updateTime=now,
+            account=account
+        )
+        self.orders[order_id] = order
+        
+        wallets[row] += realized_pnl
+        self._execute_order(order, mark_price, abs(amount), direction)
+        if self.ledger is not None:
+            self.ledger.realize(realized_pnl, position.symbol)
+        self._journal("liquidation", {
+            "key": key,
+            "orderId": order_id,
+            "realizedPnl": realized_pnl,
+            "account": account,
+            "walletBalance": wallets[row]
+        })
+        self._refresh_liquidation_prices(account)
+        return order_id
+    
+    @_locked
+    def attach_ledger(self, ledger: LedgerSource):
+        """Publish open positions to the portfolio ledger, then keep it updated on fills / marks / funding"""
+        self.ledger = ledger
+        ledger.reset()
+        for key, position in self.positions.items():
+            ledger.set_position(key, position.symbol, position.positionAmt, position.entryPrice,
+                                key_account(key), position.markPrice)
+    
+    @_locked
+    def funding_marks(self) -> Dict[str, float]:
+        """Symbols with open positions (any account) and their current mark price (for funding settlement)"""
+        marks = {}
+        for symbol, keys in self.symbol_positions.items():
+            marks[symbol] = self.mark_prices.get(symbol) or self.positions[next(iter(keys))].markPrice
+        return marks
+    
+    @_locked
+    def settle_funding(self, symbol: str, rate: float, mark_price: float, funding_time: int) -> Dict[str, Any]:
+        """Funding fee for the symbol's positions: -positionAmt * markPrice * rate, booked to each account's wallet"""
+        keys = self.symbol_positions.get(symbol)
+        if not keys:
+            return {"positions": 0, "amount": 0.0}
+        
+        income: Dict[str, float] = {}
+        for key in keys:
+            account = key_account(key)
+            income[account] = income.get(account, 0.0) - self.positions[key].positionAmt * mark_price * rate
+        wallets = self.accounts.columns["wallet"]
+        for account, amount in income.items():
+            wallets[self.accounts.rows[account]] += amount
+        
+        self._journal("funding", {
+            "symbol": symbol,
+            "fundingRate": rate,
+            "markPrice": mark_price,
+            "fundingTime": funding_time,
+            "income": sum(income.values()),
+            "walletBalances": {account: self.accounts.get(account, "wallet") for account in income}
+        })
+        for account in income:
+            self._refresh_liquidation_prices(account)
+        if self.ledger is not None:
+            self.ledger.realize(sum(income.values()), symbol)
+        return {"positions": len(keys), "amount": sum(income.values())}
+    
+    def _liquidation_price(self, key: str, position: FuturesPositionState) -> float:
+        """Isolated positions are backed by their isolated wallet, cross positions by the account wallet"""
+        if position.marginType == "isolated":
+            balance = position.isolatedWallet
+        else:
+            balance = self.accounts.get(key_account(key), "wallet")
+        return self.calculate_liquidation_price_binance(
+            position.symbol, key.rsplit("_", 1)[1], abs(position.positionAmt),
+            position.entryPrice, position.leverage, balance
+        )
+    
+    def _refresh_liquidation_prices(self, account: str = DEFAULT_ACCOUNT):
+        """Cross liquidation prices depend on the wallet balance, so recompute them after it changes"""
+        for key in self.account_positions.get(account, ()):
+            position = self.positions[key]
+            if position.marginType == "isolated":
+                continue
+            position.liquidationPrice = self._liquidation_price(key, position)
+            position.touch()
+    
+    @_locked
+    def cancel_order(self, symbol: Optional[str], order_id: int, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
+        """Cancel an open order - Binance API compatible"""
+        order = self.orders.get(int(order_id))
+        if order is None or (symbol and order.symbol != symbol) or order.account != account or \
+                order.status not in (OrderStatus.NEW, OrderStatus.PARTIALLY_FILLED):
+            return {
+                "code": -2011,
+                "msg": "Unknown order sent."
+            }
+        
+        self.matcher.cancel(order.orderId)
+        order.status = OrderStatus.CANCELED
+        order.updateTime = int(datetime.now().timestamp() * 1000)
+        self._journal("order", order.to_state())
+        return order.to_dict()
+    
+    @_locked
+    def get_open_orders(self, symbol: Optional[str] = None, account: str = DEFAULT_ACCOUNT) -> List[Dict[str, Any]]:
+        """Open orders of one account - Binance API compatible"""
+        if self.countdowns:
+            self._expire_countdowns()
+        return [
+            order.to_dict() for order in self.orders.values()
+            if order.status in OPEN_ORDER_STATUSES and order.account == account
+            and (symbol is None or order.symbol == symbol)
+        ]
+    
+    def new_batch_orders(self, batch_orders: Any, account: str = DEFAULT_ACCOUNT,
+                         bulk: bool = False) -> Any:
+        """
+        Place several orders (/fapi/v1/batchOrders) in one atomic engine step with a single journal
+        write; returns one result per entry, in order - the order, or the error that rejected it.
+        Binance allows 5 entries; ``bulk`` raises the limit for the simulator.
+        """
+        limit = MAX_BULK_ORDERS if bulk else MAX_BATCH_ORDERS
+        if not isinstance(batch_orders, list) or not batch_orders or len(batch_orders) > limit:
+            return {"code": -1130, "msg": "Data sent for parameter 'batchOrders' is not valid."}
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        with self.batch():
+            return [self._new_order_from_params(params, account) for params in batch_orders]
+    
+    def _new_order_from_params(self, params: Dict[str, Any], account: str) -> Dict[str, Any]:
+        """One batchOrders entry (Binance parameter names and string values)"""
+        if not isinstance(params, dict):
+            return {"code": -1130, "msg": "Data sent for parameter 'batchOrders' is not valid."}
+        for name in ("symbol", "side", "type"):
+            if not params.get(name):
+                return {"code": -1102, "msg": f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed."}
+        try:
+            return self.new_order(
+                symbol=params["symbol"],
+                side=OrderSide(params["side"]),
+                order_type=OrderType(params["type"]),
+                quantity=str(params.get("quantity", "0")),
+                price=str(params["price"]) if params.get("price") is not None else None,
+                position_side=PositionSide(params.get("positionSide", "BOTH")),
+                time_in_force=TimeInForce(params.get("timeInForce", "GTC")),
+                reduce_only=_flag(params.get("reduceOnly", False)),
+                close_position=_flag(params.get("closePosition", False)),
+                stop_price=str(params["stopPrice"]) if params.get("stopPrice") is not None else None,
+                working_type=WorkingType(params.get("workingType", "CONTRACT_PRICE")),
+                activation_price=str(params["activationPrice"]) if params.get("activationPrice") is not None else None,
+                callback_rate=str(params["callbackRate"]) if params.get("callbackRate") is not None else None,
+                account=account
+            )
+        except ValueError as e:
+            return {"code": -1130, "msg": f"Data sent for a parameter is not valid: {str(e)}"}
+    
+    def cancel_batch_orders(self, symbol: str, order_ids: Any, account: str = DEFAULT_ACCOUNT) -> Any:
+        """Cancel up to 10 orders (DELETE /fapi/v1/batchOrders); one result per id, in order"""
+        if not isinstance(order_ids, list) or not order_ids or len(order_ids) > MAX_BATCH_CANCELS:
+            return {"code": -1130, "msg": "Data sent for parameter 'orderIdList' is not valid."}
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        with self.batch():
+            return [self.cancel_order(symbol, order_id, account) for order_id in order_ids]
+    
+    def cancel_all_open_orders(self, symbol: str, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
+        """Cancel every open order of a symbol (DELETE /fapi/v1/allOpenOrders) in one atomic step"""
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        with self.batch():
+            self._cancel_all(symbol, account)
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+    
+    def _cancel_all(self, symbol: str, account: str):
+        open_orders = [
+            order.orderId for order in self.orders.values()
+            if order.status in OPEN_ORDER_STATUSES and order.account == account and order.symbol == symbol
+        ]
+        for order_id in open_orders:
+            self.cancel_order(symbol, order_id, account)
+    
+    @_locked
+    def countdown_cancel_all(self, symbol: str, countdown_time: int, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
+        """
+        Dead man's switch (/fapi/v1/countdownCancelAll): cancel all of the symbol's open orders unless
+        called again within ``countdown_time`` ms; 0 turns the countdown off
+        """
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        if countdown_time < 0:
+            return {"code": -1102, "msg": "Mandatory parameter 'countdownTime' was not sent, was empty/null, or malformed."}
+        if countdown_time:
+            self.countdowns[(account, symbol)] = int(datetime.now().timestamp() * 1000) + countdown_time
+        else:
+            self.countdowns.pop((account, symbol), None)
+        return {"symbol": symbol, "countdownTime": str(countdown_time)}
+    
+    def _expire_countdowns(self):
+        now = int(datetime.now().timestamp() * 1000)
+        expired = [key for key, deadline in self.countdowns.items() if deadline <= now]
+        if not expired:
+            return
+        with self.batch():
+            for account, symbol in expired:
+                del self.countdowns[(account, symbol)]
+                if account in self.accounts:
+                    self._cancel_all(symbol, account)
+    
+    def _execute_order(self, order: FuturesOrderState, execution_price: float,
+                       quantity: Optional[float] = None, direction: Optional[str] = None):
         """Execute an order and update positions"""
         symbol = order.symbol
-        qty = float(order.origQty)
+        qty = quantity if quantity is not None else order.origQty
         side = order.side
         position_side = order.positionSide
         
-        # Determine position direction
-        if position_side == PositionSide.BOTH:
-            # One-way mode
-            direction = "LONG" if side == OrderSide.BUY else "SHORT"
-        else:
-            # Hedge mode
-            direction = position_side
+        # Determine position direction (given for reduce-only / close-position fills)
+        if direction is None:
+            if position_side == PositionSide.BOTH:
+                # One-way mode
+                direction = "LONG" if side == OrderSide.BUY else "SHORT"
+            else:
+                # Hedge mode
+                direction = position_side.value
         
         # Create position key
-        position_key = f"{symbol}_{direction}"
+        account = order.account
+        key = position_key(account, symbol, direction)
         
         # Get or create position
-        if position_key not in self.positions:
-            self.positions[position_key] = BinanceFuturesPosition(
+        if key not in self.positions:
+            self.positions[key] = FuturesPositionState(
                 symbol=symbol,
-                positionAmt="0",
-                entryPrice="0",
-                markPrice=str(execution_price),
-                unRealizedProfit="0",
-                liquidationPrice="0",
-                leverage=str(self.leverage_settings.get(symbol, 20)),
-                maxNotionalValue="1000000",
-                marginType=self.margin_type.get(symbol, "cross"),
-                isolatedMargin="0",
+                positionAmt=0.0,
+                entryPrice=0.0,
+                markPrice=execution_price,
+                unRealizedProfit=0.0,
+                liquidationPrice=0.0,
+                leverage=self.get_leverage(symbol, account),
+                maxNotionalValue=1000000.0,
+                marginType=self.margin_type.get(account, {}).get(symbol, "cross"),
+                isolatedMargin=0.0,
                 isAutoAddMargin="false",
                 positionSide=PositionSide.LONG if direction == "LONG" else PositionSide.SHORT,
-                notional="0",
-                isolatedWallet="0",
+                notional=0.0,
+                isolatedWallet=0.0,
                 updateTime=int(datetime.now().timestamp() * 1000)
             )
         
-        position = self.positions[position_key]
-        current_qty = float(position.positionAmt)
-        current_entry = float(position.entryPrice) if position.entryPrice != "0" else execution_price
+        position = self.positions[key]
+        current_qty = position.positionAmt
+        current_entry = position.entryPrice or execution_price
         
         # Calculate new position
         if side == OrderSide.BUY:
@@ -411,9 +1242,9 @@ class BinanceFuturesTradingEngine:
         # Calculate new entry price (weighted average)
         if new_qty != 0:
             if (current_qty >= 0 and side == OrderSide.BUY) or (current_qty <= 0 and side == OrderSide.SELL):
-                # Increasing position
-                total_cost = current_qty * current_entry + qty * execution_price
-                new_entry_price = total_cost / new_qty if new_qty != 0 else execution_price
+                # Increasing position (quantities are signed, entry prices are not)
+                total_cost = abs(current_qty) * current_entry + qty * execution_price
+                new_entry_price = total_cost / abs(new_qty)
             else:
                 # Reducing position or changing direction
                 new_entry_price = execution_price if abs(new_qty) > abs(current_qty) else current_entry
@@ -421,136 +1252,117 @@ class BinanceFuturesTradingEngine:
             new_entry_price = 0
         
         # Update position
-        position.positionAmt = str(new_qty)
-        position.entryPrice = str(new_entry_price)
-        position.markPrice = str(execution_price)
-        position.updateTime = int(datetime.now().timestamp() * 1000)
-        
-        # Calculate liquidation price
-        wallet_balance = float(self.account_info.totalWalletBalance)
-        liquidation_price = self.calculate_liquidation_price_binance(
-            symbol, direction, new_qty, new_entry_price, 
-            int(position.leverage), wallet_balance
-        )
-        position.liquidationPrice = str(liquidation_price)
+        now = int(datetime.now().timestamp() * 1000)
+        position.positionAmt = new_qty
+        position.entryPrice = new_entry_price
+        position.updateTime = now
         
-        # Calculate unrealized PnL
-        if new_qty != 0:
-            pnl = (execution_price - new_entry_price) * new_qty
-            if direction == "SHORT":
-                pnl = -pnl
-            position.unRealizedProfit = str(pnl)
-            position.notional = str(abs(new_qty * execution_price))
+        # Unrealized PnL and margins at the mark price (the fill price until a mark is known);
+        # closed positions leave the tables so per-tick work only sees open ones
+        self._revalue_position(key, position, self.mark_prices.get(symbol) or execution_price)
+        position.liquidationPrice = self._liquidation_price(key, position)
+        if new_qty:
+            self._index_position(key, position)
         else:
-            position.unRealizedProfit = "0"
-            position.notional = "0"
-        
-        # Update balances
-        leverage = int(position.leverage)
-        margin_used = abs(new_qty * execution_price) / leverage
+            self._remove_position(key)
+        if self.ledger is not None:
+            if new_qty:
+                self.ledger.set_position(key, symbol, new_qty, new_entry_price, account, position.markPrice)
+            else:
+                self.ledger.remove_position(key)
         
         # Update order status
         order.status = OrderStatus.FILLED
-        order.executedQty = order.origQty
-        order.cumQty = order.origQty
-        order.avgPrice = str(execution_price)
-        order.updateTime = int(datetime.now().timestamp() * 1000)
+        order.executedQty = qty
+        order.cumQuote = qty * execution_price
+        order.avgPrice = execution_price
+        order.updateTime = now
         
-        self.save_data()
+        self._journal("order", order.to_state())
+        self._journal("position", {"key": key, "position": position.to_state()})
     
-    def get_position_risk(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+    @_locked
+    def get_position_risk(self, symbol: Optional[str] = None, account: str = DEFAULT_ACCOUNT) -> List[Dict[str, Any]]:
         """Get position information - Binance API compatible"""
-        positions = []
-        
-        for position in self.positions.values():
-            if symbol is None or position.symbol == symbol:
-                positions.append({
-                    "symbol": position.symbol,
-                    "positionAmt": position.positionAmt,
-                    "entryPrice": position.entryPrice,
-                    "markPrice": position.markPrice,
-                    "unRealizedProfit": position.unRealizedProfit,
-                    "liquidationPrice": position.liquidationPrice,
-                    "leverage": position.leverage,
-                    "maxNotionalValue": position.maxNotionalValue,
-                    "marginType": position.marginType,
-                    "isolatedMargin": position.isolatedMargin,
-                    "isAutoAddMargin": position.isAutoAddMargin,
-                    "positionSide": position.positionSide,
-                    "notional": position.notional,
-                    "isolatedWallet": position.isolatedWallet,
-                    "updateTime": position.updateTime
-                })
-        
-        return positions
-    
-    def get_account(self) -> Dict[str, Any]:
+        return [
+            self.positions[key].to_dict() for key in sorted(self.account_positions.get(account, ()))
+            if symbol is None or self.positions[key].symbol == symbol
+        ]
+    
+    @_locked
+    def get_account(self, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Get account information - Binance API compatible"""
-        # Update account totals
-        total_unrealized_pnl = sum(float(pos.unRealizedProfit) for pos in self.positions.values())
-        total_margin = sum(abs(float(pos.positionAmt) * float(pos.markPrice)) / float(pos.leverage) 
-                          for pos in self.positions.values() if float(pos.positionAmt) != 0)
-        
-        self.account_info.totalUnrealizedProfit = str(total_unrealized_pnl)
-        self.account_info.totalPositionInitialMargin = str(total_margin)
-        self.account_info.availableBalance = str(float(self.account_info.totalWalletBalance) - total_margin)
-        self.account_info.updateTime = int(datetime.now().timestamp() * 1000)
+        if account not in self.accounts:
+            return dict(UNKNOWN_ACCOUNT)
+        # Account totals are maintained incrementally by the mark-to-market on every price update
+        row = self.accounts.row(account)
+        columns = self.accounts.columns
+        wallet = columns["wallet"][row]
+        total_unrealized_pnl = columns["unrealized_pnl"][row]
+        total_margin = columns["initial_margin"][row]
+        flags = self.account_info
+        update_time = int(datetime.now().timestamp() * 1000)
         
+        # Binance strings from here on
+        wallet_balance = format_amount(wallet)
+        unrealized_pnl = format_amount(total_unrealized_pnl)
+        margin_balance = format_amount(wallet + total_unrealized_pnl)
+        initial_margin = format_amount(total_margin)
+        maint_margin = format_amount(columns["maint_margin"][row])
+        available_balance = format_amount(wallet - total_margin)
         return {
-            "feeTier": self.account_info.feeTier,
-            "canTrade": self.account_info.canTrade,
-            "canDeposit": self.account_info.canDeposit,
-            "canWithdraw": self.account_info.canWithdraw,
-            "updateTime": self.account_info.updateTime,
-            "multiAssetsMargin": self.account_info.multiAssetsMargin,
-            "tradeGroupId": self.account_info.tradeGroupId,
-            "totalWalletBalance": self.account_info.totalWalletBalance,
-            "totalUnrealizedProfit": self.account_info.totalUnrealizedProfit,
-            "totalMarginBalance": str(float(self.account_info.totalWalletBalance) + total_unrealized_pnl),
-            "totalPositionInitialMargin": self.account_info.totalPositionInitialMargin,
-            "totalOpenOrderInitialMargin": self.account_info.totalOpenOrderInitialMargin,
-            "totalCrossWalletBalance": self.account_info.totalCrossWalletBalance,
-            "totalCrossUnPnl": self.account_info.totalUnrealizedProfit,
-            "availableBalance": self.account_info.availableBalance,
-            "maxWithdrawAmount": self.account_info.availableBalance,
+            "feeTier": flags.feeTier,
+            "canTrade": flags.canTrade,
+            "canDeposit": flags.canDeposit,
+            "canWithdraw": flags.canWithdraw,
+            "updateTime": update_time,
+            "multiAssetsMargin": flags.multiAssetsMargin,
+            "tradeGroupId": flags.tradeGroupId,
+            "totalWalletBalance": wallet_balance,
+            "totalUnrealizedProfit": unrealized_pnl,
+            "totalMarginBalance": margin_balance,
+            "totalMaintMargin": maint_margin,
+            "totalPositionInitialMargin": initial_margin,
+            "totalOpenOrderInitialMargin": format_amount(flags.totalOpenOrderInitialMargin),
+            "totalCrossWalletBalance": wallet_balance,
+            "totalCrossUnPnl": unrealized_pnl,
+            "availableBalance": available_balance,
+            "maxWithdrawAmount": available_balance,
             "assets": [
                 {
                     "asset": "USDT",
-                    "walletBalance": self.account_info.totalWalletBalance,
-                    "unrealizedProfit": self.account_info.totalUnrealizedProfit,
-                    "marginBalance": str(float(self.account_info.totalWalletBalance) + total_unrealized_pnl),
-                    "maintMargin": "0",
-                    "initialMargin": self.account_info.totalPositionInitialMargin,
-                    "positionInitialMargin": self.account_info.totalPositionInitialMargin,
+                    "walletBalance": wallet_balance,
+                    "unrealizedProfit": unrealized_pnl,
+                    "marginBalance": margin_balance,
+                    "maintMargin": maint_margin,
+                    "initialMargin": initial_margin,
+                    "positionInitialMargin": initial_margin,
                     "openOrderInitialMargin": "0",
-                    "crossWalletBalance": self.account_info.totalWalletBalance,
-                    "crossUnPnl": self.account_info.totalUnrealizedProfit,
-                    "availableBalance": self.account_info.availableBalance,
-                    "maxWithdrawAmount": self.account_info.availableBalance,
+                    "crossWalletBalance": wallet_balance,
+                    "crossUnPnl": unrealized_pnl,
+                    "availableBalance": available_balance,
+                    "maxWithdrawAmount": available_balance,
                     "marginAvailable": True,
-                    "updateTime": self.account_info.updateTime
+                    "updateTime": update_time
                 }
             ],
-            "positions": self.get_position_risk()
+            "positions": self.get_position_risk(account=account)
         }
     
-    def change_leverage(self, symbol: str, leverage: int) -> Dict[str, Any]:
+    @_locked
+    def change_leverage(self, symbol: str, leverage: int, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Change leverage for symbol - Binance API compatible"""
         try:
+            if account not in self.accounts:
+                return dict(UNKNOWN_ACCOUNT)
             if leverage < 1 or leverage > 125:
                 return {
                     "code": -4028,
                     "msg": "Leverage is over the maximum defined for this symbol."
                 }
             
-            self.leverage_settings[symbol] = leverage
-            
-            # Update existing positions
-            for position in self.positions.values():
-                if position.symbol == symbol:
-                    position.leverage = str(leverage)
-            
-            self.save_data()
+            self._apply_leverage(symbol, leverage, account)
+            self._journal("leverage", {"symbol": symbol, "leverage": leverage, "account": account})
             
             return {
                 "leverage": leverage,
@@ -564,23 +1376,20 @@ class BinanceFuturesTradingEngine:
                 "msg": f"An unknown error occurred: {str(e)}"
             }
     
-    def change_margin_type(self, symbol: str, margin_type: str) -> Dict[str, Any]:
+    @_locked
+    def change_margin_type(self, symbol: str, margin_type: str, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Change margin type for symbol - Binance API compatible"""
         try:
+            if account not in self.accounts:
+                return dict(UNKNOWN_ACCOUNT)
             if margin_type not in ["ISOLATED", "CROSSED"]:
                 return {
                     "code": -4046,
                     "msg": "No need to change margin type."
                 }
             
-            self.margin_type[symbol] = margin_type.lower()
-            
-            # Update existing positions
-            for position in self.positions.values():
-                if position.symbol == symbol:
-                    position.marginType = margin_type.lower()
-            
-            self.save_data()
+            self._apply_margin_type(symbol, margin_type.lower(), account)
+            self._journal("margin_type", {"symbol": symbol, "margin_type": margin_type.lower(), "account": account})
             
             return {
                 "code": 200,
@@ -593,72 +1402,178 @@ class BinanceFuturesTradingEngine:
                 "msg": f"An unknown error occurred: {str(e)}"
             }
     
+    def _apply_leverage(self, symbol: str, leverage: int, account: str = DEFAULT_ACCOUNT):
+        self.leverage_settings.setdefault(account, {})[symbol] = leverage
+        
+        # Update the account's open positions in the symbol
+        for direction in ("LONG", "SHORT"):
+            key = position_key(account, symbol, direction)
+            position = self.positions.get(key)
+            if position is not None:
+                position.leverage = leverage
+                self._revalue_position(key, position, position.markPrice)
+    
+    def _apply_margin_type(self, symbol: str, margin_type: str, account: str = DEFAULT_ACCOUNT):
+        self.margin_type.setdefault(account, {})[symbol] = margin_type
+        
+        # Update the account's open positions in the symbol
+        for direction in ("LONG", "SHORT"):
+            key = position_key(account, symbol, direction)
+            position = self.positions.get(key)
+            if position is not None:
+                position.marginType = margin_type
+                self._revalue_position(key, position, position.markPrice)
+    
+    def _journal(self, event_type: str, data: Dict[str, Any]):
+        """Append a state change; compacts into a snapshot every ``compact_every`` events"""
+        try:
+            self.journal.append(event_type, data)
+            if self.journal.needs_snapshot and not self.journal.in_batch:
+                self.save_data()
+        except OSError as e:
+            print(f"Error writing Binance futures journal: {e}")
+    
+    @_locked
     def save_data(self):
-        """Save data to files"""
+        """Compact: archive finished orders, snapshot open orders / positions / settings, reset the journal"""
         try:
-            os.makedirs("data", exist_ok=True)
-            
-            # Save positions
-            positions_data = {key: pos.model_dump() for key, pos in self.positions.items()}
-            with open("data/binance_futures_positions.json", "w") as f:
-                json.dump(positions_data, f, indent=2)
-            
-            # Save account info
-            with open("data/binance_futures_account.json", "w") as f:
-                json.dump(self.account_info.model_dump(), f, indent=2)
+            finished = [order for order in self.orders.values() if order.status not in OPEN_ORDER_STATUSES]
+            self.journal.archive("orders", [order.to_state() for order in finished])
+            for order in finished:
+                del self.orders[order.orderId]
+            self._rebuild_margin_totals()
+            self.account_info.totalWalletBalance = self.accounts.get(DEFAULT_ACCOUNT, "wallet")
             
-            # Save orders
-            orders_data = {str(key): order.model_dump() for key, order in self.orders.items()}
-            with open("data/binance_futures_orders.json", "w") as f:
-                json.dump(orders_data, f, indent=2)
-            
-            # Save settings
-            settings_data = {
-                "leverage_settings": self.leverage_settings,
-                "margin_type": self.margin_type
-            }
-            with open("data/binance_futures_settings.json", "w") as f:
-                json.dump(settings_data, f, indent=2)
-                
+            self.journal.write_snapshot({
+                "positions": {key: pos.to_state() for key, pos in self.positions.items()},
+                "orders": {str(key): order.to_state() for key, order in self.orders.items()},
+                "account": self.account_info.to_state(),
+                "accounts": self.accounts.to_state(),
+                "settings": {
+                    "leverage_settings": self.leverage_settings,
+                    "margin_type": self.margin_type
+                },
+                "order_id_counter": self.order_id_counter
+            })
         except Exception as e:
             print(f"Error saving Binance futures data: {e}")
     
     def load_data(self):
-        """Load data from files"""
+        """Load the last snapshot and replay the journal tail (legacy JSON files are migrated once)"""
         try:
-            # Load positions
-            if os.path.exists("data/binance_futures_positions.json"):
-                with open("data/binance_futures_positions.json", "r") as f:
-                    positions_data = json.load(f)
-                    self.positions = {
-                        key: BinanceFuturesPosition(**pos_data)
-                        for key, pos_data in positions_data.items()
-                    }
+            state, events = self.journal.load()
+            if state is None and not events and self._load_legacy_data():
+                self.save_data()
             
-            # Load account info
-            if os.path.exists("data/binance_futures_account.json"):
-                with open("data/binance_futures_account.json", "r") as f:
-                    account_data = json.load(f)
-                    self.account_info = BinanceFuturesAccountInfo(**account_data)
+            if state:
+                self.positions = {
+                    _account_key(key): FuturesPositionState.from_dict(pos_data)
+                    for key, pos_data in state.get("positions", {}).items()
+                }
+                self.orders = {
+                    int(key): FuturesOrderState.from_dict(order_data)
+                    for key, order_data in state.get("orders", {}).items()
+                }
+                if state.get("account"):
+                    self.account_info = FuturesAccountState.from_dict(state["account"])
+                if state.get("accounts"):
+                    self.accounts.load_state(state["accounts"])
+                elif state.get("account"):
+                    self.accounts.set(DEFAULT_ACCOUNT, "wallet", self.account_info.totalWalletBalance)
+                settings_data = state.get("settings", {})
+                self.leverage_settings = _per_account(settings_data.get("leverage_settings", {}))
+                self.margin_type = _per_account(settings_data.get("margin_type", {}))
+                self.order_id_counter = max(self.order_id_counter, state.get("order_id_counter", 0))
             
-            # Load orders
-            if os.path.exists("data/binance_futures_orders.json"):
-                with open("data/binance_futures_orders.json", "r") as f:
-                    orders_data = json.load(f)
-                    self.orders = {
-                        int(key): BinanceFuturesOrder(**order_data)
-                        for key, order_data in orders_data.items()
-                    }
+            for event in events:
+                data = event["data"]
+                event_type = event["type"]
+                if event_type == "order":
+                    self.orders[data["orderId"]] = FuturesOrderState.from_dict(data)
+                elif event_type == "position":
+                    key = _account_key(data["key"])
+                    position = FuturesPositionState.from_dict(data["position"])
+                    if position.positionAmt:
+                        self.positions[key] = position
+                    else:
+                        self.positions.pop(key, None)
+                elif event_type == "leverage":
+                    self._apply_leverage(data["symbol"], data["leverage"], data.get("account", DEFAULT_ACCOUNT))
+                elif event_type == "margin_type":
+                    self._apply_margin_type(data["symbol"], data["margin_type"], data.get("account", DEFAULT_ACCOUNT))
+                elif event_type in ("liquidation", "funding"):
+                    wallets = data.get("walletBalances") or {data.get("account", DEFAULT_ACCOUNT): data["walletBalance"]}
+                    for account, wallet in wallets.items():
+                        self.accounts.set(account, "wallet", wallet)
+                elif event_type == "account_created":
+                    self.accounts.add(data["account"], wallet=data["walletBalance"])
+                elif event_type == "account_deleted":
+                    self._remove_account(data["account"])
             
-            # Load settings
-            if os.path.exists("data/binance_futures_settings.json"):
-                with open("data/binance_futures_settings.json", "r") as f:
-                    settings_data = json.load(f)
-                    self.leverage_settings = settings_data.get("leverage_settings", {})
-                    self.margin_type = settings_data.get("margin_type", {})
+            # Orders and positions journaled before sub-accounts belong to the default account;
+            # closed positions are no longer kept
+            for order in self.orders.values():
+                if order.account is None:
+                    order.account = DEFAULT_ACCOUNT
+            self.positions = {key: position for key, position in self.positions.items() if position.positionAmt}
+            self.symbol_positions = {}
+            self.account_positions = {}
+            for key, position in self.positions.items():
+                self._index_position(key, position)
+            
+            # Resting orders go back into the matcher
+            for order in self.orders.values():
+                if order.type != OrderType.MARKET and order.status in OPEN_ORDER_STATUSES:
+                    self._place_resting_order(order)
+            if self.orders:
+                self.order_id_counter = max(self.order_id_counter, max(self.orders) + 1)
+            self._rebuild_margin_totals()
             
         except Exception as e:
             print(f"Error loading Binance futures data: {e}")
+    
+    def _load_legacy_data(self) -> bool:
+        """Load the pre-journal JSON files; returns True if any were found"""
+        found = False
+        # Load positions
+        if os.path.exists("data/binance_futures_positions.json"):
+            with open("data/binance_futures_positions.json", "r") as f:
+                positions_data = json.load(f)
+                self.positions = {
+                    _account_key(key): FuturesPositionState.from_dict(pos_data)
+                    for key, pos_data in positions_data.items()
+                }
+            found = True
+        
+        # Load account info
+        if os.path.exists("data/binance_futures_account.json"):
+            with open("data/binance_futures_account.json", "r") as f:
+                account_data = json.load(f)
+                self.account_info = FuturesAccountState.from_dict(account_data)
+                self.accounts.set(DEFAULT_ACCOUNT, "wallet", self.account_info.totalWalletBalance)
+            found = True
+        
+        # Load orders
+        if os.path.exists("data/binance_futures_orders.json"):
+            with open("data/binance_futures_orders.json", "r") as f:
+                orders_data = json.load(f)
+                self.orders = {
+                    int(key): FuturesOrderState.from_dict(order_data)
+                    for key, order_data in orders_data.items()
+                }
+            found = True
+        
+        # Load settings
+        if os.path.exists("data/binance_futures_settings.json"):
+            with open("data/binance_futures_settings.json", "r") as f:
+                settings_data = json.load(f)
+                self.leverage_settings = _per_account(settings_data.get("leverage_settings", {}))
+                self.margin_type = _per_account(settings_data.get("margin_type", {}))
+            found = True
+        
+        if self.orders:
+            self.order_id_counter = max(self.order_id_counter, max(self.orders) + 1)
+        return found
 
 # Global Binance-compatible futures engine
 binance_futures_engine = BinanceFuturesTradingEngine()
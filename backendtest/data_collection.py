@@ -17,6 +17,8 @@ import threading
 import time
 from dataclasses import dataclass
 
+from tick_recorder import tick_recorder
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -259,6 +261,13 @@ class DataCollector:
                                     'volume': float(item[5])
                                 })
                             
+                            if klines:
+                                latest = klines[-1]
+                                tick_recorder.record_kline(
+                                    symbol, interval, latest['open'], latest['high'], latest['low'],
+                                    latest['close'], latest['volume']
+                                )
+                            
                             return klines
                         elif response.status == 429:  # Rate limit
                             logger.warning(f"Rate limited for {symbol}, retrying in {retry_delay}s")
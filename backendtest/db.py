@@ -71,6 +71,18 @@ def get_trades(limit=100):
     keys = ["id", "symbol", "direction", "amount", "entry_price", "tp_price", "sl_price", "status", "open_time", "close_time", "pnl", "current_price", "close_price"]
     return [dict(zip(keys, row)) for row in rows]
 
+def get_trades_by_ids(trade_ids):
+    if not trade_ids:
+        return []
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    placeholders = ", ".join("?" for _ in trade_ids)
+    c.execute(f"SELECT * FROM trades WHERE id IN ({placeholders})", list(trade_ids))
+    rows = c.fetchall()
+    conn.close()
+    keys = ["id", "symbol", "direction", "amount", "entry_price", "tp_price", "sl_price", "status", "open_time", "close_time", "pnl", "current_price", "close_price"]
+    return [dict(zip(keys, row)) for row in rows]
+
 # --- Trade CRUD ---
 def update_trade(trade_id, updates):
     conn = sqlite3.connect(DB_PATH)
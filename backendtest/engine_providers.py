@@ -0,0 +1,287 @@
+"""
+Data Providers for AdvancedAutoTradingEngine
+Prices, indicators, predictions and persistence behind one interface:
+in-process implementations (default) or HTTP for engines running outside the API process
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Feature order expected by ml.real_predict's model
+ML_FEATURE_MAP = {
+    "open": "price", "high": "price", "low": "price", "close": "price", "volume": "volume",
+    "rsi": "rsi", "stoch_k": "stoch_k", "stoch_d": "stoch_d", "williams_r": "williams_r",
+    "macd": "macd", "macd_signal": "macd_signal", "macd_diff": "macd_histogram",
+    "adx": "adx", "cci": "cci", "sma_20": "sma_20", "ema_20": "ema_20",
+    "bb_high": "bb_upper", "bb_low": "bb_lower", "atr": "atr", "obv": "obv"
+}
+
+
+class PriceProvider(ABC):
+    @abstractmethod
+    async def get_market_data(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Return {"price", "volume", "bid", "ask"} or None"""
+        raise NotImplementedError
+
+
+class IndicatorProvider(ABC):
+    @abstractmethod
+    async def get_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return a flat dict of indicator values or None"""
+        raise NotImplementedError
+
+
+class PredictionProvider(ABC):
+    @abstractmethod
+    async def predict(self, symbol: str, features: Dict[str, float], timeframes: List[str]) -> Optional[Dict[str, Any]]:
+        """Return {"primary_signal": BUY/SELL/HOLD, "primary_confidence", "model_version", "prediction_horizon"}"""
+        raise NotImplementedError
+
+    async def predict_batch(self, requests: List[Tuple[str, Dict[str, float]]],
+                            timeframes: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Predict for many (symbol, features) pairs; results are in request order"""
+        results = await asyncio.gather(
+            *(self.predict(symbol, features, timeframes) for symbol, features in requests),
+            return_exceptions=True
+        )
+        return [None if isinstance(r, Exception) else r for r in results]
+
+
+class PersistenceProvider(ABC):
+    @abstractmethod
+    async def save_position(self, position: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def load_positions(self, position_ids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Persisted trade records by id, for reconciliation; None when the store can't be queried"""
+        return None
+
+
+# --- In-process implementations ---
+
+class InProcessPriceProvider(PriceProvider):
+    """Reads prices from the shared coalescing price service"""
+
+    async def get_market_data(self, symbol: str) -> Optional[Dict[str, float]]:
+        from price_service import price_service
+        try:
+            price = await price_service.get_price(symbol)
+        except RuntimeError as e:
+            logger.debug(f"No price for {symbol}: {e}")
+            return None
+        return {"price": price, "volume": 0.0, "bid": 0.0, "ask": 0.0}
+
+
+class InProcessIndicatorProvider(IndicatorProvider):
+    """Computes indicators from the data collector's stored candles (off the event loop)"""
+
+    async def get_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        from data_collection import get_data_collector
+        indicators = await asyncio.to_thread(get_data_collector().get_indicators, symbol.upper())
+        return indicators or None
+
+
+class InProcessPredictionProvider(PredictionProvider):
+    """
+    Scores feature dicts with the ml module's model directly.
+    The model has no timeframe input, so one row per symbol covers every requested timeframe.
+    """
+
+    async def predict(self, symbol: str, features: Dict[str, float], timeframes: List[str]) -> Optional[Dict[str, Any]]:
+        return (await self.predict_batch([(symbol, features)], timeframes))[0]
+
+    async def predict_batch(self, requests: List[Tuple[str, Dict[str, float]]],
+                            timeframes: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not requests:
+            return []
+        return await asyncio.to_thread(self._score, [features for _, features in requests])
+
+    @staticmethod
+    def _score(feature_rows: List[Dict[str, float]]) -> List[Optional[Dict[str, Any]]]:
+        from ml import FEATURE_COLUMNS, load_model, predict_batch
+        model = load_model()
+        if model is None or not hasattr(model, "predict_proba"):
+            return [None] * len(feature_rows)
+
+        # Columnar (feature -> one value per symbol) input: one predict_proba for every symbol
+        sources = {column: ML_FEATURE_MAP[column] for column in FEATURE_COLUMNS if column in ML_FEATURE_MAP}
+        columns = {column: [row.get(source, 0.0) for row in feature_rows] for column, source in sources.items()}
+        results = []
+        for label, probability in predict_batch(columns):
+            if label == "LONG":
+                signal, confidence = "BUY", probability
+            elif label == "SHORT":
+                signal, confidence = "SELL", 1.0 - probability
+            else:
+                results.append(None)
+                continue
+            results.append({
+                "primary_signal": signal,
+                "primary_confidence": confidence,
+                "model_version": "kaia_rf",
+                "prediction_horizon": "short"
+            })
+        return results
+
+
+class InProcessPersistenceProvider(PersistenceProvider):
+    """Stores engine positions in the trades table (insert on open, update on close)"""
+
+    async def save_position(self, position: Dict[str, Any]):
+        await asyncio.to_thread(self._save, position)
+
+    @staticmethod
+    def _save(position: Dict[str, Any]):
+        from db import save_trade, update_trade
+        trade = {
+            "id": position["id"],
+            "symbol": position["symbol"],
+            "direction": position["side"],
+            "amount": position["size"],
+            "entry_price": position["entry_price"],
+            "tp_price": position["take_profit"],
+            "sl_price": position["stop_loss"],
+            "status": position["status"],
+            "open_time": position["opened_at"],
+            "close_time": position.get("closed_at"),
+            "pnl": position["pnl"],
+            "current_price": position["current_price"],
+            "close_price": position["current_price"] if position.get("closed_at") else None
+        }
+        try:
+            save_trade(trade)
+        except sqlite3.IntegrityError:
+            update_trade(trade["id"], {k: v for k, v in trade.items() if k != "id"})
+
+    async def load_positions(self, position_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        from db import get_trades_by_ids
+        trades = await asyncio.to_thread(get_trades_by_ids, list(position_ids))
+        return {trade["id"]: trade for trade in trades}
+
+
+# --- HTTP implementations (remote deployments) ---
+
+class HttpSession:
+    """One aiohttp session shared by all HTTP providers of an engine"""
+
+    def __init__(self, base_url: str, timeout: float = 10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def get(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class HttpPriceProvider(PriceProvider):
+    def __init__(self, http: HttpSession):
+        self.http = http
+
+    async def get_market_data(self, symbol: str) -> Optional[Dict[str, float]]:
+        async with self.http.get().get(f"{self.http.base_url}/price/{symbol.lower()}") as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            return {
+                "price": float(data.get("price", 0)),
+                "volume": float(data.get("volume", 0)),
+                "bid": float(data.get("bid", 0)),
+                "ask": float(data.get("ask", 0))
+            }
+
+
+class HttpIndicatorProvider(IndicatorProvider):
+    def __init__(self, http: HttpSession):
+        self.http = http
+
+    async def get_indicators(self, symbol: str) -> Optional[Dict[str, Any]]:
+        url = f"{self.http.base_url}/features/indicators"
+        async with self.http.get().get(url, params={"symbol": symbol.lower(), "limit": 100}) as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            # /features/indicators nests the values under "indicators"
+            return data.get("indicators", data)
+
+
+class HttpPredictionProvider(PredictionProvider):
+    def __init__(self, http: HttpSession):
+        self.http = http
+
+    async def predict(self, symbol: str, features: Dict[str, float], timeframes: List[str]) -> Optional[Dict[str, Any]]:
+        url = f"{self.http.base_url}/ml/predict/enhanced"
+        params = {
+            "symbol": symbol.lower(),
+            "features": json.dumps(features),
+            "timeframes": ",".join(timeframes),
+            "include_confidence": "true"
+        }
+        async with self.http.get().get(url, params=params) as response:
+            if response.status != 200:
+                return None
+            return await response.json()
+
+
+class HttpPersistenceProvider(PersistenceProvider):
+    def __init__(self, http: HttpSession):
+        self.http = http
+
+    async def save_position(self, position: Dict[str, Any]):
+        url = f"{self.http.base_url}/auto_trading/positions"
+        async with self.http.get().post(url, json=position) as response:
+            if response.status == 200:
+                logger.debug(f"Position saved to backend: {position.get('id')}")
+
+
+class EngineProviders:
+    """The set of providers an engine uses, plus shared resources to release on stop"""
+
+    def __init__(self, mode: str, prices: PriceProvider, indicators: IndicatorProvider,
+                 predictions: PredictionProvider, persistence: PersistenceProvider,
+                 http: Optional[HttpSession] = None):
+        self.mode = mode
+        self.prices = prices
+        self.indicators = indicators
+        self.predictions = predictions
+        self.persistence = persistence
+        self.http = http
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.close()
+
+
+def create_providers(config: Dict[str, Any]) -> EngineProviders:
+    """Build providers from engine config: config["providers"]["mode"] is "in_process" (default) or "http" """
+    mode = config.get("providers", {}).get("mode", "in_process")
+
+    if mode == "http":
+        api = config.get("api", {})
+        http = HttpSession(api.get("base_url", "http://localhost:8001"), api.get("timeout", 10))
+        return EngineProviders(
+            mode, HttpPriceProvider(http), HttpIndicatorProvider(http),
+            HttpPredictionProvider(http), HttpPersistenceProvider(http), http
+        )
+
+    if mode != "in_process":
+        logger.warning(f"Unknown provider mode '{mode}', using in_process")
+        mode = "in_process"
+    return EngineProviders(
+        mode, InProcessPriceProvider(), InProcessIndicatorProvider(),
+        InProcessPredictionProvider(), InProcessPersistenceProvider()
+    )
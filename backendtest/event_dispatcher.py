@@ -0,0 +1,151 @@
+"""
+Priority Event Dispatcher
+Single-consumer asyncio dispatcher: events are handled in priority order
+(FIFO within a priority) as soon as they arrive, with per-type latency stats.
+Keyed events (e.g. price ticks per symbol) coalesce while queued: the latest data wins.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value = handled first
+PRIORITY_RISK = 0
+PRIORITY_TICK = 1
+PRIORITY_CANDLE = 2
+PRIORITY_SIGNAL = 3
+PRIORITY_LOW = 9
+
+
+class Event:
+    __slots__ = ("type", "data", "priority", "created_at", "origin_ts", "key")
+
+    def __init__(self, event_type: str, data: Any, priority: int, origin_ts: Optional[float] = None,
+                 key: Any = None):
+        self.type = event_type
+        self.data = data
+        self.priority = priority
+        self.key = key  # set for coalescing events, see EventDispatcher.publish_latest
+        self.created_at = time.perf_counter()
+        # perf_counter timestamp of the market event this one derives from (for tick-to-order latency)
+        self.origin_ts = origin_ts if origin_ts is not None else self.created_at
+
+
+class EventDispatcher:
+    """
+    Handlers are registered per event type; ``publish`` enqueues, ``run`` consumes.
+    The consumer blocks on the queue, so an idle engine costs nothing.
+    """
+
+    def __init__(self, name: str = "dispatcher"):
+        self.name = name
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._handlers: Dict[str, List[Callable[[Event], Awaitable[None]]]] = {}
+        self._sequence = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[Tuple[str, Any], Event] = {}  # (type, key) -> queued coalescing event
+        self.coalesced = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def queue(self) -> asyncio.PriorityQueue:
+        # Created lazily so the queue binds to the loop that actually runs the engine
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        return self._queue
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, event_type: str, handler: Callable[[Event], Awaitable[None]]):
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event_type: str, data: Any = None, priority: int = PRIORITY_LOW,
+                origin_ts: Optional[float] = None) -> Event:
+        event = Event(event_type, data, priority, origin_ts)
+        self.queue.put_nowait((priority, next(self._sequence), event))
+        return event
+
+    def publish_latest(self, event_type: str, key: Any, data: Any = None, priority: int = PRIORITY_LOW,
+                       origin_ts: Optional[float] = None) -> Event:
+        """
+        Publish an event that supersedes any still-queued event of the same type and key: the queued
+        one takes the new data instead of a second event being queued, so a burst of ticks for one
+        symbol costs one handler run and the queue holds at most one such event per key
+        """
+        pending = self._pending.get((event_type, key))
+        if pending is not None:
+            pending.data = data
+            pending.origin_ts = origin_ts if origin_ts is not None else time.perf_counter()
+            self.coalesced += 1
+            return pending
+        event = Event(event_type, data, priority, origin_ts, key)
+        self._pending[(event_type, key)] = event
+        self.queue.put_nowait((priority, next(self._sequence), event))
+        return event
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def run(self):
+        while True:
+            _, _, event = await self.queue.get()
+            if event.key is not None:
+                self._pending.pop((event.type, event.key), None)
+            await self.dispatch(event)
+
+    async def dispatch(self, event: Event):
+        """Run all handlers for an event (also usable directly when the consumer is not running)"""
+        started = time.perf_counter()
+        for handler in self._handlers.get(event.type, []):
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"{self.name}: error handling {event.type}: {e}")
+        finished = time.perf_counter()
+        self._record(event, started, finished)
+
+    def _record(self, event: Event, started: float, finished: float):
+        stats = self.stats.get(event.type)
+        if stats is None:
+            stats = self.stats[event.type] = {"count": 0, "queue_ms_total": 0.0, "handler_ms_total": 0.0,
+                                              "max_queue_ms": 0.0, "max_handler_ms": 0.0}
+        queue_ms = (started - event.created_at) * 1000
+        handler_ms = (finished - started) * 1000
+        stats["count"] += 1
+        stats["queue_ms_total"] += queue_ms
+        stats["handler_ms_total"] += handler_ms
+        stats["max_queue_ms"] = max(stats["max_queue_ms"], queue_ms)
+        stats["max_handler_ms"] = max(stats["max_handler_ms"], handler_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "coalesced": self.coalesced,
+            "events": {
+                event_type: {
+                    "count": int(s["count"]),
+                    "avg_queue_ms": round(s["queue_ms_total"] / s["count"], 3),
+                    "avg_handler_ms": round(s["handler_ms_total"] / s["count"], 3),
+                    "max_queue_ms": round(s["max_queue_ms"], 3),
+                    "max_handler_ms": round(s["max_handler_ms"], 3)
+                }
+                for event_type, s in self.stats.items() if s["count"]
+            }
+        }
@@ -0,0 +1,160 @@
+"""
+Event Journal
+Append-only JSON-lines journal of state-changing events plus periodic compact snapshots.
+Recovery = last snapshot + journal events with a higher sequence number.
+History that no longer affects live state can be moved to append-only archive files.
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EventJournal:
+    """
+    ``<name>.snapshot.json`` holds {"seq", "ts", "state"}; ``<name>.journal.jsonl`` holds one
+    {"seq", "ts", "type", "data"} per line. Snapshots are written atomically (temp file + replace)
+    before the journal is truncated, so a crash at any point recovers to a consistent state.
+    """
+
+    def __init__(self, directory: str, name: str, fsync: bool = False, compact_every: int = 1000):
+        self.directory = directory
+        self.name = name
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot.json")
+        self.journal_path = os.path.join(directory, f"{name}.journal.jsonl")
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self._file = None
+        self._pending: Optional[List[str]] = None  # lines buffered by an open batch()
+        self._batch_depth = 0
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        return self._file
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Return (snapshot state or None, journal events after the snapshot) and resume numbering"""
+        state = None
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                state = snapshot.get("state")
+                snapshot_seq = snapshot.get("seq", 0)
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable snapshot {self.snapshot_path}: {e}")
+
+        events = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn final write from a crash; everything before it is intact
+                        logger.warning(f"Ignoring corrupt journal line {line_number} in {self.journal_path}")
+                        break
+                    if event.get("seq", 0) > snapshot_seq:
+                        events.append(event)
+
+        self.seq = events[-1]["seq"] if events else snapshot_seq
+        self.events_since_snapshot = len(events)
+        return state, events
+
+    def append(self, event_type: str, data: Dict[str, Any]) -> int:
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "ts": time.time(), "type": event_type, "data": data}, default=str)
+        if self._pending is not None:
+            self._pending.append(line)
+        else:
+            self._write([line])
+        self.events_since_snapshot += 1
+        return self.seq
+
+    def _write(self, lines: List[str]):
+        f = self._open()
+        f.write("".join(line + "\n" for line in lines))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    @contextmanager
+    def batch(self):
+        """Buffer appends and write them with one write / flush (/ fsync) when the outermost batch exits"""
+        self._batch_depth += 1
+        if self._pending is None:
+            self._pending = []
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                pending, self._pending = self._pending, None
+                if pending:
+                    self._write(pending)
+
+    @property
+    def in_batch(self) -> bool:
+        return self._batch_depth > 0
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return self.events_since_snapshot >= self.compact_every
+
+    def write_snapshot(self, state: Dict[str, Any]):
+        """Persist ``state`` as of the current sequence number and truncate the journal"""
+        if self._pending:
+            self._pending.clear()  # covered by the snapshot
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "ts": time.time(), "state": state}, f, default=str, separators=(",", ":"))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self.events_since_snapshot = 0
+
+    def archive(self, kind: str, records: List[Dict[str, Any]]):
+        """Append finished records (filled orders, closed trades...) to ``<name>.<kind>.archive.jsonl``"""
+        if not records:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.archive_path(kind), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def archive_path(self, kind: str) -> str:
+        return os.path.join(self.directory, f"{self.name}.{kind}.archive.jsonl")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "events_since_snapshot": self.events_since_snapshot,
+            "compact_every": self.compact_every,
+            "snapshot_path": self.snapshot_path,
+            "journal_bytes": os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        }
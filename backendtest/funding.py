@@ -0,0 +1,264 @@
+"""
+Funding Settlement
+Perpetual funding for the simulated futures engines. Per-symbol funding rates are loaded from
+data/funding_rates.json when present (or set explicitly) and simulated otherwise; at every 8-hour
+boundary (00:00 / 08:00 / 16:00 UTC) each registered engine settles all open positions of a symbol
+in one batch. Settlements are kept in a ledger and rates in a /fapi/v1/fundingRate-style history.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from event_journal import EventJournal
+
+logger = logging.getLogger(__name__)
+
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+INTEREST_RATE = 0.0001  # 0.01% per interval, as on Binance USDT-M perpetuals
+INTEREST_CLAMP = 0.0005
+RATE_CAP = 0.003
+HISTORY_RETAINED = 1000  # rates per symbol kept in memory / snapshots
+LEDGER_RETAINED = 1000  # settlements kept in memory; older ones live in the archive file
+
+
+def funding_time_floor(timestamp_ms: int) -> int:
+    """Last funding boundary at or before ``timestamp_ms``"""
+    return timestamp_ms - timestamp_ms % FUNDING_INTERVAL_MS
+
+
+def next_funding_time(timestamp_ms: int) -> int:
+    return funding_time_floor(timestamp_ms) + FUNDING_INTERVAL_MS
+
+
+class FundingRateSource:
+    """
+    Explicit rates win: ``data/funding_rates.json`` maps a symbol either to a constant rate or to a
+    Binance /fapi/v1/fundingRate response list. Anything else is simulated as premium + clamp(interest
+    - premium), with a premium drawn deterministically from (symbol, fundingTime) so reruns agree.
+    """
+
+    def __init__(self, path: str = "data/funding_rates.json"):
+        self.path = path
+        self.constant: Dict[str, float] = {}
+        self.scheduled: Dict[str, Dict[int, float]] = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            for symbol, rates in data.items():
+                if isinstance(rates, list):
+                    for entry in rates:
+                        self.set_rate(symbol, float(entry["fundingRate"]), int(entry["fundingTime"]))
+                else:
+                    self.set_rate(symbol, float(rates))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Unreadable funding rates {self.path}: {e}")
+
+    def set_rate(self, symbol: str, rate: float, funding_time: Optional[int] = None):
+        """Use ``rate`` for one funding time, or for every funding time when none is given"""
+        symbol = symbol.upper()
+        if funding_time is None:
+            self.constant[symbol] = rate
+        else:
+            self.scheduled.setdefault(symbol, {})[funding_time_floor(funding_time)] = rate
+
+    def rate(self, symbol: str, funding_time: int) -> float:
+        scheduled = self.scheduled.get(symbol)
+        if scheduled and funding_time in scheduled:
+            return scheduled[funding_time]
+        if symbol in self.constant:
+            return self.constant[symbol]
+        premium = random.Random(f"{symbol}:{funding_time}").gauss(0.0, 0.0003)
+        rate = premium + min(max(INTEREST_RATE - premium, -INTEREST_CLAMP), INTEREST_CLAMP)
+        return round(min(max(rate, -RATE_CAP), RATE_CAP), 8)
+
+
+class FundingScheduler:
+    """
+    Engines register with ``register(name, engine)`` and provide:
+      ``funding_marks() -> {symbol: mark price}`` for symbols with open positions, and
+      ``settle_funding(symbol, rate, mark_price, funding_time) -> {"positions": n, "amount": paid}``
+    (amount is the wallet change: negative when the positions paid funding).
+    """
+
+    def __init__(self, rate_source: Optional[FundingRateSource] = None, directory: str = "data"):
+        self.rate_source = rate_source or FundingRateSource(os.path.join(directory, "funding_rates.json"))
+        self.engines: Dict[str, Any] = {}
+        self.history: Dict[str, deque] = {}
+        self.ledger: deque = deque(maxlen=LEDGER_RETAINED)
+        self.last_funding_time: Optional[int] = None
+        self.journal = EventJournal(directory, "funding", compact_every=500)
+        self._unarchived = 0
+        self._task: Optional[asyncio.Task] = None
+        self.load_data()
+
+    def register(self, name: str, engine: Any):
+        self.engines[name] = engine
+
+    # ------------------------------------------------------------------ settlement
+
+    def settle(self, funding_time: int) -> List[Dict[str, Any]]:
+        """Settle one boundary synchronously (catch-up, scripts); see ``settle_async`` for the live path"""
+        return [self._settle_symbol(symbol, marks, funding_time) for symbol, marks in self._due_symbols().items()]
+
+    async def settle_async(self, funding_time: int) -> List[Dict[str, Any]]:
+        """Settle one boundary, yielding to the event loop between symbols so endpoints keep responding"""
+        entries = []
+        for symbol, marks in self._due_symbols().items():
+            entries.append(self._settle_symbol(symbol, marks, funding_time))
+            await asyncio.sleep(0)
+        return entries
+
+    def _due_symbols(self) -> Dict[str, Dict[str, float]]:
+        """symbol -> {engine name: that engine's mark price} for symbols with open positions"""
+        due: Dict[str, Dict[str, float]] = {}
+        for name, engine in self.engines.items():
+            for symbol, mark_price in engine.funding_marks().items():
+                due.setdefault(symbol, {})[name] = mark_price
+        return due
+
+    def _settle_symbol(self, symbol: str, marks: Dict[str, float], funding_time: int) -> Dict[str, Any]:
+        """One rate per symbol and boundary; each engine settles its positions at its own mark price"""
+        rate = self.rate_source.rate(symbol, funding_time)
+        results = {}
+        for name, mark_price in marks.items():
+            try:
+                result = self.engines[name].settle_funding(symbol, rate, mark_price, funding_time)
+            except Exception as e:
+                logger.error(f"Funding settlement failed for {name} {symbol}: {e}")
+                continue
+            if result["positions"]:
+                results[name] = result
+        entry = {
+            "symbol": symbol,
+            "fundingTime": funding_time,
+            "fundingRate": rate,
+            "markPrice": next(iter(marks.values())),
+            "settlements": results
+        }
+        self._record(entry)
+        self._journal("settlement", entry)
+        return entry
+
+    def _record(self, entry: Dict[str, Any]):
+        self.history.setdefault(entry["symbol"], deque(maxlen=HISTORY_RETAINED)).append(
+            {"fundingTime": entry["fundingTime"], "fundingRate": entry["fundingRate"], "markPrice": entry["markPrice"]}
+        )
+        self.ledger.append(entry)
+        self._unarchived += 1
+
+    def _mark_settled(self, funding_time: int):
+        self.last_funding_time = funding_time
+        self._journal("boundary", {"fundingTime": funding_time})
+
+    async def run(self):
+        """Sleep until each funding boundary and settle it; missed boundaries are caught up first"""
+        while True:
+            now = int(time.time() * 1000)
+            if self.last_funding_time is None:
+                self._mark_settled(funding_time_floor(now))
+            while self.last_funding_time + FUNDING_INTERVAL_MS <= now:
+                funding_time = self.last_funding_time + FUNDING_INTERVAL_MS
+                await self.settle_async(funding_time)
+                self._mark_settled(funding_time)
+            await asyncio.sleep((self.last_funding_time + FUNDING_INTERVAL_MS - now) / 1000)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # ------------------------------------------------------------------ queries
+
+    def get_funding_rate_history(self, symbol: Optional[str] = None, start_time: Optional[int] = None,
+                                 end_time: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Binance /fapi/v1/fundingRate: ascending by fundingTime, the most recent ``limit`` in range"""
+        limit = max(1, min(int(limit), 1000))
+        symbols = [symbol.upper()] if symbol else list(self.history)
+        rows = [
+            (entry["fundingTime"], sym, entry)
+            for sym in symbols for entry in self.history.get(sym, ())
+            if (start_time is None or entry["fundingTime"] >= start_time)
+            and (end_time is None or entry["fundingTime"] <= end_time)
+        ]
+        rows.sort(key=lambda row: (row[0], row[1]))
+        rows = rows[:limit] if start_time is not None else rows[-limit:]
+        return [
+            {
+                "symbol": sym,
+                "fundingTime": funding_time,
+                "fundingRate": f"{entry['fundingRate']:.8f}",
+                "markPrice": f"{entry['markPrice']:.8f}"
+            }
+            for funding_time, sym, entry in rows
+        ]
+
+    def get_ledger(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return list(self.ledger)[-limit:]
+
+    def get_status(self) -> Dict[str, Any]:
+        now = int(time.time() * 1000)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "engines": list(self.engines),
+            "last_funding_time": self.last_funding_time,
+            "next_funding_time": next_funding_time(now),
+            "symbols": len(self.history),
+            "settlements": len(self.ledger)
+        }
+
+    # ------------------------------------------------------------------ persistence
+
+    def _journal(self, event_type: str, data: Dict[str, Any]):
+        try:
+            self.journal.append(event_type, data)
+            if self.journal.needs_snapshot:
+                self.save_data()
+        except OSError as e:
+            logger.error(f"Error writing funding journal: {e}")
+
+    def save_data(self):
+        """Compact: archive new ledger entries, snapshot rate history and the last boundary"""
+        try:
+            if self._unarchived:
+                self.journal.archive("ledger", list(self.ledger)[-self._unarchived:])
+                self._unarchived = 0
+            self.journal.write_snapshot({
+                "last_funding_time": self.last_funding_time,
+                "history": {symbol: list(entries) for symbol, entries in self.history.items()},
+                "ledger": list(self.ledger)
+            })
+        except Exception as e:
+            logger.error(f"Error saving funding data: {e}")
+
+    def load_data(self):
+        try:
+            state, events = self.journal.load()
+            if state:
+                self.last_funding_time = state.get("last_funding_time")
+                self.history = {
+                    symbol: deque(entries, maxlen=HISTORY_RETAINED)
+                    for symbol, entries in state.get("history", {}).items()
+                }
+                self.ledger.extend(state.get("ledger", []))
+            for event in events:
+                if event["type"] == "settlement":
+                    self._record(event["data"])
+                elif event["type"] == "boundary":
+                    self.last_funding_time = event["data"]["fundingTime"]
+        except Exception as e:
+            logger.error(f"Error loading funding data: {e}")
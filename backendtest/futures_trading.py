@@ -4,12 +4,20 @@ Complete implementation with leverage, SL, TP, liquidations, and margin manageme
 """
 
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Literal, Iterable
 from datetime import datetime
 import json
 import os
 import math
 from enum import Enum
+from position_book import PositionBook, EXIT_REASONS
+from event_journal import EventJournal
+from accounts import AccountTable, DEFAULT_ACCOUNT, valid_account_id
+from portfolio_ledger import LedgerSource
+
+HISTORY_RETAINED = 500  # closed trades kept in memory/snapshots; older ones live in the archive file
+STARTING_BALANCE = 10000.0
+ACCOUNT_COLUMNS = {"available_balance": STARTING_BALANCE, "total_margin_used": 0.0}
 
 class PositionSide(str, Enum):
     LONG = "LONG"
@@ -54,6 +62,8 @@ class FuturesPosition(BaseModel):
     created_at: str
     closed_at: Optional[str] = None
     closed_pnl: Optional[float] = None
+    funding_fee: float = 0.0  # funding received while open (negative when paid)
+    account: str = DEFAULT_ACCOUNT
 
 class FuturesAccountInfo(BaseModel):
     total_wallet_balance: float
@@ -78,17 +88,23 @@ class FuturesSettings(BaseModel):
 class FuturesTradingEngine:
     def __init__(self):
         self.positions: Dict[str, FuturesPosition] = {}
-        self.account_info = FuturesAccountInfo(
-            total_wallet_balance=10000.0,  # Starting balance
-            available_balance=10000.0,
-            total_margin_used=0.0,
-            total_unrealized_pnl=0.0,
-            maintenance_margin=0.0,
-            margin_ratio=0.0,
-            can_trade=True
-        )
+        # Sub-accounts: balances live in one shared AccountTable row per account, positions are
+        # tagged with their account; account totals are derived on demand, never per tick
+        self.accounts = AccountTable(ACCOUNT_COLUMNS)
+        self.accounts.add(DEFAULT_ACCOUNT)
+        self.account_positions: Dict[str, Dict[str, None]] = {}  # account -> open position ids (ordered)
         self.settings = FuturesSettings()
         self.trade_history: List[Dict[str, Any]] = []
+        self.position_book = PositionBook()  # vectorised PnL / liquidation / SL / TP per symbol
+        # account -> symbol -> [open positions, net quantity, net cost]: running sums adjusted on open /
+        # close, so an account's unrealized PnL is sum(last price * net quantity - net cost) over its symbols
+        self.account_exposure: Dict[str, Dict[str, List[float]]] = {}
+        self.ledger: Optional[LedgerSource] = None  # portfolio-wide exposure, see attach_ledger
+        
+        # Persistence: snapshot of open positions / account / settings plus an append-only journal;
+        # closed trades are moved to an archive file whenever the journal is compacted
+        self.journal = EventJournal("data", "futures", compact_every=1000)
+        self._unarchived_trades = 0  # trade_history tail not yet written to the archive
         self.load_data()
     
     def calculate_position_size(self, margin: float, leverage: int, price: float) -> float:
@@ -148,17 +164,22 @@ class FuturesTradingEngine:
         else:
             return current_price <= position.take_profit
     
-    def open_position(self, signal: FuturesSignal) -> Dict[str, Any]:
+    def open_position(self, signal: FuturesSignal, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Open a new futures position"""
         try:
+            if account not in self.accounts:
+                return {"status": "error", "message": f"Unknown account: {account}"}
+            row = self.accounts.row(account)
+            available_balance = self.accounts.columns["available_balance"]
+            
             # Calculate margin to use
             margin = self.settings.default_margin_per_trade
             
             # Check if we have enough available balance
-            if self.account_info.available_balance < margin:
+            if available_balance[row] < margin:
                 return {
                     "status": "error",
-                    "message": f"Insufficient balance. Available: ${self.account_info.available_balance:.2f}, Required: ${margin:.2f}"
+                    "message": f"Insufficient balance. Available: ${available_balance[row]:.2f}, Required: ${margin:.2f}"
                 }
             
             # Calculate position size
@@ -188,7 +209,9 @@ class FuturesTradingEngine:
                     take_profit = signal.price * (1 - signal.take_profit_percent / 100)
             
             # Create position
-            position_id = f"{signal.symbol}_{signal.side}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            position_id = f"{signal.symbol}_{signal.side}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+            while position_id in self.positions:
+                position_id += "_1"
             
             position = FuturesPosition(
                 id=position_id,
@@ -205,23 +228,28 @@ class FuturesTradingEngine:
                 take_profit=take_profit,
                 liquidation_price=liquidation_price,
                 status=PositionStatus.OPEN,
-                created_at=signal.timestamp
+                created_at=signal.timestamp,
+                account=account
             )
             
             # Update account info
-            self.account_info.available_balance -= margin
-            self.account_info.total_margin_used += margin
+            available_balance[row] -= margin
+            self.accounts.columns["total_margin_used"][row] += margin
             
             # Store position
             self.positions[position_id] = position
+            self.account_positions.setdefault(account, {})[position_id] = None
+            self._book_add(position)
+            if self.ledger is not None:
+                self._publish(position)
             
             # Save data
-            self.save_data()
+            self._journal("open", {"position": position.model_dump(), "account": self._account_state(account)})
             
             return {
                 "status": "success",
                 "message": "Position opened successfully",                "position": position.model_dump(),
-                "account_info": self.account_info.model_dump()
+                "account_info": self.get_account_info(account)
             }
             
         except Exception as e:
@@ -248,8 +276,10 @@ class FuturesTradingEngine:
             position.current_price = current_price
             
             # Update account balance
-            self.account_info.available_balance += position.margin_used + unrealized_pnl
-            self.account_info.total_margin_used -= position.margin_used
+            account = position.account
+            row = self.accounts.row(account)
+            self.accounts.columns["available_balance"][row] += position.margin_used + unrealized_pnl
+            self.accounts.columns["total_margin_used"][row] -= position.margin_used
             
             # Add to trade history
             trade_record = {
@@ -263,24 +293,32 @@ class FuturesTradingEngine:
                 "pnl": unrealized_pnl,
                 "pnl_percent": unrealized_pnl_percent,
                 "margin_used": position.margin_used,
+                "funding_fee": self.position_book.funding(position_id),
                 "reason": reason,
+                "account": account,
                 "created_at": position.created_at,
                 "closed_at": position.closed_at
             }
             self.trade_history.append(trade_record)
+            self._unarchived_trades += 1
             
             # Remove from active positions
             del self.positions[position_id]
+            del self.account_positions[account][position_id]
+            self.position_book.remove(position_id)
+            self._track_exposure(position, -1)
+            if self.ledger is not None:
+                self.ledger.remove_position(position_id, unrealized_pnl)
             
             # Save data
-            self.save_data()
+            self._journal("close", {"trade": trade_record, "account": self._account_state(account)})
             
             return {
                 "status": "success",
                 "message": f"Position closed ({reason})",
                 "pnl": unrealized_pnl,
                 "trade_record": trade_record,
-                "account_info": self.account_info.model_dump()
+                "account_info": self.get_account_info(account)
             }
             
         except Exception as e:
@@ -292,148 +330,314 @@ class FuturesTradingEngine:
     def update_positions(self, symbol: str, current_price: float) -> List[Dict[str, Any]]:
         """Update all positions for a symbol and check for triggers"""
         updates = []
-        positions_to_close = []
-        
-        for position_id, position in self.positions.items():
-            if position.symbol.upper() != symbol.upper():
-                continue
-            
-            # Update current price and PnL
-            unrealized_pnl, unrealized_pnl_percent = self.calculate_unrealized_pnl(position, current_price)
-            position.current_price = current_price
-            position.unrealized_pnl = unrealized_pnl
-            position.unrealized_pnl_percent = unrealized_pnl_percent
-            
-            # Check for liquidation
-            if self.check_liquidation(position, current_price):
-                positions_to_close.append((position_id, "liquidation"))
-                updates.append({
-                    "position_id": position_id,
-                    "action": "liquidation",
-                    "price": current_price,
-                    "pnl": unrealized_pnl
-                })
-            
-            # Check for stop loss
-            elif self.check_stop_loss(position, current_price):
-                positions_to_close.append((position_id, "stop_loss"))
-                updates.append({
-                    "position_id": position_id,
-                    "action": "stop_loss",
-                    "price": current_price,
-                    "pnl": unrealized_pnl
-                })
-            
-            # Check for take profit
-            elif self.check_take_profit(position, current_price):
-                positions_to_close.append((position_id, "take_profit"))
-                updates.append({
-                    "position_id": position_id,
-                    "action": "take_profit",
-                    "price": current_price,
-                    "pnl": unrealized_pnl
-                })
+        if self.ledger is not None:
+            self.ledger.mark(symbol.upper(), current_price)
         
-        # Close triggered positions
-        for position_id, reason in positions_to_close:
-            self.close_position(position_id, current_price, reason)
+        # One vectorised pass: revalue PnL, then liquidation > stop loss > take profit per position
+        for position_id, reason in self.position_book.revalue(symbol.upper(), current_price):
+            _, unrealized_pnl, _ = self.position_book.snapshot(position_id)
+            updates.append({
+                "position_id": position_id,
+                "action": EXIT_REASONS[reason],
+                "price": current_price,
+                "pnl": unrealized_pnl
+            })
         
-        # Update account totals
-        self.update_account_totals()
+        # Close triggered positions (account totals are derived when read, not per tick)
+        for update in updates:
+            self.close_position(update["position_id"], current_price, update["action"])
         
         return updates
     
-    def update_account_totals(self):
-        """Update account totals based on current positions"""
-        total_unrealized_pnl = sum(pos.unrealized_pnl for pos in self.positions.values())
-        maintenance_margin = sum(pos.margin_used * 0.005 for pos in self.positions.values())  # 0.5% maintenance
-        
-        self.account_info.total_unrealized_pnl = total_unrealized_pnl
-        self.account_info.maintenance_margin = maintenance_margin
+    def account_totals(self, account: str = DEFAULT_ACCOUNT) -> FuturesAccountInfo:
+        """Account totals from its balances and the current PnL of its open positions"""
+        row = self.accounts.row(account)
+        available_balance = self.accounts.columns["available_balance"][row]
+        total_margin_used = self.accounts.columns["total_margin_used"][row]
+        total_unrealized_pnl = 0.0
+        for symbol, (_, net_quantity, net_cost) in self.account_exposure.get(account, {}).items():
+            last_price = self.position_book.last_price(symbol)
+            if not math.isnan(last_price):
+                total_unrealized_pnl += last_price * net_quantity - net_cost
+        maintenance_margin = total_margin_used * 0.005  # 0.5% maintenance
         
         # Calculate margin ratio
-        total_balance = self.account_info.available_balance + self.account_info.total_margin_used + total_unrealized_pnl
-        if total_balance > 0:
-            self.account_info.margin_ratio = maintenance_margin / total_balance
-        else:
-            self.account_info.margin_ratio = 1.0
+        total_balance = available_balance + total_margin_used + total_unrealized_pnl
+        margin_ratio = maintenance_margin / total_balance if total_balance > 0 else 1.0
+        
+        return FuturesAccountInfo(
+            total_wallet_balance=total_balance,
+            available_balance=available_balance,
+            total_margin_used=total_margin_used,
+            total_unrealized_pnl=total_unrealized_pnl,
+            maintenance_margin=maintenance_margin,
+            margin_ratio=margin_ratio,
+            can_trade=margin_ratio < 0.8  # Can trade while margin ratio < 80%
+        )
+    
+    def _account_state(self, account: str) -> Dict[str, Any]:
+        """Journaled balances of one account"""
+        return {"id": account, **self.accounts.record(account)}
+    
+    def _restore_account(self, state: Dict[str, Any]):
+        """Apply journaled balances (entries written before sub-accounts hold the default account's full info)"""
+        account = state.get("id", DEFAULT_ACCOUNT)
+        if account not in self.accounts:
+            self.accounts.add(account)
+        for name in ACCOUNT_COLUMNS:
+            self.accounts.set(account, name, state[name])
+    
+    def create_account(self, account: str, balance: float = STARTING_BALANCE) -> Dict[str, Any]:
+        """Open a sub-account with its own balance and positions"""
+        if not valid_account_id(account):
+            return {"status": "error", "message": f"Invalid account id {account!r}: use 1-32 letters, digits, '_' or '-'"}
+        if account in self.accounts:
+            return {"status": "error", "message": f"Account already exists: {account}"}
+        if balance < 0:
+            return {"status": "error", "message": "Balance must not be negative"}
+        self.accounts.add(account, available_balance=float(balance))
+        self._journal("account_created", {"account": self._account_state(account)})
+        return {"status": "success", "account": account, "account_info": self.get_account_info(account)}
+    
+    def delete_account(self, account: str) -> Dict[str, Any]:
+        """Remove a sub-account once it has no open positions"""
+        if account not in self.accounts:
+            return {"status": "error", "message": f"Unknown account: {account}"}
+        if account == DEFAULT_ACCOUNT:
+            return {"status": "error", "message": "The default account cannot be deleted"}
+        if self.account_in_use(account):
+            return {"status": "error", "message": f"Account has open positions: {account}"}
+        self.accounts.remove(account)
+        self.account_positions.pop(account, None)
+        self.account_exposure.pop(account, None)
+        self._journal("account_deleted", {"id": account})
+        return {"status": "success", "message": f"Account deleted: {account}"}
+    
+    def account_in_use(self, account: str) -> bool:
+        return bool(self.account_positions.get(account))
+    
+    def list_accounts(self) -> List[Dict[str, Any]]:
+        return [
+            {"account": account, "open_positions": len(self.account_positions.get(account, ())),
+             **self.get_account_info(account)}
+            for account in self.accounts
+        ]
+    
+    def _book_add(self, position: FuturesPosition):
+        self.position_book.add(
+            position.symbol.upper(), position.id, position.entry_price, position.size,
+            1 if position.side == PositionSide.LONG else -1,
+            position.stop_loss, position.take_profit, position.liquidation_price, position.leverage,
+            funding=position.funding_fee
+        )
+        self._track_exposure(position, 1)
+    
+    def _track_exposure(self, position: FuturesPosition, change: int):
+        """Add (1) or remove (-1) a position in its account's per-symbol running sums"""
+        symbol = position.symbol.upper()
+        exposure = self.account_exposure.setdefault(position.account, {})
+        sums = exposure.setdefault(symbol, [0, 0.0, 0.0])
+        signed_quantity = change * (1 if position.side == PositionSide.LONG else -1) * position.size
+        sums[0] += change
+        sums[1] += signed_quantity
+        sums[2] += signed_quantity * position.entry_price
+        if not sums[0]:
+            del exposure[symbol]  # flat: drop accumulated rounding
+    
+    def sync_positions(self, position_ids: Optional[Iterable[str]] = None):
+        """Copy the book's latest price / PnL onto the position models (done lazily, not per tick)"""
+        for position_id in (self.positions if position_ids is None else position_ids):
+            position = self.positions[position_id]
+            snapshot = self.position_book.snapshot(position.id)
+            if snapshot is not None and not math.isnan(snapshot[0]):
+                position.current_price, position.unrealized_pnl, position.unrealized_pnl_percent = snapshot
+            position.funding_fee = self.position_book.funding(position.id)
+    
+    def attach_ledger(self, ledger: LedgerSource):
+        """Publish open positions to the portfolio ledger, then keep it updated on open / close / tick"""
+        self.ledger = ledger
+        ledger.reset()
+        for position in self.positions.values():
+            self._publish(position)
+        for symbol, book in self.position_book.books.items():
+            if len(book) and not math.isnan(book.last_price):
+                ledger.mark(symbol, book.last_price)
+    
+    def _publish(self, position: FuturesPosition):
+        sign = 1 if position.side == PositionSide.LONG else -1
+        self.ledger.set_position(position.id, position.symbol.upper(), sign * position.size,
+                                 position.entry_price, position.account)
+    
+    def funding_marks(self) -> Dict[str, float]:
+        """Symbols with open positions and the price funding is settled at (last revaluation price)"""
+        marks = {}
+        for symbol, book in self.position_book.books.items():
+            if len(book):
+                marks[symbol] = book.last_price if not math.isnan(book.last_price) else float(book.entry[:len(book)].mean())
+        return marks
+    
+    def settle_funding(self, symbol: str, rate: float, mark_price: float, funding_time: int) -> Dict[str, Any]:
+        """Pay/receive one funding interval for all of a symbol's positions in one vectorised batch"""
+        position_ids, payments = self.position_book.apply_funding(symbol.upper(), rate, mark_price)
+        if not position_ids:
+            return {"positions": 0, "amount": 0.0}
         
-        # Update total wallet balance
-        self.account_info.total_wallet_balance = total_balance
+        # Credit each account with its positions' share of the batch
+        received: Dict[str, float] = {}
+        for position_id, payment in zip(position_ids, payments.tolist()):
+            account = self.positions[position_id].account
+            received[account] = received.get(account, 0.0) + payment
+        available_balance = self.accounts.columns["available_balance"]
+        for account, amount in received.items():
+            available_balance[self.accounts.rows[account]] += amount
         
-        # Check if can trade (margin ratio < 80%)
-        self.account_info.can_trade = self.account_info.margin_ratio < 0.8
+        amount = sum(received.values())
+        self._journal("funding", {
+            "symbol": symbol.upper(),
+            "rate": rate,
+            "mark_price": mark_price,
+            "funding_time": funding_time,
+            "amount": amount,
+            "accounts": [self._account_state(account) for account in received]
+        })
+        if self.ledger is not None:
+            self.ledger.realize(amount, symbol.upper())
+        return {"positions": len(position_ids), "amount": amount}
     
-    def get_positions(self) -> List[Dict[str, Any]]:
-        """Get all open positions"""
-        return [pos.model_dump() for pos in self.positions.values()]
+    def get_positions(self, account: str = DEFAULT_ACCOUNT) -> List[Dict[str, Any]]:
+        """Get an account's open positions"""
+        position_ids = list(self.account_positions.get(account, ()))
+        self.sync_positions(position_ids)
+        return [self.positions[position_id].model_dump() for position_id in position_ids]
     
-    def get_account_info(self) -> Dict[str, Any]:
+    def get_account_info(self, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Get account information"""
-        self.update_account_totals()
-        return self.account_info.model_dump()
+        return self.account_totals(account).model_dump()
     
     def get_trade_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get trade history"""
         return self.trade_history[-limit:]
     
+    def _journal(self, event_type: str, data: Dict[str, Any]):
+        """Append a state change; compacts into a snapshot every ``compact_every`` events"""
+        try:
+            self.journal.append(event_type, data)
+            if self.journal.needs_snapshot:
+                self.save_data()
+        except OSError as e:
+            print(f"Error writing futures journal: {e}")
+    
     def save_data(self):
-        """Save data to files"""
+        """Compact: archive new closed trades, snapshot open positions / account / settings, reset the journal"""
         try:
-            os.makedirs("data", exist_ok=True)
-              # Save positions
-            positions_data = {pos_id: pos.model_dump() for pos_id, pos in self.positions.items()}
-            with open("data/futures_positions.json", "w") as f:
-                json.dump(positions_data, f, indent=2)
-            
-            # Save account info
-            with open("data/futures_account.json", "w") as f:
-                json.dump(self.account_info.model_dump(), f, indent=2)
-            
-            # Save trade history
-            with open("data/futures_trade_history.json", "w") as f:
-                json.dump(self.trade_history, f, indent=2)
-              # Save settings
-            with open("data/futures_settings.json", "w") as f:
-                json.dump(self.settings.model_dump(), f, indent=2)
-                
+            self.sync_positions()
+            if self._unarchived_trades:
+                self.journal.archive("trades", self.trade_history[-self._unarchived_trades:])
+                self._unarchived_trades = 0
+            del self.trade_history[:-HISTORY_RETAINED]
+            
+            self.journal.write_snapshot({
+                "positions": {pos_id: pos.model_dump() for pos_id, pos in self.positions.items()},
+                "account": self.get_account_info(),
+                "accounts": self.accounts.to_state(),
+                "settings": self.settings.model_dump(),
+                "recent_trades": self.trade_history
+            })
         except Exception as e:
             print(f"Error saving futures data: {e}")
     
     def load_data(self):
-        """Load data from files"""
+        """Load the last snapshot and replay the journal tail (legacy JSON files are migrated once)"""
         try:
-            # Load positions
-            if os.path.exists("data/futures_positions.json"):
-                with open("data/futures_positions.json", "r") as f:
-                    positions_data = json.load(f)
-                    self.positions = {
-                        pos_id: FuturesPosition(**pos_data)
-                        for pos_id, pos_data in positions_data.items()
-                    }
-            
-            # Load account info
-            if os.path.exists("data/futures_account.json"):
-                with open("data/futures_account.json", "r") as f:
-                    account_data = json.load(f)
-                    self.account_info = FuturesAccountInfo(**account_data)
-            
-            # Load trade history
-            if os.path.exists("data/futures_trade_history.json"):
-                with open("data/futures_trade_history.json", "r") as f:
-                    self.trade_history = json.load(f)
-            
-            # Load settings
-            if os.path.exists("data/futures_settings.json"):
-                with open("data/futures_settings.json", "r") as f:
-                    settings_data = json.load(f)
-                    self.settings = FuturesSettings(**settings_data)
+            state, events = self.journal.load()
+            if state is None and not events and self._load_legacy_data():
+                self._rebuild_position_book()
+                self.save_data()
+            
+            if state:
+                self.positions = {
+                    pos_id: FuturesPosition(**pos_data)
+                    for pos_id, pos_data in state.get("positions", {}).items()
+                }
+                if state.get("accounts"):
+                    self.accounts.load_state(state["accounts"])
+                elif state.get("account"):
+                    self._restore_account(state["account"])
+                if state.get("settings"):
+                    self.settings = FuturesSettings(**state["settings"])
+                self.trade_history = state.get("recent_trades", [])
+            
+            for event in events:
+                data = event["data"]
+                if event["type"] == "open":
+                    position = FuturesPosition(**data["position"])
+                    self.positions[position.id] = position
+                elif event["type"] == "close":
+                    self.positions.pop(data["trade"]["position_id"], None)
+                    self.trade_history.append(data["trade"])
+                    self._unarchived_trades += 1
+                elif event["type"] == "funding":
+                    for position in self.positions.values():
+                        if position.symbol.upper() == data["symbol"]:
+                            sign = 1 if position.side == PositionSide.LONG else -1
+                            position.funding_fee -= sign * position.size * data["mark_price"] * data["rate"]
+                if event["type"] == "account_deleted":
+                    self.accounts.remove(data["id"])
+                else:
+                    for account_state in data.get("accounts") or [data["account"]]:
+                        self._restore_account(account_state)
             
-            # Update account totals
-            self.update_account_totals()
+            if state or events:
+                self._rebuild_position_book()
             
         except Exception as e:
             print(f"Error loading futures data: {e}")
+    
+    def _rebuild_position_book(self):
+        self.position_book = PositionBook()
+        self.account_positions = {}
+        self.account_exposure = {}
+        for position in self.positions.values():
+            self.account_positions.setdefault(position.account, {})[position.id] = None
+            self._book_add(position)
+        # Seed the book's valuation with the last saved prices
+        for position in self.positions.values():
+            self.position_book.revalue(position.symbol.upper(), position.current_price)
+    
+    def _load_legacy_data(self) -> bool:
+        """Load the pre-journal JSON files; returns True if any were found"""
+        found = False
+        # Load positions
+        if os.path.exists("data/futures_positions.json"):
+            with open("data/futures_positions.json", "r") as f:
+                positions_data = json.load(f)
+                self.positions = {
+                    pos_id: FuturesPosition(**pos_data)
+                    for pos_id, pos_data in positions_data.items()
+                }
+            found = True
+        
+        # Load account info
+        if os.path.exists("data/futures_account.json"):
+            with open("data/futures_account.json", "r") as f:
+                account_data = json.load(f)
+                self._restore_account(account_data)
+            found = True
+        
+        # Load trade history (all of it goes to the archive on the first compaction)
+        if os.path.exists("data/futures_trade_history.json"):
+            with open("data/futures_trade_history.json", "r") as f:
+                self.trade_history = json.load(f)
+                self._unarchived_trades = len(self.trade_history)
+            found = True
+        
+        # Load settings
+        if os.path.exists("data/futures_settings.json"):
+            with open("data/futures_settings.json", "r") as f:
+                settings_data = json.load(f)
+                self.settings = FuturesSettings(**settings_data)
+            found = True
+        return found
 
 # Global futures trading engine instance
 futures_engine = FuturesTradingEngine()
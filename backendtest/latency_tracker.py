@@ -0,0 +1,225 @@
+"""
+Latency Tracker
+HDR-style log-linear histograms (~1.6% precision, O(1) record) per symbol and stage,
+plus an optional trace of the slowest N decisions with per-stage breakdowns
+"""
+
+import heapq
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Values below SUB_BUCKETS microseconds get exact buckets, above that each power of two
+# is split into HALF_BUCKETS linear sub-buckets
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS >> 1
+MAX_VALUE_US = (1 << 27) - 1  # ~134 s; larger values are clamped
+
+ALL_SYMBOLS = "*"
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + ((value_us >> shift) - HALF_BUCKETS)
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint of a bucket, in microseconds"""
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift = (index - SUB_BUCKETS) // HALF_BUCKETS + 1
+    lower = (HALF_BUCKETS + (index - SUB_BUCKETS) % HALF_BUCKETS) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+BUCKET_COUNT = _bucket_index(MAX_VALUE_US) + 1
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, value_us: int):
+        if value_us < 0:
+            value_us = 0
+        elif value_us > MAX_VALUE_US:
+            value_us = MAX_VALUE_US
+        self.counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentiles(self, quantiles: Tuple[float, ...]) -> List[float]:
+        """Values (µs) at the given quantiles in one pass over the buckets"""
+        if not self.count:
+            return [0.0] * len(quantiles)
+        targets = [max(1, int(q * self.count + 0.5)) for q in quantiles]
+        results = [0.0] * len(quantiles)
+        seen = 0
+        pending = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while pending < len(targets) and seen >= targets[pending]:
+                results[pending] = min(_bucket_value(index), float(self.max_us))
+                pending += 1
+            if pending == len(targets):
+                break
+        return results
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.percentiles((0.50, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(p50 / 1000, 3),
+            "p95_ms": round(p95 / 1000, 3),
+            "p99_ms": round(p99 / 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3)
+        }
+
+
+class DecisionTrace:
+    __slots__ = ("symbol", "kind", "origin_ts", "started_at", "stages", "outcome", "total_ms")
+
+    def __init__(self, symbol: str, kind: str, origin_ts: float):
+        self.symbol = symbol
+        self.kind = kind
+        self.origin_ts = origin_ts
+        self.started_at = time.time()
+        self.stages: Dict[str, float] = {}
+        self.outcome: Optional[str] = None
+        self.total_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "outcome": self.outcome,
+            "total_ms": round(self.total_ms, 3),
+            "stages_ms": {stage: round(ms, 3) for stage, ms in self.stages.items()}
+        }
+
+
+class _StageTimer:
+    __slots__ = ("tracker", "symbol", "stage", "kind", "started")
+
+    def __init__(self, tracker: "LatencyTracker", symbol: str, stage: str, kind: Optional[str]):
+        self.tracker = tracker
+        self.symbol = symbol
+        self.stage = stage
+        self.kind = kind
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracker.record(self.symbol, self.stage, (time.perf_counter() - self.started) * 1000, self.kind)
+        return False
+
+
+class LatencyTracker:
+    """
+    Stage timings go to a histogram per (symbol, stage) and to an aggregate ("*") histogram.
+    With sampling enabled, decisions are traced from their originating market event
+    (begin -> stages -> finish) and the slowest ``trace_slowest`` are kept.
+    """
+
+    def __init__(self, trace_slowest: int = 20, sample_rate: float = 0.0):
+        self.trace_slowest = trace_slowest
+        self.sample_rate = sample_rate
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.open_traces: Dict[Tuple[str, str], DecisionTrace] = {}
+        self._slowest: List[Tuple[float, int, DecisionTrace]] = []  # min-heap by total_ms
+        self._trace_seq = 0
+
+    def configure(self, trace_slowest: Optional[int] = None, sample_rate: Optional[float] = None):
+        if trace_slowest is not None:
+            self.trace_slowest = trace_slowest
+            while len(self._slowest) > trace_slowest:
+                heapq.heappop(self._slowest)
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+            if not sample_rate:
+                self.open_traces.clear()
+
+    def _histogram(self, symbol: str, stage: str) -> LatencyHistogram:
+        stages = self.histograms.get(symbol)
+        if stages is None:
+            stages = self.histograms[symbol] = {}
+        histogram = stages.get(stage)
+        if histogram is None:
+            histogram = stages[stage] = LatencyHistogram()
+        return histogram
+
+    def record(self, symbol: str, stage: str, ms: float, kind: Optional[str] = None):
+        value_us = int(ms * 1000)
+        self._histogram(symbol, stage).record(value_us)
+        self._histogram(ALL_SYMBOLS, stage).record(value_us)
+        if kind is not None and self.open_traces:
+            trace = self.open_traces.get((symbol, kind))
+            if trace is not None:
+                trace.stages[stage] = trace.stages.get(stage, 0.0) + ms
+
+    def stage(self, symbol: str, stage: str, kind: Optional[str] = None) -> _StageTimer:
+        """Context manager timing one stage"""
+        return _StageTimer(self, symbol, stage, kind)
+
+    def begin(self, symbol: str, kind: str, origin_ts: Optional[float] = None):
+        """Open a decision trace (when sampled) for stages recorded with the same symbol/kind"""
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return
+        key = (symbol, kind)
+        if key not in self.open_traces:
+            self.open_traces[key] = DecisionTrace(
+                symbol, kind, origin_ts if origin_ts is not None else time.perf_counter()
+            )
+
+    def finish(self, symbol: str, kind: str, outcome: str, origin_ts: Optional[float] = None):
+        """Record the decision's end-to-end latency and keep its trace if among the slowest"""
+        trace = self.open_traces.pop((symbol, kind), None)
+        if origin_ts is None:
+            if trace is None:
+                return
+            origin_ts = trace.origin_ts
+        total_ms = (time.perf_counter() - origin_ts) * 1000
+        self.record(symbol, f"{kind}_total", total_ms)
+
+        if trace is None or self.trace_slowest <= 0:
+            return
+        trace.outcome = outcome
+        trace.total_ms = total_ms
+        self._trace_seq += 1
+        entry = (total_ms, self._trace_seq, trace)
+        if len(self._slowest) < self.trace_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif total_ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def get_summary(self, symbol: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """{symbol: {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}"""
+        symbols = [symbol] if symbol else list(self.histograms)
+        return {
+            s: {stage: histogram.summary() for stage, histogram in self.histograms[s].items()}
+            for s in symbols if s in self.histograms
+        }
+
+    def get_slowest(self) -> List[Dict[str, Any]]:
+        return [trace.to_dict() for _, _, trace in sorted(self._slowest, key=lambda e: e[0], reverse=True)]
+
+    def reset(self):
+        self.histograms.clear()
+        self.open_traces.clear()
+        self._slowest.clear()
@@ -78,18 +78,42 @@ from price_feed import get_binance_price
 # Import Binance Futures-style trading system
 from futures_trading import FuturesTradingEngine, FuturesSignal, FuturesPosition, FuturesAccountInfo, FuturesSettings, PositionSide, PositionStatus
 
-# Initialize futures engine
-futures_engine = FuturesTradingEngine()
+# Shared futures engine instance (also used by the routers)
+from futures_trading import futures_engine
 
 # Import Binance Futures-exact trading system
 from binance_futures_exact import BinanceFuturesTradingEngine
 from binance_futures_exact import OrderSide, OrderType, PositionSide, TimeInForce, WorkingType, OrderStatus
+from accounts import DEFAULT_ACCOUNT
 
 # Initialize Binance futures engine
 binance_futures_engine = BinanceFuturesTradingEngine()
 
+# Mark-to-market the Binance futures engine (revaluation, liquidation, resting orders, countdowns)
+# from every bulk ticker refresh; the refresh loop is started on the first request
+from price_service import ticker_table
+
+def mark_binance_futures(table):
+    for symbol, price in table.get_prices(binance_futures_engine.watched_symbols()).items():
+        binance_futures_engine.update_price(symbol, price)
+
+ticker_table.add_listener(mark_binance_futures)
+
+# Funding settlement for both simulated perpetual engines (every 8h, started on the first request)
+from funding import FundingScheduler
+funding_scheduler = FundingScheduler()
+funding_scheduler.register("futures", futures_engine)
+funding_scheduler.register("binance_futures", binance_futures_engine)
+
+# One ledger of open exposure / PnL across all engines; portfolio endpoints read its running aggregates
+from portfolio_ledger import get_portfolio_ledger
+from routes.risk_management_routes import portfolio_risk_metrics
+portfolio_ledger = get_portfolio_ledger()
+futures_engine.attach_ledger(portfolio_ledger.source("futures"))
+binance_futures_engine.attach_ledger(portfolio_ledger.source("binance_futures"))
+
 # Import Advanced Async Auto Trading Engine
-from advanced_auto_trading import AdvancedAutoTradingEngine, TradingSignal, AISignal
+from advanced_auto_trading import AdvancedAutoTradingEngine, TradingSignal, AISignal, get_advanced_auto_trading_engine
 ADVANCED_ENGINE_AVAILABLE = True
 print("[+] Advanced Auto Trading Engine imported successfully")
 
@@ -157,7 +181,7 @@ async def lifespan(app: FastAPI):
         global advanced_auto_trading_engine
         if ADVANCED_ENGINE_AVAILABLE:
             try:
-                advanced_auto_trading_engine = AdvancedAutoTradingEngine()
+                advanced_auto_trading_engine = get_advanced_auto_trading_engine()
                 print("[+] Advanced Auto Trading Engine initialized successfully")
             except Exception as e:
                 print(f"[!] Warning: Could not initialize advanced auto trading engine: {e}")
@@ -179,6 +203,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     try:
+        funding_scheduler.stop()
+        
         # Stop data collection
         try:
             data_collector.stop_collection()
@@ -205,6 +231,13 @@ app.add_middleware(
 )
 print("[+] CORS middleware configured for cross-origin requests")
 
+# Background feeds need a running event loop and the app has no lifespan hook: start them on the first request
+@app.middleware("http")
+async def start_background_feeds(request: Request, call_next):
+    ticker_table.start()
+    funding_scheduler.start()
+    return await call_next(request)
+
 # Setup dependencies for extracted routers (will be set after advanced_auto_trading_engine is initialized)
 def setup_router_dependencies():
     """Setup dependencies for extracted routers"""
@@ -289,6 +322,7 @@ try:
         market_data_router,
         auto_trading_router,
         simple_ml_router,
+        replay_router,
         set_engine_instance,
         set_ml_dependencies,
         set_notification_dependencies,
@@ -319,6 +353,7 @@ try:
     app.include_router(market_data_router)
     app.include_router(auto_trading_router)
     app.include_router(simple_ml_router)
+    app.include_router(replay_router)
     print("[+] All modular routers included successfully")
     print("[+] Added missing routers: spot_trading, market_data, auto_trading, simple_ml")
     
@@ -511,6 +546,7 @@ async def get_advanced_positions():
         if advanced_auto_trading_engine is None:
             return {"status": "error", "message": "Engine not available"}
         
+        advanced_auto_trading_engine.sync_positions()
         positions = []
         for position in advanced_auto_trading_engine.positions.values():
             positions.append({
@@ -639,7 +675,7 @@ async def update_advanced_config(config: dict = Body(...)):
             return {"status": "error", "message": "Engine not available"}
         
         # Update configuration
-        advanced_auto_trading_engine.config.update(config)
+        advanced_auto_trading_engine.update_config(config)
         
         # Save configuration
         os.makedirs("data", exist_ok=True)
@@ -937,7 +973,7 @@ async def get_technical_indicators(symbol: str = "btcusdt"):
             print(f"[INFO] Data collector indicators failed: {e}")
         
         # Fallback: Get current price and basic indicators
-        price_data = get_price(symbol.upper())
+        price_data = await get_price(symbol.upper())
         if price_data.get("status") == "success":
             current_price = price_data.get("price", 0.0)
             indicators = {
@@ -1208,23 +1244,8 @@ def get_auto_trading_status():
         except Exception as e:
             print(f"[INFO] Could not get trades: {e}")
         
-        # Get real positions from futures engine
-        open_positions = []
-        try:
-            if futures_engine:
-                positions = futures_engine.get_positions()
-                open_positions = []
-                if positions:
-                    for pos in positions:
-                        if isinstance(pos, dict):
-                            size = float(pos.get("positionAmt", 0))
-                            if abs(size) > 0:
-                                open_positions.append(pos)
-                        elif hasattr(pos, 'size'):
-                            if abs(float(pos.size)) > 0:
-                                open_positions.append(pos)
-        except Exception as e:
-            print(f"[INFO] Could not get positions: {e}")
+        # Open positions across all engines, from the portfolio ledger's running aggregates
+        portfolio = portfolio_ledger.snapshot()["total"]
         
         # Calculate real P&L
         total_pnl = 0.0
@@ -1238,14 +1259,15 @@ def get_auto_trading_status():
             "balance": current_balance,
             "active_trades": active_trades,
             "active_trades_count": len(active_trades),
-            "open_positions": len(open_positions),
+            "open_positions": portfolio["positions"],
             "total_profit": total_pnl,
+            "portfolio": portfolio,
             "signals_processed": auto_trading_status.get("signals_processed", 0),
             "last_updated": datetime.now().isoformat(),
             "real_data_sources": {
                 "balance_from_file": os.path.exists("data/virtual_balance.json"),
                 "trades_from_db": len(active_trades) > 0,
-                "positions_from_engine": len(open_positions) > 0
+                "positions_from_engine": portfolio["positions"] > 0
             }
         })
         
@@ -1416,15 +1438,9 @@ async def get_portfolio():
                 balance_data = json.load(f)
                 current_balance = balance_data.get("balance", current_balance)
         
-        # Get real positions from futures trading engine
-        futures_positions = []
-        if futures_engine:
-            try:
-                account_info = futures_engine.get_account_info()
-                futures_positions = account_info.get("positions", []) if account_info else []
-                print(f"[INFO] Retrieved {len(futures_positions)} positions from futures engine")
-            except Exception as e:
-                print(f"[WARNING] Could not get futures positions: {e}")
+        # Open exposure and PnL of every engine from the portfolio ledger (running aggregates)
+        portfolio = portfolio_ledger.snapshot()
+        open_positions = portfolio_ledger.get_positions()
         
         # Get real trades from database
         trades = []
@@ -1434,53 +1450,37 @@ async def get_portfolio():
         except Exception as e:
             print(f"[WARNING] Could not get trades: {e}")
         
-        # Calculate portfolio metrics from real data
-        total_value = current_balance
-        open_positions = []
-        if futures_positions:
-            for pos in futures_positions:
-                # Handle position as dict
-                if isinstance(pos, dict):
-                    size = float(pos.get("positionAmt", 0))
-                    if abs(size) > 0:
-                        open_positions.append(pos)
-                else:
-                    # Handle position as object
-                    if hasattr(pos, 'size') and abs(pos.size) > 0:
-                        open_positions.append(pos)
-        
-        # Calculate real unrealized P&L
-        futures_pnl = sum([
-            float(pos.get("unrealizedPnl", 0)) if isinstance(pos, dict) 
-            else (pos.unrealized_pnl if hasattr(pos, 'unrealized_pnl') else 0.0)
-            for pos in open_positions
-        ]) if open_positions else 0.0
+        futures_pnl = portfolio["total"]["unrealized_pnl"]
         
         return {
             "status": "success",
             "spot": current_balance,
             "futures": futures_pnl,
             "margin": current_balance * 0.1,  # 10% margin requirement
-            "total_value": total_value + futures_pnl,
+            "total_value": current_balance + futures_pnl,
+            "exposure": portfolio["total"],
+            "engines": portfolio["sources"],
             "positions": [
                 {
-                    "symbol": pos.get("symbol") if isinstance(pos, dict) else (pos.symbol if hasattr(pos, 'symbol') else "UNKNOWN"),
-                    "side": pos.get("positionSide") if isinstance(pos, dict) else (pos.side.value if hasattr(pos, 'side') and hasattr(pos.side, 'value') else str(pos.side) if hasattr(pos, 'side') else "UNKNOWN"),
-                    "size": float(pos.get("positionAmt", 0)) if isinstance(pos, dict) else (pos.size if hasattr(pos, 'size') else 0.0),
-                    "entry_price": float(pos.get("entryPrice", 0)) if isinstance(pos, dict) else (pos.entry_price if hasattr(pos, 'entry_price') else 0.0),
-                    "mark_price": float(pos.get("markPrice", 0)) if isinstance(pos, dict) else (pos.mark_price if hasattr(pos, 'mark_price') else 0.0),
-                    "unrealized_pnl": float(pos.get("unrealizedPnl", 0)) if isinstance(pos, dict) else (pos.unrealized_pnl if hasattr(pos, 'unrealized_pnl') else 0.0),
-                    "percentage": float(pos.get("percentage", 0)) if isinstance(pos, dict) else (pos.percentage if hasattr(pos, 'percentage') else 0.0)
+                    "symbol": pos["symbol"],
+                    "side": "LONG" if pos["quantity"] > 0 else "SHORT",
+                    "size": pos["quantity"],
+                    "entry_price": pos["entry_price"],
+                    "mark_price": pos["mark_price"],
+                    "unrealized_pnl": pos["unrealized_pnl"],
+                    "percentage": pos["unrealized_pnl"] / (abs(pos["quantity"]) * pos["entry_price"]) * 100
+                    if pos["entry_price"] else 0.0,
+                    "engine": pos["source"],
+                    "account": pos["account"]
                 } for pos in open_positions
-            ] if open_positions else [],
+            ],
             "trades_count": len(trades),
             "last_updated": datetime.now().isoformat(),
             "data_sources": {
                 "balance_source": "auto_trading_balance + file_storage",
-                "positions_source": "futures_trading_engine",
+                "positions_source": "portfolio_ledger",
                 "trades_source": "database",
-                "futures_positions_count": len(futures_positions),
-                "open_positions_count": len(open_positions)
+                "open_positions_count": portfolio["total"]["positions"]
             }
         }
     except Exception as e:
@@ -1490,6 +1490,14 @@ async def get_portfolio():
             "message": f"Could not retrieve portfolio data: {str(e)}",
             "timestamp": datetime.now().isoformat()
         }
+
+@app.get("/portfolio/exposure")
+def get_portfolio_exposure():
+    """Open exposure and PnL totals for the whole portfolio, per engine and per symbol"""
+    try:
+        return {"status": "success", **portfolio_ledger.snapshot()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 # =============================================================================
 # NOTE: REMOVED DUPLICATE BINANCE FUTURES-STYLE TRADING ENDPOINTS SECTION
 # Complete implementations are preserved in the later sections (starting around line 3580)
@@ -1504,29 +1512,33 @@ async def get_portfolio():
 
 # Account Information
 @app.get("/fapi/v2/account")
-def get_binance_account():
+def get_binance_account(account: str = Query(DEFAULT_ACCOUNT)):
     """Get Binance futures account information - EXACT API"""
     try:
-        account_data = binance_futures_engine.get_account()
+        account_data = binance_futures_engine.get_account(account)
+        if "code" in account_data:
+            return account_data
         return {"status": "success", "account": account_data}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/fapi/v2/balance")
-def get_binance_balance():
+def get_binance_balance(account: str = Query(DEFAULT_ACCOUNT)):
     """Get Binance futures balance - EXACT API"""
     try:
-        account_data = binance_futures_engine.get_account()
+        account_data = binance_futures_engine.get_account(account)
+        if "code" in account_data:
+            return account_data
         return account_data.get("assets", [])
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 # Position Information
 @app.get("/fapi/v2/positionRisk")
-def get_binance_position_risk(symbol: Optional[str] = Query(None)):
+def get_binance_position_risk(symbol: Optional[str] = Query(None), account: str = Query(DEFAULT_ACCOUNT)):
     """Get position information - EXACT Binance API"""
     try:
-        return binance_futures_engine.get_position_risk()
+        return binance_futures_engine.get_position_risk(symbol, account)
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
@@ -1542,7 +1554,10 @@ def new_binance_order(
     positionSide: Optional[str] = "BOTH",
     stopPrice: Optional[str] = None,
     closePosition: Optional[bool] = False,
-    workingType: Optional[str] = "CONTRACT_PRICE"
+    workingType: Optional[str] = "CONTRACT_PRICE",
+    activationPrice: Optional[str] = None,
+    callbackRate: Optional[str] = None,
+    account: str = DEFAULT_ACCOUNT
 ):
     """Place new order - EXACT Binance API"""
     try:
@@ -1565,56 +1580,91 @@ def new_binance_order(
             reduce_only=bool(reduceOnly) if reduceOnly is not None else False,
             close_position=bool(closePosition) if closePosition is not None else False,
             stop_price=stopPrice,
-            working_type=working_type_enum
+            working_type=working_type_enum,
+            activation_price=activationPrice,
+            callback_rate=callbackRate,
+            account=account
         )
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @app.get("/fapi/v1/openOrders")
-def get_binance_open_orders(symbol: Optional[str] = Query(None)):
+def get_binance_open_orders(symbol: Optional[str] = Query(None), account: str = Query(DEFAULT_ACCOUNT)):
     """Get open orders - EXACT Binance API"""
     try:
-        # Get open orders from binance futures engine
-        orders = []
-        for order in binance_futures_engine.orders.values():
-            if order.status in [OrderStatus.NEW, OrderStatus.PARTIALLY_FILLED]:
-                if symbol is None or order.symbol == symbol:
-                    orders.append(order.model_dump())
-        return orders
+        return binance_futures_engine.get_open_orders(symbol, account)
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @app.delete("/fapi/v1/order")
-def cancel_binance_order(symbol: str, orderId: Optional[int] = None, origClientOrderId: Optional[str] = None):
+def cancel_binance_order(symbol: str, orderId: Optional[int] = None, origClientOrderId: Optional[str] = None,
+                         account: str = DEFAULT_ACCOUNT):
     """Cancel order - EXACT Binance API"""
     try:
         # Cancel order using binance futures engine
         if orderId:
-            if orderId in binance_futures_engine.orders:
-                order = binance_futures_engine.orders[orderId]
-                order.status = OrderStatus.CANCELED
-                order.updateTime = int(datetime.now().timestamp() * 1000)
-                return order.model_dump()
+            return binance_futures_engine.cancel_order(symbol, orderId, account)
         return {"code": -2011, "msg": "Unknown order sent."}
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
+def _json_list(value: Optional[str]) -> Any:
+    """Binance sends list parameters (batchOrders, orderIdList) as JSON strings"""
+    try:
+        return json.loads(value) if value else None
+    except ValueError:
+        return None
+
+@app.post("/fapi/v1/batchOrders")
+def new_binance_batch_orders(batchOrders: Optional[str] = None, account: str = DEFAULT_ACCOUNT, bulk: bool = False,
+                             orders: Optional[List[Dict[str, Any]]] = Body(None)):
+    """Place multiple orders - EXACT Binance API (max 5; bulk=true raises the limit for simulations)"""
+    try:
+        batch = orders if orders is not None else _json_list(batchOrders)
+        return binance_futures_engine.new_batch_orders(batch, account, bulk)
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@app.delete("/fapi/v1/batchOrders")
+def cancel_binance_batch_orders(symbol: str, orderIdList: Optional[str] = None, account: str = DEFAULT_ACCOUNT):
+    """Cancel multiple orders - EXACT Binance API (max 10)"""
+    try:
+        return binance_futures_engine.cancel_batch_orders(symbol, _json_list(orderIdList), account)
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@app.delete("/fapi/v1/allOpenOrders")
+def cancel_all_binance_open_orders(symbol: str, account: str = DEFAULT_ACCOUNT):
+    """Cancel all open orders of a symbol - EXACT Binance API"""
+    try:
+        return binance_futures_engine.cancel_all_open_orders(symbol, account)
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@app.post("/fapi/v1/countdownCancelAll")
+def binance_countdown_cancel_all(symbol: str, countdownTime: int, account: str = DEFAULT_ACCOUNT):
+    """Auto-cancel all open orders after countdownTime ms unless refreshed (0 cancels the timer) - EXACT Binance API"""
+    try:
+        return binance_futures_engine.countdown_cancel_all(symbol, countdownTime, account)
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
 # Leverage and Margin
 @app.post("/fapi/v1/leverage")
-def change_binance_leverage(symbol: str, leverage: int):
+def change_binance_leverage(symbol: str, leverage: int, account: str = DEFAULT_ACCOUNT):
     """Change leverage - EXACT Binance API"""
     try:
         # Change leverage using binance futures engine
-        return binance_futures_engine.change_leverage(symbol, leverage)
+        return binance_futures_engine.change_leverage(symbol, leverage, account)
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @app.post("/fapi/v1/marginType")
-def change_binance_margin_type(symbol: str, marginType: str):
+def change_binance_margin_type(symbol: str, marginType: str, account: str = DEFAULT_ACCOUNT):
     """Change margin type - EXACT Binance API"""
     try:
         # Change margin type using binance futures engine
-        return binance_futures_engine.change_margin_type(symbol, marginType)
+        return binance_futures_engine.change_margin_type(symbol, marginType, account)
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
@@ -1694,6 +1744,91 @@ def get_24hr_ticker(symbol: Optional[str] = Query(None)):
             }
         return {"_source": "real_binance_api_error", "_error": str(e), "data": []}
 
+@app.get("/fapi/v1/fundingRate")
+def get_funding_rate_history(symbol: Optional[str] = Query(None), startTime: Optional[int] = Query(None),
+                             endTime: Optional[int] = Query(None), limit: int = Query(100)):
+    """Funding rate history of the simulated perpetuals - EXACT Binance API"""
+    try:
+        return funding_scheduler.get_funding_rate_history(symbol, startTime, endTime, limit)
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@app.get("/futures/funding")
+def get_funding_status(limit: int = Query(50)):
+    """Funding scheduler status and the most recent settlements"""
+    try:
+        return {
+            "status": "success",
+            "funding": funding_scheduler.get_status(),
+            "ledger": funding_scheduler.get_ledger(limit)
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+# Sub-accounts: one id addresses an account in both simulated futures engines
+# (pass ?account=<id> to the /fapi routes)
+@app.get("/futures/accounts")
+def list_futures_accounts():
+    """Sub-accounts of both futures engines"""
+    try:
+        return {
+            "status": "success",
+            "futures": futures_engine.list_accounts(),
+            "binance_futures": binance_futures_engine.list_accounts()
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.post("/futures/accounts")
+def create_futures_account(account: str, balance: float = 10000.0):
+    """Open a sub-account (strategy, user or test run) with ``balance`` USDT in both futures engines"""
+    try:
+        futures_result = futures_engine.create_account(account, balance)
+        binance_result = binance_futures_engine.create_account(account, balance)
+        created = futures_result["status"] == "success" or "code" not in binance_result
+        return {
+            "status": "success" if created else "error",
+            "futures": futures_result,
+            "binance_futures": binance_result
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.delete("/futures/accounts")
+def delete_futures_account(account: str):
+    """Remove a sub-account from both futures engines (it must have no open positions or orders)"""
+    try:
+        if futures_engine.account_in_use(account) or binance_futures_engine.account_in_use(account):
+            return {"status": "error", "message": f"Account has open positions or orders: {account}"}
+        futures_result = futures_engine.delete_account(account)
+        binance_result = binance_futures_engine.delete_account(account)
+        deleted = futures_result["status"] == "success" or binance_result.get("code") == 200
+        return {
+            "status": "success" if deleted else "error",
+            "futures": futures_result,
+            "binance_futures": binance_result
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@app.get("/futures/accounts/{account}")
+def get_futures_account(account: str):
+    """One sub-account: balances and open positions in both futures engines"""
+    try:
+        if account not in futures_engine.accounts and account not in binance_futures_engine.accounts:
+            return {"status": "error", "message": f"Unknown account: {account}"}
+        result = {"status": "success", "account": account}
+        if account in futures_engine.accounts:
+            result["futures"] = {
+                "account_info": futures_engine.get_account_info(account),
+                "positions": futures_engine.get_positions(account)
+            }
+        if account in binance_futures_engine.accounts:
+            result["binance_futures"] = binance_futures_engine.get_account(account)
+        return result
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 @app.get("/fapi/v1/exchangeInfo")
 def get_exchange_info():
     """Get exchange information - EXACT Binance API"""
@@ -1764,7 +1899,7 @@ def execute_binance_auto_signal(signal_data: dict = Body(...)):
         
         # Get leverage setting (default 10x)
         
-        leverage = binance_futures_engine.leverage_settings.get(symbol, 10)
+        leverage = binance_futures_engine.get_leverage(symbol, default=10)
         
         # Calculate quantity based on confidence and available balance
         account = binance_futures_engine.get_account()
@@ -2005,106 +2140,6 @@ async def check_auto_alerts():
 
 # --- Enhanced Data Collection Endpoints ---
 
-@app.get("/hft/status")
-def get_hft_status():
-    """Get comprehensive HFT analysis status"""
-    try:
-        # Get real-time order book data for analysis
-        current_symbols_data = {}
-        for symbol in hft_config["symbols"]:
-            try:
-                price_data = get_price(symbol)
-                if price_data["status"] == "success":
-                    current_symbols_data[symbol] = {
-                        "price": price_data["price"],
-                        "last_updated": datetime.now().isoformat()
-                    }
-            except:
-                pass
-        
-        # Calculate real uptime
-        uptime_seconds = 0
-        if hft_status["enabled"] and hft_status["start_time"]:
-            uptime_seconds = (datetime.now() - datetime.fromisoformat(hft_status["start_time"])).total_seconds()
-        
-        # Update status with real data
-        status_data = {
-            **hft_status,
-            "config": hft_config,
-            "symbols_monitored": len(current_symbols_data),
-            "current_prices": current_symbols_data,
-            "uptime_seconds": int(uptime_seconds),
-            "analysis_frequency": f"{1000/hft_config['interval_ms']:.1f} Hz" if hft_config['interval_ms'] > 0 else "0 Hz"
-        }
-        
-        return {"status": "success", "hft_status": status_data}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
-@app.post("/hft/start")
-def start_hft_analysis():
-    """Start HFT analysis with real-time monitoring"""
-    try:
-        global hft_status
-        
-        if hft_status["enabled"]:
-            return {
-                "status": "info",
-                "message": "HFT analysis is already running",
-                "enabled": True
-            }
-        
-        # Initialize HFT analysis
-        hft_status["enabled"] = True
-        hft_status["current_orders"] = 0
-        hft_status["total_analyzed"] = 0
-        hft_status["last_analysis"] = datetime.now().isoformat()
-        hft_status["start_time"] = datetime.now().isoformat()  # Track real start time
-        hft_status["error_count"] = 0
-        
-        # Clear previous analytics data
-        hft_analytics_data["timestamps"].clear()
-        hft_analytics_data["prices"].clear()
-        hft_analytics_data["volumes"].clear()
-        hft_analytics_data["opportunities"].clear()
-        
-        # Start monitoring symbols
-        monitored_symbols = []
-        for symbol in hft_config["symbols"]:
-            try:
-                price_data = get_price(symbol)
-                if price_data["status"] == "success":
-                    monitored_symbols.append(symbol)
-                    # Add initial data point
-                    current_time = datetime.now().isoformat()
-                    hft_analytics_data["timestamps"].append(current_time)
-                    hft_analytics_data["prices"].append(price_data["price"])
-                    # Get real volume data from 24hr ticker if available
-                    try:
-                        ticker_data = get_24hr_ticker(symbol)
-                        if isinstance(ticker_data, dict) and "volume" in ticker_data:
-                            volume = float(ticker_data["volume"])
-                        else:
-                            volume = 0.0  # No volume data available
-                    except:
-                        volume = 0.0  # Failed to get real volume data
-                    hft_analytics_data["volumes"].append(volume)
-            except Exception as e:
-                print(f"Error starting HFT monitoring for {symbol}: {e}")
-        
-        result = {
-            "message": f"HFT analysis started successfully",
-            "enabled": True,
-            "monitored_symbols": monitored_symbols,
-            "analysis_frequency": f"{1000/hft_config['interval_ms']:.1f} Hz",
-            "started_at": hft_status["last_analysis"]
-        }
-        
-        return {"status": "success", "result": result}
-    except Exception as e:
-        hft_status["error_count"] += 1
-        return {"status": "error", "message": str(e)}
-
 @app.post("/hft/stop")
 def stop_hft_analysis():
     """Stop HFT analysis and save session data"""
@@ -2186,100 +2221,6 @@ def save_hft_config(config: dict = Body(...)):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
-@app.get("/hft/analytics")
-def get_hft_analytics():
-    """Get comprehensive HFT analysis data for visualization using real market data"""
-    try:
-        # Update analytics with fresh data if HFT is running
-        if hft_status["enabled"]:
-            # Add new data points for active symbols using real market data
-            current_time = datetime.now().isoformat()
-            
-            for symbol in hft_config["symbols"]:
-                try:
-                    # Get real price data
-                    price_data = get_price(symbol)
-                    if price_data["status"] == "success":
-                        current_price = price_data["price"]
-                        hft_analytics_data["timestamps"].append(current_time)
-                        hft_analytics_data["prices"].append(current_price)
-                        
-                        # Get real volume data if available
-                        try:
-                            if REAL_DATA_COLLECTION_AVAILABLE and get_volume_data is not None:
-                                volume_data = get_volume_data(symbol)
-                                if volume_data and len(volume_data) > 0:
-                                    latest_volume = volume_data[-1].get("volume", 0.0)
-                                    hft_analytics_data["volumes"].append(float(latest_volume))
-                                else:
-                                    hft_analytics_data["volumes"].append(0.0)
-                            else:
-                                hft_analytics_data["volumes"].append(0.0)
-                        except Exception as e:
-                            print(f"[WARNING] Could not get real volume for {symbol}: {e}")
-                            hft_analytics_data["volumes"].append(0.0)
-                        
-                        # Real opportunity detection based on price movements
-                        # Check for significant price movements (potential opportunities)
-                        if len(hft_analytics_data["prices"]) >= 2:
-                            price_change = abs(current_price - hft_analytics_data["prices"][-2]) / hft_analytics_data["prices"][-2]
-                            
-                            # Real opportunity if price change exceeds threshold
-                            if price_change > hft_config.get("threshold_percent", 0.01) / 100:
-                                # Calculate real profit potential based on price movement
-                                profit_potential = min(price_change * 2, 0.1)  # Cap at 10%
-                                confidence = min(price_change * 10, 0.95)  # Scale confidence with price movement
-                                
-                                # Determine opportunity type based on market behavior
-                                opportunity_type = "momentum" if price_change > 0.005 else "mean_reversion"
-                                
-                                opportunity = {
-                                    "time": current_time,
-                                    "symbol": symbol,
-                                    "profit_potential": profit_potential,
-                                    "confidence": confidence,
-                                    "type": opportunity_type,
-                                    "price_change": price_change,
-                                    "current_price": current_price
-                                }
-                                hft_analytics_data["opportunities"].append(opportunity)
-                                hft_status["opportunities_found"] += 1
-                        
-                        hft_status["total_analyzed"] += 1
-                except Exception as e:
-                    print(f"[WARNING] HFT analysis error for {symbol}: {e}")
-                    hft_status["error_count"] += 1
-        
-        # Limit data size (keep last 1000 points)
-        max_points = 1000
-        for key in ["timestamps", "prices", "volumes"]:
-            if len(hft_analytics_data[key]) > max_points:
-                hft_analytics_data[key] = hft_analytics_data[key][-max_points:]
-        
-        # Limit opportunities (keep last 50)
-        if len(hft_analytics_data["opportunities"]) > 50:
-            hft_analytics_data["opportunities"] = hft_analytics_data["opportunities"][-50:]
-        
-        # Calculate analytics summary
-        analytics_summary = {
-            "total_data_points": len(hft_analytics_data["timestamps"]),
-            "opportunities_count": len(hft_analytics_data["opportunities"]),
-            "avg_profit_potential": sum(op.get("profit_potential", 0) for op in hft_analytics_data["opportunities"]) / max(len(hft_analytics_data["opportunities"]), 1),
-            "last_update": datetime.now().isoformat(),
-            "monitoring_status": "active" if hft_status["enabled"] else "stopped"
-        }
-        
-        analytics_response = {
-            **hft_analytics_data,
-            "summary": analytics_summary,
-            "config": hft_config,
-            "status": hft_status
-        }
-        
-        return {"status": "success", "analytics": analytics_response}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
 @app.get("/hft/opportunities")
 def get_hft_opportunities():
     """Get current HFT trading opportunities"""
@@ -2419,88 +2360,6 @@ def get_performance_metrics(timeframe: str = "1d"):
 
 # --- Advanced Risk Management Endpoints ---
 
-@app.get("/risk/portfolio_metrics")
-def get_portfolio_risk_metrics():
-    """Get comprehensive portfolio-level risk metrics"""
-    try:
-        # Calculate current portfolio metrics
-        current_balance = load_virtual_balance()
-        pnl_data = calculate_current_pnl()
-        
-        # Get open positions from auto trading and futures
-        open_positions = []
-        
-        # Add auto trading positions
-        for trade in auto_trading_trades:
-            if trade["status"] == "executed":
-                open_positions.append({
-                    "symbol": trade["symbol"],
-                    "amount": trade["amount"],
-                    "entry_price": trade.get("entry_price", trade["price"]),
-                    "current_price": trade.get("current_price", trade["price"]),
-                    "unrealized_pnl": trade.get("unrealized_pnl", 0)
-                })
-        
-        # Add futures positions
-        try:
-            futures_positions = binance_futures_engine.get_position_risk()
-            for pos in futures_positions:
-                if float(pos["positionAmt"]) != 0:
-                    open_positions.append({
-                        "symbol": pos["symbol"],
-                        "amount": abs(float(pos["positionAmt"]) * float(pos["markPrice"])),
-                        "entry_price": float(pos["entryPrice"]),
-                        "current_price": float(pos["markPrice"]),
-                        "unrealized_pnl": float(pos["unRealizedProfit"])
-                    })
-        except:
-            pass  # Ignore if futures positions are not available
-        
-        # Calculate risk metrics
-        total_exposure = sum(abs(pos["amount"]) for pos in open_positions)
-        portfolio_value = float(pnl_data.get("current_balance", current_balance))
-        
-        # Risk calculations
-        portfolio_risk_percent = (total_exposure / portfolio_value * 100) if portfolio_value > 0 else 0
-        max_single_position = max([abs(pos["amount"]) for pos in open_positions], default=0)
-        position_concentration = (max_single_position / portfolio_value * 100) if portfolio_value > 0 else 0
-        
-        # Drawdown calculation
-        initial_balance = float(pnl_data.get("initial_balance", 10000.0))
-        current_drawdown = ((initial_balance - portfolio_value) / initial_balance * 100) if initial_balance > 0 else 0
-        max_drawdown_threshold = risk_settings.get("max_drawdown", 10.0)
-        
-        # Value at Risk (VaR) estimation - simplified
-        unrealized_pnl_values = [float(pos["unrealized_pnl"]) for pos in open_positions if pos["unrealized_pnl"]]
-        var_95 = np.percentile(unrealized_pnl_values, 5) if unrealized_pnl_values else 0
-        
-        risk_metrics = {
-            "portfolio_value": portfolio_value,
-            "total_exposure": total_exposure,
-            "portfolio_risk_percent": portfolio_risk_percent,
-            "position_concentration": position_concentration,
-            "current_drawdown": current_drawdown,
-            "max_drawdown_threshold": max_drawdown_threshold,
-            "drawdown_remaining": max(0, max_drawdown_threshold - current_drawdown),
-            "var_95": var_95,
-            "open_positions_count": len(open_positions),
-            "risk_score": min(100, portfolio_risk_percent + position_concentration + abs(current_drawdown)),
-            "can_trade": current_drawdown < max_drawdown_threshold,
-            "risk_warnings": []
-        }
-        
-        # Risk warnings
-        if current_drawdown > max_drawdown_threshold * 0.8:
-            risk_metrics["risk_warnings"].append("Approaching maximum drawdown limit")
-        if portfolio_risk_percent > 80:
-            risk_metrics["risk_warnings"].append("High portfolio exposure")
-        if position_concentration > 50:
-            risk_metrics["risk_warnings"].append("High position concentration risk")
-        
-        return {"status": "success", "risk_metrics": risk_metrics}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-
 @app.post("/risk/calculate_position_size")
 def calculate_dynamic_position_size(data: dict = Body(...)):
     """Calculate optimal position size based on risk parameters"""
@@ -2569,7 +2428,7 @@ def check_trade_risk(data: dict = Body(...)):
         current_balance = load_virtual_balance()
         pnl_data = calculate_current_pnl()
         # Get current risk metrics
-        risk_response = get_portfolio_risk_metrics()
+        risk_response = portfolio_risk_metrics()
         if risk_response["status"] != "success":
             return {"status": "error", "message": "Failed to get portfolio risk metrics"}
         risk_metrics = risk_response.get("risk_metrics", {})
@@ -3029,6 +2888,8 @@ REAL_DATA_COLLECTION_AVAILABLE = True
 get_volume_data = lambda symbol: []  # Fallback function
 
 from routes.system_routes import get_price  # Fix import error
+from order_book import order_book_manager
+from ws_codec import MessageCodec, DeltaEncoder, negotiate_codec
 
 # =============================================================================
 # CRITICAL MISSING ENDPOINTS - ADDED BY COMPREHENSIVE FIX
@@ -3204,21 +3065,36 @@ import json
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.codecs: Dict[WebSocket, MessageCodec] = {}
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        # Per-connection encoding negotiated via ?encoding=json|msgpack|struct
+        self.codecs[websocket] = negotiate_codec(websocket)
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        self.codecs.pop(websocket, None)
+    
+    def codec(self, websocket: WebSocket) -> MessageCodec:
+        return self.codecs.setdefault(websocket, MessageCodec())
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
     
-    async def broadcast(self, message: str):
+    async def send_data(self, message: dict, websocket: WebSocket):
+        """Send a dict using the connection's negotiated encoding"""
+        await self.codec(websocket).send(websocket, message)
+    
+    async def broadcast(self, message):
         for connection in self.active_connections:
             try:
-                await connection.send_text(message)
+                if isinstance(message, dict):
+                    await self.send_data(message, connection)
+                else:
+                    await connection.send_text(message)
             except:
                 pass
 
@@ -3231,13 +3107,9 @@ async def websocket_price_feed(websocket: WebSocket):
     try:
         while True:
             # Simulate real-time price data
-            price_data = {
-                "symbol": "BTCUSDT",
-                "price": 45000.0,
-                "change": 0.5,
-                "timestamp": datetime.now().isoformat()
-            }
-            await manager.send_personal_message(json.dumps(price_data), websocket)
+            await manager.codec(websocket).send_price_tick(
+                websocket, "BTCUSDT", 45000.0, time.time(), change=0.5
+            )
             await asyncio.sleep(1)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -3254,7 +3126,7 @@ async def websocket_trade_signals(websocket: WebSocket):
                 "confidence": 0.85,
                 "timestamp": datetime.now().isoformat()
             }
-            await manager.send_personal_message(json.dumps(signal_data), websocket)
+            await manager.send_data(signal_data, websocket)
             await asyncio.sleep(5)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -3270,11 +3142,55 @@ async def websocket_notifications(websocket: WebSocket):
                 "message": "System update",
                 "timestamp": datetime.now().isoformat()
             }
-            await manager.send_personal_message(json.dumps(notification), websocket)
+            await manager.send_data(notification, websocket)
             await asyncio.sleep(10)
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+WS_HEARTBEAT_SECONDS = 30.0
+
+async def stream_state_deltas(websocket: WebSocket, delta_encoder: DeltaEncoder, get_state, interval: float):
+    """
+    Poll ``get_state`` every ``interval`` seconds and send the encoder's snapshot/deltas.
+    While nothing changes a heartbeat is sent every WS_HEARTBEAT_SECONDS so dead clients
+    surface as send errors; the connection is always released from the manager.
+    """
+    await manager.connect(websocket)
+    last_sent = time.monotonic()
+    try:
+        while True:
+            message = delta_encoder.encode(get_state())
+            if message is None and time.monotonic() - last_sent >= WS_HEARTBEAT_SECONDS:
+                message = {"type": "heartbeat", "stream": delta_encoder.stream, "seq": delta_encoder.seq,
+                           "timestamp": time.time()}
+            if message is not None:
+                await manager.send_data(message, websocket)
+                last_sent = time.monotonic()
+            await asyncio.sleep(max(interval, 0.1))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket)
+
+@app.websocket("/websocket/positions")
+async def websocket_positions(websocket: WebSocket, interval: float = 1.0):
+    """WebSocket stream of open futures positions: full snapshot on subscribe, then changed fields only"""
+    def positions():
+        return {pos["id"]: pos for pos in futures_engine.get_positions()} if futures_engine else {}
+    
+    await stream_state_deltas(websocket, DeltaEncoder("positions"), positions, interval)
+
+@app.websocket("/websocket/portfolio")
+async def websocket_portfolio(websocket: WebSocket, interval: float = 1.0):
+    """WebSocket stream of account/portfolio totals: full snapshot on subscribe, then changed fields only"""
+    def portfolio():
+        return {
+            "balance": auto_trading_balance.get("balance", 0.0),
+            "futures_account": futures_engine.get_account_info() if futures_engine else {}
+        }
+    
+    await stream_state_deltas(websocket, DeltaEncoder("portfolio"), portfolio, interval)
+
 # Callback endpoints for dashboard interactions
 @app.post("/api/callbacks/button_click")
 async def handle_button_click_callback(data: dict = Body(...)):
@@ -3355,12 +3271,13 @@ async def get_realtime_prices():
         return {"status": "error", "message": str(e)}
 
 @app.get("/api/realtime/orderbook")
-async def get_realtime_orderbook():
-    """Get real-time orderbook data - DATA FLOW FIX"""
+async def get_realtime_orderbook(symbol: str = "BTCUSDT", depth: int = 10):
+    """Get real-time orderbook data from the locally maintained L2 book (snapshot + diff stream)"""
     try:
+        book = await order_book_manager.ensure_synced(symbol)
         orderbook = {
-            "bids": [{"price": 44990, "quantity": 0.5}, {"price": 44980, "quantity": 1.0}],
-            "asks": [{"price": 45010, "quantity": 0.3}, {"price": 45020, "quantity": 0.8}],
+            **book.to_dict(depth),
+            "metrics": book.get_metrics(depth),
             "timestamp": datetime.now().isoformat()
         }
         return {"status": "success", "orderbook": orderbook}
@@ -11,6 +11,12 @@ MODEL_PATH = os.path.join(os.path.dirname(__file__), "kaia_rf_model.joblib")
 _model = None
 _model_lock = threading.Lock()
 
+# Column order the model was trained on
+FEATURE_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume', 'rsi', 'stoch_k', 'stoch_d', 'williams_r', 'roc', 'ao',
+    'macd', 'macd_signal', 'macd_diff', 'adx', 'cci', 'sma_20', 'ema_20', 'bb_high', 'bb_low', 'atr', 'obv', 'cmf'
+]
+
 def load_model():
     global _model
     if _model is None:
@@ -27,22 +33,51 @@ def load_model():
                     _model = None
     return _model
 
-def real_predict(row):
+def _row_count(X):
+    return max((len(values) for values in X.values()), default=0) if isinstance(X, dict) else len(X)
+
+def feature_matrix(X):
+    """
+    N x 23 float32 matrix in FEATURE_COLUMNS order from an array, a list of rows (feature lists or
+    feature dicts) or columns ({feature: N values}, e.g. one value per symbol; missing features are 0)
+    """
+    if isinstance(X, dict):
+        matrix = np.zeros((_row_count(X), len(FEATURE_COLUMNS)), dtype=np.float32)
+        for i, col in enumerate(FEATURE_COLUMNS):
+            if col in X:
+                matrix[:, i] = X[col]
+        return matrix
+    if len(X) and isinstance(X[0], dict):
+        return np.array([[row.get(col, 0) for col in FEATURE_COLUMNS] for row in X], dtype=np.float32)
+    matrix = np.asarray(X, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[1] != len(FEATURE_COLUMNS):
+        raise ValueError(f"Expected an N x {len(FEATURE_COLUMNS)} feature matrix, got shape {matrix.shape}")
+    return matrix
+
+def predict_batch(X):
+    """
+    Score many rows with one predict_proba call; labels come from the probabilities rather than a
+    second predict pass. Returns [("LONG"/"SHORT", probability of LONG), ...] in row order.
+    """
     mdl = load_model()
     if mdl is None:
-        return "NO_MODEL", 0.0
-    feature_cols = [
-        'open', 'high', 'low', 'close', 'volume', 'rsi', 'stoch_k', 'stoch_d', 'williams_r', 'roc', 'ao',
-        'macd', 'macd_signal', 'macd_diff', 'adx', 'cci', 'sma_20', 'ema_20', 'bb_high', 'bb_low', 'atr', 'obv', 'cmf'
-    ]
+        return [("NO_MODEL", 0.0)] * _row_count(X)
     try:
-        X = np.array([[row.get(col, 0) for col in feature_cols]])
-        pred = mdl.predict(X)[0]
-        prob = mdl.predict_proba(X)[0][1] if hasattr(mdl, 'predict_proba') else 0.0
-        return ("LONG" if pred else "SHORT"), float(prob)
+        matrix = feature_matrix(X)
+        if not len(matrix):
+            return []
+        if not hasattr(mdl, 'predict_proba'):
+            return [("LONG" if pred else "SHORT", 0.0) for pred in mdl.predict(matrix)]
+        proba = mdl.predict_proba(matrix)
+        labels = mdl.classes_[np.argmax(proba, axis=1)]
+        long_proba = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+        return [("LONG" if label else "SHORT", float(prob)) for label, prob in zip(labels, long_proba)]
     except Exception as e:
         print(f"[ML ERROR] Prediction failed: {e}")
-        return "ERROR", 0.0
+        return [("ERROR", 0.0)] * _row_count(X)
+
+def real_predict(row):
+    return predict_batch([row])[0]
 
 def get_model_performance_metrics(realtime=False):
     """Get real model performance metrics based on actual predictions and outcomes"""
@@ -0,0 +1,353 @@
+"""
+Local L2 Order Book
+Per-symbol order books kept in sync from a Binance REST depth snapshot plus
+incremental depth-diff stream updates, with sequence-gap detection and resync
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Any, Tuple
+
+import httpx
+import websockets
+
+logger = logging.getLogger(__name__)
+
+BINANCE_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+BINANCE_DEPTH_STREAM_URL = "wss://stream.binance.com:9443/ws/{symbol}@depth@100ms"
+
+
+class OrderBookSide:
+    """
+    One side of the book as parallel sorted arrays (keys, quantities).
+    Bids are stored with negated prices so index 0 is always the best level
+    on both sides; updates are a bisect plus list insert/delete.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self._keys: List[float] = []
+        self._qtys: List[float] = []
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def clear(self):
+        self._keys.clear()
+        self._qtys.clear()
+
+    def update(self, price: float, qty: float):
+        """Set the quantity at a price level; a zero quantity removes the level"""
+        key = self._key(price)
+        i = bisect.bisect_left(self._keys, key)
+        exists = i < len(self._keys) and self._keys[i] == key
+
+        if qty == 0.0:
+            if exists:
+                del self._keys[i]
+                del self._qtys[i]
+        elif exists:
+            self._qtys[i] = qty
+        else:
+            self._keys.insert(i, key)
+            self._qtys.insert(i, qty)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        return self._key(self._keys[0]), self._qtys[0]
+
+    def top(self, n: int) -> List[Tuple[float, float]]:
+        return [(self._key(k), q) for k, q in zip(self._keys[:n], self._qtys[:n])]
+
+    def depth(self, n: int) -> float:
+        """Total quantity over the best n levels"""
+        return sum(self._qtys[:n])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class LocalOrderBook:
+    """
+    L2 book for one symbol following Binance's snapshot + diff rules:
+    - diffs received before the snapshot are buffered
+    - diffs with final update id ``u`` <= snapshot ``lastUpdateId`` are dropped
+    - the first applied diff must straddle ``lastUpdateId + 1``
+    - every later diff must start at the previous ``u + 1``, otherwise the book is out of sync
+    """
+
+    def __init__(self, symbol: str, max_buffer: int = 1000):
+        self.symbol = symbol.upper()
+        self.bids = OrderBookSide(is_bid=True)
+        self.asks = OrderBookSide(is_bid=False)
+        self.last_update_id = 0
+        self.synced = False
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._first_applied = False
+        self.updated_at = 0.0
+
+        self.stats = {
+            "snapshots": 0,
+            "diffs_applied": 0,
+            "diffs_dropped": 0,
+            "gaps": 0
+        }
+
+    def apply_snapshot(self, snapshot: Dict[str, Any]):
+        """Load a REST depth snapshot and replay any buffered diffs on top of it"""
+        self.bids.clear()
+        self.asks.clear()
+        for price, qty in snapshot.get("bids", []):
+            self.bids.update(float(price), float(qty))
+        for price, qty in snapshot.get("asks", []):
+            self.asks.update(float(price), float(qty))
+
+        self.last_update_id = int(snapshot["lastUpdateId"])
+        self.synced = True
+        self._first_applied = False
+        self.updated_at = time.time()
+        self.stats["snapshots"] += 1
+
+        buffered, self._buffer = self._buffer, []
+        for i, event in enumerate(buffered):
+            if self.apply_diff(event) == "gap":
+                # apply_diff re-buffered the gap event; keep the later ones for the next snapshot too
+                self._buffer.extend(buffered[i + 1:])
+                del self._buffer[:-self.max_buffer]
+                break
+
+    def apply_diff(self, event: Dict[str, Any]) -> str:
+        """
+        Apply a depth-diff event (``U``, ``u``, ``b``, ``a``).
+        Returns "applied", "dropped", "buffered" or "gap" (book needs a new snapshot).
+        """
+        if not self.synced:
+            if len(self._buffer) >= self.max_buffer:
+                self._buffer.pop(0)
+            self._buffer.append(event)
+            return "buffered"
+
+        first_id, final_id = int(event["U"]), int(event["u"])
+
+        if final_id <= self.last_update_id:
+            self.stats["diffs_dropped"] += 1
+            return "dropped"
+
+        if self._first_applied:
+            in_sequence = first_id == self.last_update_id + 1
+        else:
+            in_sequence = first_id <= self.last_update_id + 1 <= final_id
+
+        if not in_sequence:
+            self.stats["gaps"] += 1
+            logger.warning(f"Order book gap for {self.symbol}: expected {self.last_update_id + 1}, got U={first_id}")
+            self.invalidate()
+            self._buffer.append(event)
+            return "gap"
+
+        for price, qty in event.get("b", []):
+            self.bids.update(float(price), float(qty))
+        for price, qty in event.get("a", []):
+            self.asks.update(float(price), float(qty))
+
+        self.last_update_id = final_id
+        self._first_applied = True
+        self.updated_at = time.time()
+        self.stats["diffs_applied"] += 1
+        return "applied"
+
+    def invalidate(self):
+        """Mark the book out of sync; further diffs are buffered until the next snapshot"""
+        self.synced = False
+        self._first_applied = False
+
+    # --- Derived metrics ---
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def microprice(self) -> Optional[float]:
+        """Top-of-book price weighted towards the side with less resting size"""
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        total = bid[1] + ask[1]
+        if total == 0:
+            return (bid[0] + ask[0]) / 2
+        return (bid[0] * ask[1] + ask[0] * bid[1]) / total
+
+    def imbalance(self, levels: int = 10) -> Optional[float]:
+        """Depth imbalance over the top levels in [-1, 1]; positive means more bid size"""
+        bid_depth, ask_depth = self.bids.depth(levels), self.asks.depth(levels)
+        total = bid_depth + ask_depth
+        if total == 0:
+            return None
+        return (bid_depth - ask_depth) / total
+
+    def get_metrics(self, levels: int = 10) -> Dict[str, Any]:
+        mid = self.mid_price()
+        spread = self.spread()
+        return {
+            "symbol": self.symbol,
+            "synced": self.synced,
+            "last_update_id": self.last_update_id,
+            "best_bid": self.bids.best()[0] if len(self.bids) else None,
+            "best_ask": self.asks.best()[0] if len(self.asks) else None,
+            "spread": spread,
+            "spread_bps": (spread / mid * 10000) if spread is not None and mid else None,
+            "mid_price": mid,
+            "microprice": self.microprice(),
+            "imbalance": self.imbalance(levels),
+            "bid_depth": self.bids.depth(levels),
+            "ask_depth": self.asks.depth(levels),
+            "updated_at": self.updated_at
+        }
+
+    def to_dict(self, depth: int = 10) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "bids": [{"price": p, "quantity": q} for p, q in self.bids.top(depth)],
+            "asks": [{"price": p, "quantity": q} for p, q in self.asks.top(depth)],
+            "last_update_id": self.last_update_id,
+            "synced": self.synced
+        }
+
+
+class OrderBookManager:
+    """
+    Keeps a LocalOrderBook per subscribed symbol: one depth-diff websocket stream
+    per symbol feeds the book, and a REST snapshot is (re)fetched on start and on every gap.
+    """
+
+    def __init__(self, snapshot_limit: int = 1000, timeout: float = 10.0):
+        self.snapshot_limit = snapshot_limit
+        self.timeout = timeout
+        self.books: Dict[str, LocalOrderBook] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resyncing: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_book(self, symbol: str) -> Optional[LocalOrderBook]:
+        return self.books.get(symbol.upper())
+
+    def subscribe(self, symbol: str) -> LocalOrderBook:
+        """Start maintaining a book for a symbol (idempotent, needs a running event loop)"""
+        symbol = symbol.upper()
+        book = self.books.setdefault(symbol, LocalOrderBook(symbol))
+        task = self._tasks.get(symbol)
+        if task is None or task.done():
+            self._tasks[symbol] = asyncio.ensure_future(self._stream_loop(book))
+        return book
+
+    async def unsubscribe(self, symbol: str):
+        symbol = symbol.upper()
+        task = self._tasks.pop(symbol, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.books.pop(symbol, None)
+
+    async def ensure_synced(self, symbol: str) -> LocalOrderBook:
+        """Subscribe if needed and make sure the book has a snapshot"""
+        book = self.subscribe(symbol)
+        if not book.synced:
+            await self.resync(book)
+        return book
+
+    async def resync(self, book: LocalOrderBook):
+        """Fetch a fresh REST snapshot for a book; concurrent resyncs share one request"""
+        pending = self._resyncing.get(book.symbol)
+        if pending is None or pending.done():
+            pending = asyncio.ensure_future(self._load_snapshot(book))
+            self._resyncing[book.symbol] = pending
+        await asyncio.shield(pending)
+
+    async def _load_snapshot(self, book: LocalOrderBook, max_attempts: int = 3):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+        for attempt in range(max_attempts):
+            response = await self._client.get(
+                BINANCE_DEPTH_URL, params={"symbol": book.symbol, "limit": self.snapshot_limit}
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"Binance depth API error {response.status_code} for {book.symbol}")
+            book.apply_snapshot(response.json())
+            # Buffered diffs may still not line up with a snapshot that is too old; retry
+            if book.synced:
+                logger.info(f"Order book snapshot loaded for {book.symbol} (lastUpdateId={book.last_update_id})")
+                return
+        raise RuntimeError(f"Could not sync order book for {book.symbol} after {max_attempts} snapshots")
+
+    def _schedule_resync(self, book: LocalOrderBook) -> asyncio.Future:
+        task = asyncio.ensure_future(self.resync(book))
+        task.add_done_callback(
+            lambda t: t.cancelled() or t.exception() is None
+            or logger.warning(f"Order book resync failed for {book.symbol}: {t.exception()}")
+        )
+        return task
+
+    async def _stream_loop(self, book: LocalOrderBook):
+        url = BINANCE_DEPTH_STREAM_URL.format(symbol=book.symbol.lower())
+        while True:
+            try:
+                async with websockets.connect(url) as stream:
+                    book.invalidate()  # diffs buffer until the snapshot arrives
+                    snapshot_task = self._schedule_resync(book)
+                    async for message in stream:
+                        if book.apply_diff(json.loads(message)) == "gap":
+                            snapshot_task = self._schedule_resync(book)
+                    snapshot_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Order book stream error for {book.symbol}: {e}")
+                book.invalidate()
+            await asyncio.sleep(1)
+
+    def get_all_metrics(self, levels: int = 10) -> Dict[str, Dict[str, Any]]:
+        return {symbol: book.get_metrics(levels) for symbol, book in self.books.items() if book.synced}
+
+
+def replay_fixture(path: str) -> LocalOrderBook:
+    """
+    Rebuild a book offline from a recorded fixture:
+    {"symbol", "snapshot", "events": [...], "resync_snapshot" (optional, used after a gap)}
+    """
+    with open(path, "r") as f:
+        fixture = json.load(f)
+
+    book = LocalOrderBook(fixture["symbol"])
+    events = fixture.get("events", [])
+
+    # Events recorded before the snapshot arrived are buffered, like on a live stream
+    pre_snapshot = fixture.get("events_before_snapshot", 0)
+    for event in events[:pre_snapshot]:
+        book.apply_diff(event)
+    book.apply_snapshot(fixture["snapshot"])
+
+    for event in events[pre_snapshot:]:
+        if book.apply_diff(event) == "gap" and "resync_snapshot" in fixture:
+            book.apply_snapshot(fixture["resync_snapshot"])
+    return book
+
+
+# Global order book manager
+order_book_manager = OrderBookManager()
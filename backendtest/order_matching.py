@@ -0,0 +1,246 @@
+"""
+Order Matching
+Simulated matching for resting futures orders: per-symbol limit books with price-time
+priority and trigger books (STOP / TAKE_PROFIT / TRAILING_STOP_MARKET) kept in heaps,
+so a price update only touches orders whose level was actually crossed.
+Cancelled orders are invalidated lazily (skipped when they reach the top of a heap).
+"""
+
+import heapq
+import itertools
+import math
+from typing import Dict, List, Optional, Tuple
+
+WORKING_TYPES = ("CONTRACT_PRICE", "MARK_PRICE")
+
+
+class TriggerSet:
+    """Stop levels of one working type: ``rise`` fires when price >= level, ``fall`` when price <= level"""
+
+    def __init__(self):
+        self.rise: List[Tuple[float, int, int]] = []
+        self.fall: List[Tuple[float, int, int]] = []
+        # Trailing stops: SELL tracks the peak and fires at peak * (1 - rate); BUY tracks the trough
+        self.peaks: List[Tuple[float, int, int]] = []  # (peak, token, id) min-heap
+        self.sell_levels: List[Tuple[float, int, int]] = []  # (-level, token, id)
+        self.troughs: List[Tuple[float, int, int]] = []  # (-trough, token, id)
+        self.buy_levels: List[Tuple[float, int, int]] = []  # (level, token, id)
+
+    def size(self) -> int:
+        return len(self.rise) + len(self.fall) + len(self.peaks) + len(self.sell_levels) + \
+            len(self.troughs) + len(self.buy_levels)
+
+
+class SymbolOrderBook:
+    """Resting orders of one symbol"""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: List[Tuple[float, int, int]] = []  # (-price, token, id): best price, then earliest
+        self.asks: List[Tuple[float, int, int]] = []  # (price, token, id)
+        self.triggers = {working_type: TriggerSet() for working_type in WORKING_TYPES}
+        self.live: Dict[int, int] = {}  # order id -> token of its current heap entry
+        self.trailing: Dict[int, List] = {}  # order id -> [is_buy, rate, extreme]
+        self.activations: Dict[int, Tuple[bool, float]] = {}  # trailing orders awaiting activation price
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def _valid(self, token: int, order_id: int) -> bool:
+        return self.live.get(order_id) == token
+
+    def heap_size(self) -> int:
+        return len(self.bids) + len(self.asks) + sum(t.size() for t in self.triggers.values())
+
+    def rebuild(self):
+        """Drop invalidated entries once they dominate the heaps"""
+        def live_entries(heap):
+            kept = [entry for entry in heap if self._valid(entry[1], entry[2])]
+            heapq.heapify(kept)
+            return kept
+
+        self.bids = live_entries(self.bids)
+        self.asks = live_entries(self.asks)
+        for t in self.triggers.values():
+            t.rise, t.fall = live_entries(t.rise), live_entries(t.fall)
+            t.peaks, t.sell_levels = live_entries(t.peaks), live_entries(t.sell_levels)
+            t.troughs, t.buy_levels = live_entries(t.troughs), live_entries(t.buy_levels)
+
+
+class OrderMatcher:
+    """
+    Resting limit and trigger orders for all symbols, keyed by order id.
+    ``match`` returns the events caused by a price update; the owning engine executes fills
+    and decides what a triggered order becomes (market fill or resting limit).
+    """
+
+    def __init__(self):
+        self.books: Dict[str, SymbolOrderBook] = {}
+        self.symbols: Dict[int, str] = {}  # order id -> symbol
+        self._tokens = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self.symbols
+
+    def _book(self, symbol: str, order_id: int) -> Tuple[SymbolOrderBook, int]:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = SymbolOrderBook(symbol)
+        token = next(self._tokens)
+        book.live[order_id] = token
+        self.symbols[order_id] = symbol
+        return book, token
+
+    def add_limit(self, symbol: str, order_id: int, is_buy: bool, price: float):
+        book, token = self._book(symbol, order_id)
+        if is_buy:
+            heapq.heappush(book.bids, (-price, token, order_id))
+        else:
+            heapq.heappush(book.asks, (price, token, order_id))
+
+    def add_trigger(self, symbol: str, order_id: int, rises: bool, stop_price: float,
+                    working_type: str = "CONTRACT_PRICE"):
+        book, token = self._book(symbol, order_id)
+        triggers = book.triggers[working_type]
+        if rises:
+            heapq.heappush(triggers.rise, (stop_price, token, order_id))
+        else:
+            heapq.heappush(triggers.fall, (-stop_price, token, order_id))
+
+    def add_trailing(self, symbol: str, order_id: int, is_buy: bool, callback_rate: float,
+                     price: Optional[float], activation_price: Optional[float] = None,
+                     working_type: str = "CONTRACT_PRICE"):
+        """
+        ``callback_rate`` in percent; tracking starts at ``price``, or once ``activation_price``
+        trades (at the first price update when neither is known)
+        """
+        rate = callback_rate / 100
+        if not activation_price and price is None:
+            activation_price = math.inf if is_buy else 0.0
+        if activation_price is not None:
+            # SELL activates when price reaches the activation price from below, BUY from above
+            self.add_trigger(symbol, order_id, not is_buy, activation_price, working_type)
+            self.books[symbol].activations[order_id] = (is_buy, rate)
+        else:
+            book, _ = self._book(symbol, order_id)
+            self._track(book, book.triggers[working_type], order_id, is_buy, rate, price)
+
+    def _track(self, book: SymbolOrderBook, triggers: TriggerSet, order_id: int,
+               is_buy: bool, rate: float, extreme: float):
+        token = next(self._tokens)
+        book.live[order_id] = token
+        book.trailing[order_id] = [is_buy, rate, extreme]
+        if is_buy:
+            heapq.heappush(triggers.troughs, (-extreme, token, order_id))
+            heapq.heappush(triggers.buy_levels, (extreme * (1 + rate), token, order_id))
+        else:
+            heapq.heappush(triggers.peaks, (extreme, token, order_id))
+            heapq.heappush(triggers.sell_levels, (-extreme * (1 - rate), token, order_id))
+
+    def cancel(self, order_id: int) -> bool:
+        symbol = self.symbols.pop(order_id, None)
+        if symbol is None:
+            return False
+        book = self.books[symbol]
+        book.live.pop(order_id, None)
+        book.trailing.pop(order_id, None)
+        book.activations.pop(order_id, None)
+        if book.heap_size() > 4 * len(book.live) + 64:
+            book.rebuild()
+        return True
+
+    def trigger_price(self, order_id: int) -> Optional[float]:
+        """Current stop level of a trailing order (None if not tracking yet)"""
+        symbol = self.symbols.get(order_id)
+        state = self.books[symbol].trailing.get(order_id) if symbol else None
+        if state is None:
+            return None
+        is_buy, rate, extreme = state
+        return extreme * (1 + rate) if is_buy else extreme * (1 - rate)
+
+    def match(self, symbol: str, price: float, mark_price: Optional[float] = None) -> Tuple[List[int], List[Tuple[int, float]]]:
+        """
+        Apply a trade price (and mark price) to a symbol's books.
+        Returns (triggered order ids, [(limit order id, fill price)]) in priority order;
+        both leave the matcher.
+        """
+        book = self.books.get(symbol)
+        if book is None or not book.live:
+            return [], []
+        triggered: List[int] = []
+        for working_type, reference in (("CONTRACT_PRICE", price), ("MARK_PRICE", mark_price or price)):
+            self._match_triggers(book, book.triggers[working_type], reference, triggered)
+        if book.trailing and book.heap_size() > 4 * len(book.live) + 64:
+            book.rebuild()  # trailing stops leave a stale entry each time their extreme moves
+        return triggered, self.match_limits(symbol, price)
+
+    def match_limits(self, symbol: str, price: float) -> List[Tuple[int, float]]:
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+        fills = []
+        bids, asks = book.bids, book.asks
+        while bids and -bids[0][0] >= price:
+            limit, token, order_id = heapq.heappop(bids)
+            if book._valid(token, order_id):
+                self._done(book, order_id)
+                fills.append((order_id, -limit))
+        while asks and asks[0][0] <= price:
+            limit, token, order_id = heapq.heappop(asks)
+            if book._valid(token, order_id):
+                self._done(book, order_id)
+                fills.append((order_id, limit))
+        return fills
+
+    def _match_triggers(self, book: SymbolOrderBook, triggers: TriggerSet, price: float, triggered: List[int]):
+        activated = []
+        while triggers.rise and triggers.rise[0][0] <= price:
+            _, token, order_id = heapq.heappop(triggers.rise)
+            if book._valid(token, order_id):
+                (activated if order_id in book.activations else triggered).append(order_id)
+        while triggers.fall and -triggers.fall[0][0] >= price:
+            _, token, order_id = heapq.heappop(triggers.fall)
+            if book._valid(token, order_id):
+                (activated if order_id in book.activations else triggered).append(order_id)
+        for order_id in activated:
+            is_buy, rate = book.activations.pop(order_id)
+            self._track(book, triggers, order_id, is_buy, rate, price)
+
+        # Trailing SELL: raise peaks below the price (only those move), then fire levels >= price
+        while triggers.peaks and triggers.peaks[0][0] < price:
+            _, token, order_id = heapq.heappop(triggers.peaks)
+            if book._valid(token, order_id):
+                is_buy, rate, _ = book.trailing[order_id]
+                self._track(book, triggers, order_id, is_buy, rate, price)
+        while triggers.sell_levels and -triggers.sell_levels[0][0] >= price:
+            _, token, order_id = heapq.heappop(triggers.sell_levels)
+            if book._valid(token, order_id):
+                triggered.append(order_id)
+        # Trailing BUY: mirror image on troughs
+        while triggers.troughs and -triggers.troughs[0][0] > price:
+            _, token, order_id = heapq.heappop(triggers.troughs)
+            if book._valid(token, order_id):
+                is_buy, rate, _ = book.trailing[order_id]
+                self._track(book, triggers, order_id, is_buy, rate, price)
+        while triggers.buy_levels and triggers.buy_levels[0][0] <= price:
+            _, token, order_id = heapq.heappop(triggers.buy_levels)
+            if book._valid(token, order_id):
+                triggered.append(order_id)
+
+        for order_id in triggered:
+            if order_id in book.live:
+                self._done(book, order_id)
+
+    def _done(self, book: SymbolOrderBook, order_id: int):
+        book.live.pop(order_id, None)
+        book.trailing.pop(order_id, None)
+        self.symbols.pop(order_id, None)
+
+    def get_status(self) -> Dict[str, Dict[str, int]]:
+        return {
+            symbol: {"resting": len(book), "heap_entries": book.heap_size()}
+            for symbol, book in self.books.items() if len(book)
+        }
@@ -0,0 +1,246 @@
+"""
+Portfolio Ledger
+One store of open exposure for every trading engine (futures, Binance futures, advanced auto trading,
+manual/auto trades). Engines publish position changes, marks and realized PnL through a
+``LedgerSource`` handle; positions live in one shared column table and exposure / PnL aggregates are
+kept per (source, symbol) as running sums (price * net quantity - net cost, as in the position book),
+so a mark or fill costs O(1) and portfolio reads never rescan the engines.
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+from accounts import DEFAULT_ACCOUNT, AccountTable
+
+POSITION_COLUMNS = {"source": "", "position_id": "", "symbol": "", "account": DEFAULT_ACCOUNT,
+                    "quantity": 0.0, "entry_price": 0.0}
+
+
+class ExposureTotals:
+    """Aggregates of one source, one symbol or the whole portfolio"""
+
+    __slots__ = ("positions", "gross_exposure", "net_exposure", "unrealized_pnl", "realized_pnl")
+
+    def __init__(self):
+        self.positions = 0
+        self.gross_exposure = 0.0  # sum of |quantity| * mark
+        self.net_exposure = 0.0  # sum of quantity * mark (longs positive)
+        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0.0  # booked since the ledger started
+
+    def apply(self, positions: int, gross: float, net: float, unrealized: float):
+        self.positions += positions
+        if self.positions:
+            self.gross_exposure += gross
+            self.net_exposure += net
+            self.unrealized_pnl += unrealized
+        else:
+            # Flat: drop accumulated float drift
+            self.gross_exposure = self.net_exposure = self.unrealized_pnl = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "positions": self.positions,
+            "gross_exposure": self.gross_exposure,
+            "net_exposure": self.net_exposure,
+            "unrealized_pnl": self.unrealized_pnl,
+            "realized_pnl": self.realized_pnl,
+            "total_pnl": self.realized_pnl + self.unrealized_pnl
+        }
+
+
+class _SymbolBucket:
+    """Open positions of one source in one symbol, valued at that source's mark"""
+
+    __slots__ = ("positions", "net_quantity", "net_cost", "abs_quantity", "mark")
+
+    def __init__(self):
+        self.positions = 0
+        self.net_quantity = 0.0
+        self.net_cost = 0.0
+        self.abs_quantity = 0.0
+        self.mark = math.nan
+
+    def value(self) -> tuple:
+        """(gross exposure, net exposure, unrealized PnL) at the current mark"""
+        if not self.positions:
+            return 0.0, 0.0, 0.0
+        net = self.mark * self.net_quantity
+        return self.mark * self.abs_quantity, net, net - self.net_cost
+
+
+class LedgerSource:
+    """An engine's handle on the ledger; every call is O(1)"""
+
+    def __init__(self, ledger: "PortfolioLedger", name: str):
+        self.ledger = ledger
+        self.name = name
+
+    def set_position(self, position_id: str, symbol: str, quantity: float, entry_price: float,
+                     account: str = DEFAULT_ACCOUNT, mark_price: Optional[float] = None):
+        """Open or replace a position; ``quantity`` is signed (negative = short)"""
+        self.ledger.set_position(self.name, position_id, symbol, quantity, entry_price, account, mark_price)
+
+    def remove_position(self, position_id: str, realized_pnl: float = 0.0):
+        self.ledger.remove_position(self.name, position_id, realized_pnl)
+
+    def mark(self, symbol: str, price: float):
+        self.ledger.mark(self.name, symbol, price)
+
+    def realize(self, amount: float, symbol: Optional[str] = None):
+        """Book PnL that isn't tied to a closing position (funding, liquidation losses, fees)"""
+        self.ledger.realize(self.name, amount, symbol)
+
+    def reset(self):
+        self.ledger.reset_source(self.name)
+
+
+class PortfolioLedger:
+    """
+    ``source(name)`` returns the handle an engine publishes through (``attach_ledger`` on each engine).
+    ``snapshot()`` returns the aggregates as they stand; ``get_positions()`` lists open positions.
+    """
+
+    def __init__(self):
+        self.positions = AccountTable(POSITION_COLUMNS)  # row id "<source>/<position id>"
+        self.source_positions: Dict[str, Dict[str, None]] = {}  # source -> row ids (ordered)
+        self.buckets: Dict[tuple, _SymbolBucket] = {}  # (source, symbol) -> running sums
+        self.totals = ExposureTotals()
+        self.by_source: Dict[str, ExposureTotals] = {}
+        self.by_symbol: Dict[str, ExposureTotals] = {}
+        self.lock = threading.Lock()  # engines publish from the event loop and from worker threads
+
+    def source(self, name: str) -> LedgerSource:
+        with self.lock:
+            self.by_source.setdefault(name, ExposureTotals())
+        return LedgerSource(self, name)
+
+    # ------------------------------------------------------------------ updates
+
+    def _change(self, source: str, symbol: str, positions: int = 0, quantity: float = 0.0, cost: float = 0.0,
+                abs_quantity: float = 0.0, mark: Optional[float] = None):
+        """Apply a delta to one bucket and carry the change in its value into the three totals"""
+        key = (source, symbol)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if not positions:
+                return
+            bucket = self.buckets[key] = _SymbolBucket()
+        gross, net, unrealized = bucket.value()
+        bucket.positions += positions
+        bucket.net_quantity += quantity
+        bucket.net_cost += cost
+        bucket.abs_quantity += abs_quantity
+        if mark is not None:
+            bucket.mark = mark
+        new_gross, new_net, new_unrealized = bucket.value()
+        if not bucket.positions:
+            del self.buckets[key]
+        deltas = (positions, new_gross - gross, new_net - net, new_unrealized - unrealized)
+        self.totals.apply(*deltas)
+        self.by_source.setdefault(source, ExposureTotals()).apply(*deltas)
+        self.by_symbol.setdefault(symbol, ExposureTotals()).apply(*deltas)
+
+    def set_position(self, source: str, position_id: str, symbol: str, quantity: float, entry_price: float,
+                     account: str = DEFAULT_ACCOUNT, mark_price: Optional[float] = None):
+        row_id = f"{source}/{position_id}"
+        with self.lock:
+            if mark_price is None:
+                # Keep the source's mark for the symbol; until it has one, value at the entry price
+                bucket = self.buckets.get((source, symbol))
+                mark_price = entry_price if bucket is None or math.isnan(bucket.mark) else bucket.mark
+            if row_id in self.positions:
+                self._unbook(row_id)
+            else:
+                self.positions.add(row_id, source=source, position_id=position_id)
+                self.source_positions.setdefault(source, {})[row_id] = None
+            row = self.positions.row(row_id)
+            columns = self.positions.columns
+            columns["symbol"][row] = symbol
+            columns["account"][row] = account
+            columns["quantity"][row] = quantity
+            columns["entry_price"][row] = entry_price
+            self._change(source, symbol, 1, quantity, quantity * entry_price, abs(quantity), mark_price)
+
+    def _unbook(self, row_id: str):
+        row = self.positions.row(row_id)
+        columns = self.positions.columns
+        quantity = columns["quantity"][row]
+        self._change(columns["source"][row], columns["symbol"][row], -1, -quantity,
+                     -quantity * columns["entry_price"][row], -abs(quantity))
+
+    def remove_position(self, source: str, position_id: str, realized_pnl: float = 0.0):
+        row_id = f"{source}/{position_id}"
+        with self.lock:
+            if row_id not in self.positions:
+                return
+            symbol = self.positions.get(row_id, "symbol")
+            self._unbook(row_id)
+            self.positions.remove(row_id)
+            del self.source_positions[source][row_id]
+            self._realize(source, realized_pnl, symbol)
+
+    def mark(self, source: str, symbol: str, price: float):
+        with self.lock:
+            if (source, symbol) in self.buckets:
+                self._change(source, symbol, mark=price)
+
+    def realize(self, source: str, amount: float, symbol: Optional[str] = None):
+        with self.lock:
+            self._realize(source, amount, symbol)
+
+    def _realize(self, source: str, amount: float, symbol: Optional[str]):
+        if not amount:
+            return
+        self.totals.realized_pnl += amount
+        self.by_source.setdefault(source, ExposureTotals()).realized_pnl += amount
+        if symbol is not None:
+            self.by_symbol.setdefault(symbol, ExposureTotals()).realized_pnl += amount
+
+    def reset_source(self, source: str):
+        """Drop a source's open positions (before it republishes them); realized PnL is kept"""
+        with self.lock:
+            for row_id in list(self.source_positions.pop(source, {})):
+                self._unbook(row_id)
+                self.positions.remove(row_id)
+
+    # ------------------------------------------------------------------ reads
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Portfolio, per-engine and per-symbol aggregates (independent of the number of positions)"""
+        with self.lock:
+            return {
+                "total": self.totals.to_dict(),
+                "sources": {name: totals.to_dict() for name, totals in self.by_source.items()},
+                "symbols": {
+                    symbol: totals.to_dict() for symbol, totals in self.by_symbol.items()
+                    if totals.positions or totals.realized_pnl
+                }
+            }
+
+    def get_positions(self, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Open positions valued at their source's latest mark"""
+        with self.lock:
+            row_ids = self.source_positions.get(source, {}) if source is not None else self.positions.ids
+            positions = []
+            for row_id in row_ids:
+                position = self.positions.record(row_id)
+                bucket = self.buckets[(position["source"], position["symbol"])]
+                quantity = position["quantity"]
+                position["mark_price"] = bucket.mark
+                position["notional"] = abs(quantity) * bucket.mark
+                position["unrealized_pnl"] = (bucket.mark - position["entry_price"]) * quantity
+                positions.append(position)
+            return positions
+
+
+_ledger: Optional[PortfolioLedger] = None
+
+
+def get_portfolio_ledger() -> PortfolioLedger:
+    """Get or create the process-wide ledger (engines attach in main.py, routers read it here)"""
+    global _ledger
+    if _ledger is None:
+        _ledger = PortfolioLedger()
+    return _ledger
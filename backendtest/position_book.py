@@ -0,0 +1,299 @@
+"""
+Position Book
+Structure-of-arrays storage of open positions per symbol (entry, quantity, side sign,
+stop loss, take profit, liquidation price). Trigger levels are kept sorted per direction, so a
+price update bisects straight to the crossed ones, and unrealized PnL is a running sum
+(price * net quantity - net cost), so revaluing a symbol costs O(log n + triggered).
+"""
+
+import bisect
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EXIT_NONE = 0
+EXIT_LIQUIDATION = 1
+EXIT_STOP_LOSS = 2
+EXIT_TAKE_PROFIT = 3
+
+EXIT_REASONS = {
+    EXIT_LIQUIDATION: "liquidation",
+    EXIT_STOP_LOSS: "stop_loss",
+    EXIT_TAKE_PROFIT: "take_profit"
+}
+
+# "tag" is a caller-defined integer group (e.g. strategy variant) for per-group aggregation;
+# "funding" accumulates the funding each position has received (negative when it paid)
+_FIELDS = ("entry", "quantity", "sign", "stop_loss", "take_profit", "liquidation", "leverage", "tag",
+           "funding")
+
+# Level array per exit reason
+_LEVELS = {EXIT_LIQUIDATION: "liquidation", EXIT_STOP_LOSS: "stop_loss", EXIT_TAKE_PROFIT: "take_profit"}
+
+
+def _level(value: Optional[float]) -> float:
+    """Missing (None/0) trigger levels are stored as NaN and never indexed"""
+    return float(value) if value else math.nan
+
+
+class TriggerLevels:
+    """
+    Exit levels of one symbol in two sorted lists: ``falls`` fire once price <= level (long
+    liquidation / stop loss, short take profit), ``rises`` once price >= level (the mirror image)
+    """
+
+    def __init__(self):
+        self.fall_levels: List[float] = []
+        self.fall_items: List[Tuple[str, int]] = []  # (position id, exit reason), parallel to fall_levels
+        self.rise_levels: List[float] = []
+        self.rise_items: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.fall_levels) + len(self.rise_levels)
+
+    def _side(self, rises: bool) -> Tuple[List[float], List[Tuple[str, int]]]:
+        return (self.rise_levels, self.rise_items) if rises else (self.fall_levels, self.fall_items)
+
+    def add(self, position_id: str, reason: int, level: float, rises: bool):
+        levels, items = self._side(rises)
+        index = bisect.bisect_right(levels, level)
+        levels.insert(index, level)
+        items.insert(index, (position_id, reason))
+
+    def discard(self, position_id: str, reason: int, level: float, rises: bool):
+        levels, items = self._side(rises)
+        index = bisect.bisect_left(levels, level)
+        while index < len(levels) and levels[index] == level:
+            if items[index] == (position_id, reason):
+                del levels[index]
+                del items[index]
+                return
+            index += 1
+
+    def crossed(self, price: float) -> Dict[str, int]:
+        """position id -> most urgent crossed exit (liquidation > stop loss > take profit)"""
+        hits: Dict[str, int] = {}
+        start = bisect.bisect_left(self.fall_levels, price)
+        end = bisect.bisect_right(self.rise_levels, price)
+        for position_id, reason in self.fall_items[start:] + self.rise_items[:end]:
+            if reason < hits.get(position_id, EXIT_TAKE_PROFIT + 1):
+                hits[position_id] = reason
+        return hits
+
+
+class SymbolBook:
+    """Open positions of one symbol; rows are kept dense (removal swaps in the last row)"""
+
+    def __init__(self, symbol: str, capacity: int = 16):
+        self.symbol = symbol
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.last_price = math.nan
+        self.triggers = TriggerLevels()
+        # Running sums: unrealized PnL = last_price * net_quantity - net_cost
+        self.net_quantity = 0.0
+        self.net_cost = 0.0
+        for name in _FIELDS:
+            setattr(self, name, np.zeros(capacity))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def total_pnl(self) -> float:
+        if not self.ids or math.isnan(self.last_price):
+            return 0.0
+        return self.last_price * self.net_quantity - self.net_cost
+
+    def _grow(self):
+        capacity = max(16, len(self.entry) * 2)
+        for name in _FIELDS:
+            array = np.zeros(capacity)
+            array[:len(self.ids)] = getattr(self, name)[:len(self.ids)]
+            setattr(self, name, array)
+
+    def _index_levels(self, position_id: str, row: int, reasons=_LEVELS, add: bool = True):
+        is_long = self.sign[row] > 0
+        for reason in reasons:
+            level = getattr(self, _LEVELS[reason])[row]
+            if not math.isnan(level):
+                rises = (reason == EXIT_TAKE_PROFIT) == is_long
+                if add:
+                    self.triggers.add(position_id, reason, level, rises)
+                else:
+                    self.triggers.discard(position_id, reason, level, rises)
+
+    def add(self, position_id: str, entry: float, quantity: float, sign: int,
+            stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+            liquidation: Optional[float] = None, leverage: float = 1.0, tag: int = 0, funding: float = 0.0):
+        if position_id in self.rows:
+            self.remove(position_id)
+        if len(self.ids) == len(self.entry):
+            self._grow()
+        row = len(self.ids)
+        self.ids.append(position_id)
+        self.rows[position_id] = row
+        self.entry[row] = entry
+        self.quantity[row] = quantity
+        self.sign[row] = sign
+        self.stop_loss[row] = _level(stop_loss)
+        self.take_profit[row] = _level(take_profit)
+        self.liquidation[row] = _level(liquidation)
+        self.leverage[row] = leverage
+        self.tag[row] = tag
+        self.funding[row] = funding
+        self.net_quantity += sign * quantity
+        self.net_cost += sign * quantity * entry
+        self._index_levels(position_id, row)
+
+    def remove(self, position_id: str) -> bool:
+        row = self.rows.pop(position_id, None)
+        if row is None:
+            return False
+        self._index_levels(position_id, row, add=False)
+        signed_quantity = self.sign[row] * self.quantity[row]
+        self.net_quantity -= signed_quantity
+        self.net_cost -= signed_quantity * self.entry[row]
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+            for name in _FIELDS:
+                array = getattr(self, name)
+                array[row] = array[last]
+        self.ids.pop()
+        if not self.ids:
+            self.net_quantity = self.net_cost = 0.0  # drop accumulated rounding
+        return True
+
+    def set_levels(self, position_id: str, stop_loss: Optional[float] = None,
+                   take_profit: Optional[float] = None, liquidation: Optional[float] = None):
+        row = self.rows[position_id]
+        changed = {EXIT_STOP_LOSS: stop_loss, EXIT_TAKE_PROFIT: take_profit, EXIT_LIQUIDATION: liquidation}
+        changed = {reason: value for reason, value in changed.items() if value is not None}
+        self._index_levels(position_id, row, changed, add=False)
+        for reason, value in changed.items():
+            getattr(self, _LEVELS[reason])[row] = _level(value)
+        self._index_levels(position_id, row, changed)
+
+    def revalue(self, price: float) -> List[Tuple[str, int]]:
+        """Mark the book at ``price``; returns [(position id, exit reason)] whose levels were crossed"""
+        self.last_price = price
+        if not self.ids:
+            return []
+        return list(self.triggers.crossed(price).items())
+
+    def snapshot(self, position_id: str) -> Tuple[float, float, float]:
+        """(last price, pnl, pnl %) of one position at the last revaluation price"""
+        row = self.rows[position_id]
+        price = self.last_price
+        if math.isnan(price):
+            return price, 0.0, 0.0
+        move = (price - self.entry[row]) * self.sign[row]
+        return price, float(move * self.quantity[row]), float(move / self.entry[row] * 100 * self.leverage[row])
+
+    def apply_funding(self, rate: float, mark_price: float) -> np.ndarray:
+        """Settle one funding interval for every row (longs pay a positive rate); returns each row's receipt"""
+        n = len(self.ids)
+        payments = self.sign[:n] * self.quantity[:n] * (-mark_price * rate)
+        self.funding[:n] += payments
+        return payments
+
+    def pnl_by_tag(self, groups: int) -> np.ndarray:
+        n = len(self.ids)
+        if not n or math.isnan(self.last_price):
+            return np.zeros(groups)
+        pnl = (self.last_price - self.entry[:n]) * self.sign[:n] * self.quantity[:n]
+        return np.bincount(self.tag[:n].astype(np.intp), weights=pnl, minlength=groups)[:groups]
+
+
+class PositionBook:
+    """Per-symbol SymbolBooks plus an id -> symbol index and a running unrealized PnL total"""
+
+    def __init__(self):
+        self.books: Dict[str, SymbolBook] = {}
+        self.symbols: Dict[str, str] = {}
+        self._unrealized = 0.0
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self.symbols
+
+    def add(self, symbol: str, position_id: str, entry: float, quantity: float, sign: int,
+            stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+            liquidation: Optional[float] = None, leverage: float = 1.0, tag: int = 0, funding: float = 0.0):
+        previous = self.symbols.get(position_id)
+        if previous is not None and previous != symbol:
+            self.remove(position_id)
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = SymbolBook(symbol)
+        before = book.total_pnl
+        book.add(position_id, entry, quantity, sign, stop_loss, take_profit, liquidation, leverage, tag, funding)
+        self._unrealized += book.total_pnl - before
+        self.symbols[position_id] = symbol
+
+    def remove(self, position_id: str) -> bool:
+        symbol = self.symbols.pop(position_id, None)
+        if symbol is None:
+            return False
+        book = self.books[symbol]
+        before = book.total_pnl
+        book.remove(position_id)
+        self._unrealized += book.total_pnl - before
+        if not self.symbols:
+            self._unrealized = 0.0
+        return True
+
+    def set_levels(self, position_id: str, **levels):
+        self.books[self.symbols[position_id]].set_levels(position_id, **levels)
+
+    def revalue(self, symbol: str, price: float) -> List[Tuple[str, int]]:
+        """Revalue a symbol's positions; returns [(position_id, exit reason code)] to close"""
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+        before = book.total_pnl
+        exits = book.revalue(price)
+        self._unrealized += book.total_pnl - before
+        return exits
+
+    def snapshot(self, position_id: str) -> Optional[Tuple[float, float, float]]:
+        symbol = self.symbols.get(position_id)
+        if symbol is None:
+            return None
+        return self.books[symbol].snapshot(position_id)
+
+    def apply_funding(self, symbol: str, rate: float, mark_price: float) -> Tuple[List[str], np.ndarray]:
+        """Settle funding for all of a symbol's positions in one pass; returns (position ids, amounts received)"""
+        book = self.books.get(symbol)
+        if book is None or not len(book):
+            return [], np.zeros(0)
+        return list(book.ids), book.apply_funding(rate, mark_price)
+
+    def funding(self, position_id: str) -> float:
+        symbol = self.symbols.get(position_id)
+        if symbol is None:
+            return 0.0
+        book = self.books[symbol]
+        return float(book.funding[book.rows[position_id]])
+
+    def last_price(self, symbol: str) -> float:
+        book = self.books.get(symbol)
+        return book.last_price if book is not None else math.nan
+
+    def unrealized_total(self) -> float:
+        """Sum of PnL as of each symbol's last revaluation (running total, O(1))"""
+        return self._unrealized
+
+    def unrealized_by_tag(self, groups: int) -> np.ndarray:
+        """Unrealized PnL summed per tag (0..groups-1) across all symbols"""
+        total = np.zeros(groups)
+        for book in self.books.values():
+            if len(book):
+                total += book.pnl_by_tag(groups)
+        return total
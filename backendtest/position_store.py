@@ -0,0 +1,132 @@
+"""
+Position Store
+Open positions indexed by id and by symbol, an append-only ledger of closed trades,
+and running trade statistics updated in O(1) per open/close/revaluation
+"""
+
+from typing import Any, Dict, Iterator, List
+
+
+class TradeStats:
+    """Running aggregates over closed trades plus equity peak / drawdown tracking"""
+
+    __slots__ = ("starting_equity", "closed_count", "wins", "losses", "realized_pnl",
+                 "gross_profit", "gross_loss", "peak_equity", "max_drawdown", "max_drawdown_pct")
+
+    def __init__(self, starting_equity: float = 0.0):
+        self.starting_equity = starting_equity
+        self.closed_count = 0
+        self.wins = 0
+        self.losses = 0
+        self.realized_pnl = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.peak_equity = starting_equity
+        self.max_drawdown = 0.0  # absolute, in account currency
+        self.max_drawdown_pct = 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.closed_count if self.closed_count else 0.0
+
+    def record_close(self, pnl: float):
+        self.closed_count += 1
+        self.realized_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss += -pnl
+
+    def mark_equity(self, equity: float) -> float:
+        """Update peak and max drawdown for the current equity; returns the current drawdown %"""
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+            return 0.0
+        drawdown = self.peak_equity - equity
+        drawdown_pct = drawdown / self.peak_equity * 100 if self.peak_equity > 0 else 0.0
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        if drawdown_pct > self.max_drawdown_pct:
+            self.max_drawdown_pct = drawdown_pct
+        return drawdown_pct
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "closed_trades": self.closed_count,
+            "wins": self.wins,
+            "losses": self.losses,
+            "win_rate": self.win_rate,
+            "realized_pnl": self.realized_pnl,
+            "gross_profit": self.gross_profit,
+            "gross_loss": self.gross_loss,
+            "profit_factor": self.gross_profit / self.gross_loss if self.gross_loss else None,
+            "peak_equity": self.peak_equity,
+            "max_drawdown": self.max_drawdown,
+            "max_drawdown_pct": self.max_drawdown_pct
+        }
+
+
+class PositionStore:
+    """
+    Mapping of *open* positions (id -> position) with a per-symbol index.
+    Closing moves a position to the closed ledger and folds its PnL into ``stats``.
+    Positions only need ``id``, ``symbol``, ``size`` and ``pnl`` attributes.
+    """
+
+    def __init__(self, starting_equity: float = 0.0):
+        self.open: Dict[str, Any] = {}
+        self.by_symbol: Dict[str, Dict[str, Any]] = {}
+        self.closed: List[Any] = []
+        self.stats = TradeStats(starting_equity)
+        self.open_exposure = 0.0
+
+    # Mapping interface over open positions
+    def __len__(self) -> int:
+        return len(self.open)
+
+    def __contains__(self, position_id: str) -> bool:
+        return position_id in self.open
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.open)
+
+    def get(self, position_id: str, default=None):
+        return self.open.get(position_id, default)
+
+    def values(self):
+        return self.open.values()
+
+    def items(self):
+        return self.open.items()
+
+    def for_symbol(self, symbol: str) -> List[Any]:
+        return list(self.by_symbol.get(symbol, {}).values())
+
+    def add(self, position):
+        if position.id in self.open:
+            raise ValueError(f"Position {position.id} is already open")
+        self.open[position.id] = position
+        self.by_symbol.setdefault(position.symbol, {})[position.id] = position
+        self.open_exposure += position.size
+
+    def close(self, position_id: str):
+        """Move an open position to the ledger (its pnl must already be final); returns it or None"""
+        position = self.open.pop(position_id, None)
+        if position is None:
+            return None
+        symbol_positions = self.by_symbol.get(position.symbol)
+        if symbol_positions is not None:
+            symbol_positions.pop(position_id, None)
+            if not symbol_positions:
+                del self.by_symbol[position.symbol]
+        self.open_exposure -= position.size
+        if not self.open:
+            self.open_exposure = 0.0  # drop accumulated float error
+        self.closed.append(position)
+        self.stats.record_close(position.pnl)
+        return position
+
+    def recent_closed(self, limit: int = 100) -> List[Any]:
+        return self.closed[-limit:] if limit else list(self.closed)
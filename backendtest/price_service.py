@@ -0,0 +1,358 @@
+"""
+Async Price Service
+Coalesced (single-flight) price lookups with a short-TTL, stale-while-revalidate cache,
+backed by a bulk ticker table refreshed with one all-symbols upstream call
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+import httpx
+import numpy as np
+
+from tick_recorder import tick_recorder
+
+logger = logging.getLogger(__name__)
+
+BINANCE_TICKER_URL = "https://api.binance.com/api/v3/ticker/price"
+
+
+class TickerTable:
+    """
+    Array-backed table of all Binance spot prices.
+    One upstream call (``/api/v3/ticker/price`` without a symbol) refreshes every row;
+    a symbol -> row index maps lookups into the price array.
+    """
+
+    def __init__(self, refresh_interval: float = 1.0, timeout: float = 10.0):
+        self.refresh_interval = refresh_interval
+        self.max_age = refresh_interval * 2
+        self.timeout = timeout
+
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.prices = np.zeros(0, dtype=np.float64)
+        self.last_refresh = 0.0  # monotonic
+        self.last_refresh_time = 0.0  # wall clock, for API responses
+
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        # Called with the table after every refresh (e.g. to mark simulated engines to market)
+        self.listeners: List[Callable[["TickerTable"], None]] = []
+
+        self.stats = {
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "coalesced": 0,
+            "last_refresh_ms": 0.0
+        }
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last successful refresh (inf if never refreshed)"""
+        if not self.last_refresh:
+            return float("inf")
+        return time.monotonic() - self.last_refresh
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age <= self.max_age
+
+    @property
+    def is_running(self) -> bool:
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    def add_listener(self, listener: Callable[["TickerTable"], None]):
+        self.listeners.append(listener)
+
+    def start(self):
+        """Start the scheduled refresh loop (idempotent, needs a running event loop)"""
+        if not self.is_running:
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+            logger.info(f"Ticker table refresh started ({self.refresh_interval}s interval)")
+
+    async def stop(self):
+        """Stop the scheduled refresh loop and close the HTTP client"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Ticker table refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        """Refresh every row with one upstream call; concurrent callers share it"""
+        if self._inflight is not None and not self._inflight.done():
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight)
+
+        self._inflight = asyncio.ensure_future(self._fetch_all())
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch_all(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(BINANCE_TICKER_URL)
+            if response.status_code != 200:
+                raise RuntimeError(f"Binance API error {response.status_code}")
+            tickers = response.json()
+        except Exception:
+            self.stats["refresh_errors"] += 1
+            raise
+
+        self._load(tickers)
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _load(self, tickers: List[Dict[str, str]]):
+        """Write a ticker list into the table, rebuilding the index only if the symbol set changed"""
+        symbols = [t["symbol"] for t in tickers]
+        values = np.fromiter((float(t["price"]) for t in tickers), dtype=np.float64, count=len(tickers))
+
+        if symbols == self.symbols:
+            self.prices[:] = values
+        else:
+            self.symbols = symbols
+            self.index = {symbol: row for row, symbol in enumerate(symbols)}
+            self.prices = values
+
+        self.last_refresh = time.monotonic()
+        self.last_refresh_time = time.time()
+
+        if tick_recorder.enabled:
+            for symbol, price in self.get_prices(tick_recorder.symbols).items():
+                tick_recorder.record_price(symbol, price, ts=self.last_refresh_time)
+
+        for listener in self.listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"Ticker table listener failed: {e}")
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Price for one symbol if the table is fresh and has it"""
+        row = self.index.get(symbol.upper())
+        if row is None or not self.is_fresh:
+            return None
+        return float(self.prices[row])
+
+    def get_prices(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Prices for a subset of symbols (all symbols if None); unknown symbols are omitted"""
+        if symbols is None:
+            return dict(zip(self.symbols, self.prices.tolist()))
+        wanted = [s.upper() for s in symbols]
+        found = [s for s in wanted if s in self.index]
+        rows = [self.index[s] for s in found]
+        return dict(zip(found, self.prices[rows].tolist()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "symbols": len(self.symbols),
+            "age_seconds": round(self.age, 3) if self.last_refresh else None,
+            "running": self.is_running,
+            "refresh_interval": self.refresh_interval
+        }
+
+
+class PriceService:
+    """
+    Shared price lookup service:
+    - Concurrent callers for the same symbol share one in-flight upstream request
+    - Fresh entries (younger than ``ttl``) are served straight from cache
+    - Stale entries (younger than ``stale_ttl``) are served immediately while a
+      single background refresh revalidates them
+    - Anything older is fetched upstream (still coalesced)
+    While the bulk ticker table is running and fresh it answers lookups directly.
+    """
+
+    def __init__(self, ttl: float = 0.5, stale_ttl: float = 5.0,
+                 max_retries: int = 3, retry_delay: float = 0.5, timeout: float = 10.0,
+                 ticker_table: Optional[TickerTable] = None):
+        self.ticker_table = ticker_table
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+        self._cache: Dict[str, tuple] = {}  # symbol -> (price, fetched_at monotonic)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Upstream call timestamps for rate calculation (last 60s)
+        self._upstream_times: deque = deque()
+        self._rate_window = 60.0
+        self._started_at = time.time()
+
+        self.stats = {
+            "requests": 0,
+            "table_hits": 0,
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "upstream_errors": 0,
+            "background_refreshes": 0
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def get_price(self, symbol: str) -> float:
+        """Get the latest price for a symbol. Raises RuntimeError if no price is available."""
+        symbol = symbol.upper()
+        self.stats["requests"] += 1
+
+        if self.ticker_table is not None:
+            price = self.ticker_table.get_price(symbol)
+            if price is not None:
+                self.stats["table_hits"] += 1
+                return price
+
+        cached = self._cache.get(symbol)
+        if cached is not None:
+            price, fetched_at = cached
+            age = time.monotonic() - fetched_at
+            if age <= self.ttl:
+                self.stats["fresh_hits"] += 1
+                return price
+            if age <= self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if symbol not in self._inflight:
+                    self.stats["background_refreshes"] += 1
+                    self._fetch_shared(symbol)
+                return price
+
+        self.stats["misses"] += 1
+        # Shield so a cancelled caller does not cancel the fetch other callers share
+        return await asyncio.shield(self._fetch_shared(symbol))
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Get prices for several symbols concurrently; failed symbols are omitted"""
+        symbols = [s.upper() for s in symbols]
+        results = await asyncio.gather(*(self.get_price(s) for s in symbols), return_exceptions=True)
+        return {
+            symbol: result for symbol, result in zip(symbols, results)
+            if not isinstance(result, BaseException)
+        }
+
+    def update_price(self, symbol: str, price: float):
+        """Seed the cache from another feed (e.g. a bulk ticker refresh)"""
+        self._cache[symbol.upper()] = (float(price), time.monotonic())
+
+    def _fetch_shared(self, symbol: str) -> asyncio.Future:
+        """Return the in-flight upstream fetch for a symbol, starting one if needed"""
+        future = self._inflight.get(symbol)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return future
+
+        future = asyncio.ensure_future(self._fetch_upstream(symbol))
+        self._inflight[symbol] = future
+        future.add_done_callback(lambda f, s=symbol: self._on_fetch_done(s, f))
+        return future
+
+    def _on_fetch_done(self, symbol: str, future: asyncio.Future):
+        if self._inflight.get(symbol) is future:
+            del self._inflight[symbol]
+        # Retrieve the exception so background refreshes never log "never retrieved"
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Price refresh failed for {symbol}: {future.exception()}")
+
+    async def _fetch_upstream(self, symbol: str) -> float:
+        """Fetch a price from Binance with retry and backoff"""
+        retry_delay = self.retry_delay
+        last_error = "unknown error"
+
+        for attempt in range(self.max_retries):
+            self._record_upstream_call()
+            try:
+                response = await self._get_client().get(BINANCE_TICKER_URL, params={"symbol": symbol})
+
+                if response.status_code == 200:
+                    price = float(response.json()["price"])
+                    self._cache[symbol] = (price, time.monotonic())
+                    tick_recorder.record_price(symbol, price)
+                    return price
+                elif response.status_code == 429:
+                    logger.warning(f"Rate limited for {symbol}, retrying in {retry_delay}s")
+                    last_error = "rate limited"
+                else:
+                    logger.error(f"Binance API error for {symbol}: {response.status_code}")
+                    self.stats["upstream_errors"] += 1
+                    raise RuntimeError(f"Binance API error {response.status_code} for {symbol}")
+            except RuntimeError:
+                raise
+            except Exception as e:
+                logger.error(f"Error fetching price for {symbol}: {e}")
+                last_error = str(e)
+
+            self.stats["upstream_errors"] += 1
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2
+
+        raise RuntimeError(f"Failed to fetch price for {symbol}: {last_error}")
+
+    def _record_upstream_call(self):
+        now = time.monotonic()
+        self.stats["upstream_calls"] += 1
+        self._upstream_times.append(now)
+        self._trim_upstream_times(now)
+
+    def _trim_upstream_times(self, now: float):
+        cutoff = now - self._rate_window
+        while self._upstream_times and self._upstream_times[0] < cutoff:
+            self._upstream_times.popleft()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit ratio, upstream call rate and raw counters"""
+        self._trim_upstream_times(time.monotonic())
+        requests_total = self.stats["requests"]
+        hits = self.stats["table_hits"] + self.stats["fresh_hits"] + self.stats["stale_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / requests_total if requests_total else 0.0,
+            "upstream_calls_last_minute": len(self._upstream_times),
+            "upstream_calls_per_second": len(self._upstream_times) / self._rate_window,
+            "cached_symbols": len(self._cache),
+            "inflight": len(self._inflight),
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "uptime_seconds": int(time.time() - self._started_at),
+            "ticker_table": self.ticker_table.get_stats() if self.ticker_table is not None else None
+        }
+
+
+# Global instances
+ticker_table = TickerTable()
+price_service = PriceService(ticker_table=ticker_table)
@@ -21,6 +21,7 @@ from .spot_trading_routes import router as spot_trading_router
 from .market_data_routes import router as market_data_router
 from .auto_trading_routes import router as auto_trading_router
 from .simple_ml_routes import router as simple_ml_router
+from .replay_routes import router as replay_router
 
 __all__ = [
     "advanced_auto_trading_router",
@@ -38,6 +39,7 @@ __all__ = [
     "market_data_router", 
     "auto_trading_router",
     "simple_ml_router",
+    "replay_router",
     "set_engine_instance",
     "set_ml_dependencies",
     "set_notification_dependencies",
@@ -6,7 +6,7 @@ Handles all advanced auto trading endpoints
 import os
 import json
 from fastapi import APIRouter, Body
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Import the advanced auto trading engine
 try:
@@ -123,6 +123,7 @@ async def get_advanced_positions():
         if advanced_auto_trading_engine is None:
             return {"status": "error", "message": "Engine not available"}
         
+        advanced_auto_trading_engine.sync_positions()
         positions = []
         for position in advanced_auto_trading_engine.positions.values():
             positions.append({
@@ -148,6 +149,22 @@ async def get_advanced_positions():
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@router.post("/positions/{position_id}/modify")
+async def modify_advanced_position(position_id: str, data: dict = Body(...)):
+    """Move an open position's stop loss and/or take profit"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        modified = advanced_auto_trading_engine.modify_position(
+            position_id, data.get("stop_loss"), data.get("take_profit")
+        )
+        if not modified:
+            return {"status": "error", "message": f"Open position {position_id} not found"}
+        return {"status": "success", "message": "Position updated"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 @router.get("/market_data")
 async def get_advanced_market_data():
     """Get real-time market data from advanced engine"""
@@ -251,7 +268,7 @@ async def update_advanced_config(config: dict = Body(...)):
             return {"status": "error", "message": "Engine not available"}
         
         # Update configuration
-        advanced_auto_trading_engine.config.update(config)
+        advanced_auto_trading_engine.update_config(config)
         
         # Save configuration
         os.makedirs("data", exist_ok=True)
@@ -265,3 +282,92 @@ async def update_advanced_config(config: dict = Body(...)):
         }
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+@router.get("/latency")
+async def get_advanced_latency(symbol: Optional[str] = None):
+    """Tick-to-decision stage latency (p50/p95/p99/max) per symbol, plus the slowest traced decisions"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        return {
+            "status": "success",
+            "latency": advanced_auto_trading_engine.get_latency_report(symbol)
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/latency/sampling")
+async def set_advanced_latency_sampling(data: dict = Body(...)):
+    """Enable/disable decision tracing. Body: enabled, sample_rate (0-1), trace_slowest"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        advanced_auto_trading_engine.set_latency_sampling(
+            bool(data.get("enabled", True)),
+            data.get("sample_rate"),
+            data.get("trace_slowest")
+        )
+        return {
+            "status": "success",
+            "sampling": advanced_auto_trading_engine.get_latency_report()["sampling"]
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/latency/reset")
+async def reset_advanced_latency():
+    """Clear latency histograms and traces"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        advanced_auto_trading_engine.latency.reset()
+        return {"status": "success", "message": "Latency statistics reset"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/strategies/ranking")
+async def get_strategy_ranking(limit: Optional[int] = None, sort_by: str = "total_pnl"):
+    """Live PnL ranking of paper-traded strategy variants (sort_by: total_pnl, realized_pnl, win_rate, max_drawdown_pct)"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        return {
+            "status": "success",
+            "strategies": advanced_auto_trading_engine.get_strategy_ranking(limit, sort_by)
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/strategies")
+async def configure_strategies(data: dict = Body(...)):
+    """(Re)start multi-strategy paper trading. Body: variants (list of parameter overrides) and/or grid"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        variants = data.get("variants") or []
+        grid = data.get("grid") or {}
+        count = advanced_auto_trading_engine.configure_strategies(variants, grid)
+        advanced_auto_trading_engine.update_config({
+            "strategies": {"enabled": True, "variants": variants, "grid": grid}
+        })
+        return {"status": "success", "message": f"Evaluating {count} strategy variants", "variants": count}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/strategies/stop")
+async def stop_strategies():
+    """Stop multi-strategy paper trading and discard the variants' virtual ledgers"""
+    try:
+        if advanced_auto_trading_engine is None:
+            return {"status": "error", "message": "Engine not available"}
+        
+        advanced_auto_trading_engine.strategies = None
+        advanced_auto_trading_engine.update_config({"strategies": {"enabled": False, "variants": [], "grid": {}}})
+        return {"status": "success", "message": "Multi-strategy paper trading stopped"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
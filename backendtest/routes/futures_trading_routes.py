@@ -9,6 +9,8 @@ from datetime import datetime
 from fastapi import APIRouter, Body
 from typing import Dict, Any, Optional
 
+from accounts import DEFAULT_ACCOUNT
+
 # Global references - will be set by main.py
 binance_futures_engine = None
 auto_trading_status = None
@@ -83,11 +85,11 @@ async def binance_auto_execute_critical():
 # === BINANCE FUTURES EXACT API ENDPOINTS ===
 
 @router.get("/fapi/v2/account")
-async def get_binance_account():
+async def get_binance_account(account: str = DEFAULT_ACCOUNT):
     """Get Binance futures account information - EXACT API"""
     try:
         if binance_futures_engine:
-            return binance_futures_engine.get_account()
+            return binance_futures_engine.get_account(account)
         else:
             # Fallback mock response
             return {
@@ -109,12 +111,14 @@ async def get_binance_account():
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @router.get("/fapi/v2/balance")
-async def get_binance_balance():
+async def get_binance_balance(account: str = DEFAULT_ACCOUNT):
     """Get Binance futures balance - EXACT API"""
     try:
         if binance_futures_engine:
-            account = binance_futures_engine.get_account()
-            return account.get("assets", [])
+            account_data = binance_futures_engine.get_account(account)
+            if "code" in account_data:
+                return account_data
+            return account_data.get("assets", [])
         else:
             # Fallback mock response
             return [
@@ -134,11 +138,11 @@ async def get_binance_balance():
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @router.get("/fapi/v2/positionRisk")
-async def get_binance_position_risk(symbol: Optional[str] = None):
+async def get_binance_position_risk(symbol: Optional[str] = None, account: str = DEFAULT_ACCOUNT):
     """Get position information - EXACT Binance API"""
     try:
         if binance_futures_engine:
-            return binance_futures_engine.get_position_risk(symbol)
+            return binance_futures_engine.get_position_risk(symbol, account)
         else:
             # Fallback mock response
             return [
@@ -197,16 +201,11 @@ async def new_binance_order(order_data: dict = Body(...)):
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
 @router.get("/fapi/v1/openOrders")
-async def get_binance_open_orders(symbol: Optional[str] = None):
+async def get_binance_open_orders(symbol: Optional[str] = None, account: str = DEFAULT_ACCOUNT):
     """Get open orders - EXACT Binance API"""
     try:
         if binance_futures_engine:
-            orders = []
-            for order in binance_futures_engine.orders.values():
-                if order.status in ["NEW", "PARTIALLY_FILLED"]:
-                    if symbol is None or order.symbol == symbol:
-                        orders.append(order.to_dict())
-            return orders
+            return binance_futures_engine.get_open_orders(symbol, account)
         else:
             # Fallback mock response
             return []
@@ -219,23 +218,80 @@ async def cancel_binance_order(order_data: dict = Body(...)):
     try:
         symbol = order_data.get("symbol")
         order_id = order_data.get("orderId")
+        account = order_data.get("account", DEFAULT_ACCOUNT)
         
         if binance_futures_engine and order_id:
-            return binance_futures_engine.cancel_order(symbol, order_id)
+            return binance_futures_engine.cancel_order(symbol, order_id, account)
         else:
             return {"code": -2011, "msg": "Unknown order sent."}
     except Exception as e:
         return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
 
+@router.post("/fapi/v1/batchOrders")
+async def new_binance_batch_orders(batch_data: dict = Body(...)):
+    """Place multiple orders - EXACT Binance API"""
+    try:
+        orders = batch_data.get("batchOrders")
+        account = batch_data.get("account", DEFAULT_ACCOUNT)
+        
+        if binance_futures_engine:
+            return binance_futures_engine.new_batch_orders(orders, account, bool(batch_data.get("bulk", False)))
+        else:
+            return {"code": -1130, "msg": "Data sent for parameter 'batchOrders' is not valid."}
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@router.delete("/fapi/v1/batchOrders")
+async def cancel_binance_batch_orders(batch_data: dict = Body(...)):
+    """Cancel multiple orders - EXACT Binance API"""
+    try:
+        symbol = batch_data.get("symbol")
+        order_ids = batch_data.get("orderIdList")
+        account = batch_data.get("account", DEFAULT_ACCOUNT)
+        
+        if binance_futures_engine:
+            return binance_futures_engine.cancel_batch_orders(symbol, order_ids, account)
+        else:
+            return {"code": -2011, "msg": "Unknown order sent."}
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@router.delete("/fapi/v1/allOpenOrders")
+async def cancel_all_binance_open_orders(symbol: str, account: str = DEFAULT_ACCOUNT):
+    """Cancel all open orders of a symbol - EXACT Binance API"""
+    try:
+        if binance_futures_engine:
+            return binance_futures_engine.cancel_all_open_orders(symbol, account)
+        else:
+            return {"code": 200, "msg": "The operation of cancel all open order is done."}
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
+@router.post("/fapi/v1/countdownCancelAll")
+async def binance_countdown_cancel_all(countdown_data: dict = Body(...)):
+    """Auto-cancel all open orders after countdownTime ms unless refreshed - EXACT Binance API"""
+    try:
+        symbol = countdown_data.get("symbol")
+        countdown_time = int(countdown_data.get("countdownTime", 0))
+        account = countdown_data.get("account", DEFAULT_ACCOUNT)
+        
+        if binance_futures_engine:
+            return binance_futures_engine.countdown_cancel_all(symbol, countdown_time, account)
+        else:
+            return {"symbol": symbol, "countdownTime": str(countdown_time)}
+    except Exception as e:
+        return {"code": -1000, "msg": f"An unknown error occurred: {str(e)}"}
+
 @router.post("/fapi/v1/leverage")
 async def change_binance_leverage(leverage_data: dict = Body(...)):
     """Change leverage - EXACT Binance API"""
     try:
         symbol = leverage_data.get("symbol")
         leverage = leverage_data.get("leverage")
+        account = leverage_data.get("account", DEFAULT_ACCOUNT)
         
         if binance_futures_engine:
-            return binance_futures_engine.change_leverage(symbol, leverage)
+            return binance_futures_engine.change_leverage(symbol, leverage, account)
         else:
             return {
                 "leverage": leverage,
@@ -251,9 +307,10 @@ async def change_binance_margin_type(margin_data: dict = Body(...)):
     try:
         symbol = margin_data.get("symbol")
         margin_type = margin_data.get("marginType")
+        account = margin_data.get("account", DEFAULT_ACCOUNT)
         
         if binance_futures_engine:
-            return binance_futures_engine.change_margin_type(symbol, margin_type)
+            return binance_futures_engine.change_margin_type(symbol, margin_type, account)
         else:
             return {"code": 200, "msg": "success"}
     except Exception as e:
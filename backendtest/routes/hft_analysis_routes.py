@@ -8,7 +8,10 @@ import os
 import json
 from datetime import datetime
 from fastapi import APIRouter, Body
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from order_book import order_book_manager
+from price_service import price_service
 
 # Global HFT status and configuration
 hft_config = {
@@ -38,9 +41,49 @@ hft_analytics_data = {
     "profit_potential": []
 }
 
+# Last analysed price per symbol (for tick-by-tick opportunity detection)
+hft_last_prices: Dict[str, float] = {}
+
 # Create router
 router = APIRouter(prefix="/hft", tags=["HFT Analysis"])
 
+def ingest_tick(tick: Dict[str, Any]):
+    """Analyse one price tick (live or replayed) and record any price-movement opportunity"""
+    symbol = tick.get("symbol")
+    price = float(tick.get("price", 0))
+    if not symbol or price <= 0:
+        return
+    
+    tick_time = datetime.fromtimestamp(tick["ts"]).isoformat() if tick.get("ts") else datetime.now().isoformat()
+    hft_analytics_data["timestamps"].append(tick_time)
+    hft_analytics_data["prices"].append(price)
+    hft_analytics_data["volumes"].append(float(tick.get("volume", 0.0)))
+    hft_status["total_analyzed"] += 1
+    hft_status["last_analysis"] = tick_time
+    
+    previous = hft_last_prices.get(symbol)
+    hft_last_prices[symbol] = price
+    if previous:
+        price_change = abs(price - previous) / previous
+        if price_change > hft_config.get("threshold_percent", 0.01) / 100:
+            hft_analytics_data["opportunities"].append({
+                "time": tick_time,
+                "symbol": symbol,
+                "profit_potential": min(price_change * 2, 0.1),
+                "confidence": min(price_change * 10, 0.95),
+                "type": "momentum" if price_change > 0.005 else "mean_reversion",
+                "price_change": price_change,
+                "current_price": price
+            })
+            hft_status["opportunities_found"] += 1
+    
+    # Keep the analytics buffers bounded
+    if len(hft_analytics_data["timestamps"]) > 2000:
+        for key in ["timestamps", "prices", "volumes"]:
+            hft_analytics_data[key] = hft_analytics_data[key][-1000:]
+    if len(hft_analytics_data["opportunities"]) > 100:
+        hft_analytics_data["opportunities"] = hft_analytics_data["opportunities"][-50:]
+
 @router.get("/status")
 async def get_hft_status():
     """Get comprehensive HFT analysis status"""
@@ -50,12 +93,13 @@ async def get_hft_status():
         if hft_status["enabled"] and hft_status["start_time"]:
             uptime_seconds = (datetime.now() - datetime.fromisoformat(hft_status["start_time"])).total_seconds()
         
-        # Get current symbols data simulation
+        # Get current prices for all monitored symbols concurrently (coalesced + cached)
         current_symbols_data = {}
-        for symbol in hft_config["symbols"]:
+        prices = await price_service.get_prices(hft_config["symbols"])
+        for symbol, price in prices.items():
             current_symbols_data[symbol] = {
-                "price": 45000.0 + (hash(symbol) % 1000),
-                "volume": 1000000 + (hash(symbol) % 500000)
+                "price": price,
+                "last_updated": datetime.now().isoformat()
             }
         
         status_data = {
@@ -63,6 +107,7 @@ async def get_hft_status():
             "config": hft_config,
             "symbols_monitored": len(current_symbols_data),
             "current_prices": current_symbols_data,
+            "orderbook_metrics": order_book_manager.get_all_metrics(hft_config["analysis_depth"]),
             "uptime_seconds": int(uptime_seconds),
             "analysis_frequency": f"{1000/hft_config['interval_ms']:.1f} Hz" if hft_config['interval_ms'] > 0 else "0 Hz"
         }
@@ -100,6 +145,10 @@ async def start_hft_analysis():
         
         monitored_symbols = hft_config["symbols"]
         
+        # Maintain local L2 books for microstructure metrics (spread, microprice, imbalance)
+        for symbol in monitored_symbols:
+            order_book_manager.subscribe(symbol)
+        
         result = {
             "message": f"HFT analysis started successfully",
             "enabled": True,
@@ -198,10 +247,12 @@ async def get_hft_analytics():
         if hft_status["enabled"]:
             current_time = datetime.now().isoformat()
             
-            # Add simulated data points
-            hft_analytics_data["timestamps"].append(current_time)
-            hft_analytics_data["prices"].append(45000 + (time.time() % 100))
-            hft_analytics_data["volumes"].append(1000000 + (time.time() % 50000))
+            # Add a data point per monitored symbol from the shared price service
+            prices = await price_service.get_prices(hft_config["symbols"])
+            for price in prices.values():
+                hft_analytics_data["timestamps"].append(current_time)
+                hft_analytics_data["prices"].append(price)
+                hft_analytics_data["volumes"].append(0.0)
         
         # Limit data size (keep last 1000 points)
         max_points = 1000
@@ -255,6 +306,20 @@ async def get_hft_opportunities():
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@router.get("/orderbook/{symbol}")
+async def get_hft_orderbook_metrics(symbol: str, depth: Optional[int] = None):
+    """Get order book microstructure metrics for a symbol from the local L2 book"""
+    try:
+        levels = depth or hft_config["analysis_depth"]
+        book = await order_book_manager.ensure_synced(symbol)
+        return {
+            "status": "success",
+            "metrics": book.get_metrics(levels),
+            "book_stats": book.stats
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 # === CRITICAL HFT ENDPOINTS FOR DASHBOARD BUTTONS ===
 
 @router.get("/analysis/start")
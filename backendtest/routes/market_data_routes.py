@@ -3,25 +3,35 @@ Market Data Routes
 Handles market data operations: prices, market_data, klines
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 import time
 import random
 
+from price_service import ticker_table
+
 router = APIRouter()
 
 @router.get("/prices")
-async def get_all_prices():
-    """Get all symbol prices"""
+async def get_all_prices(symbols: Optional[str] = Query(None, description="Comma-separated symbols, e.g. BTCUSDT,ETHUSDT")):
+    """Get prices for any subset of symbols from the bulk ticker table (one upstream call per refresh)"""
     try:
-        symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "DOTUSDT"]
-        prices = {}
-        for symbol in symbols:
-            base_price = 45000 if "BTC" in symbol else 3000 if "ETH" in symbol else 300
-            prices[symbol] = round(base_price * (1 + random.uniform(-0.05, 0.05)), 2)
-        
+        # Start the scheduled bulk refresh on first use; refresh now if the table is stale
+        ticker_table.start()
+        if not ticker_table.is_fresh:
+            await ticker_table.refresh()
+
+        requested = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+        prices = ticker_table.get_prices(requested)
+        missing = [s.upper() for s in requested if s.upper() not in prices] if requested else []
+
         return {
+            "status": "success",
             "prices": prices,
-            "timestamp": time.time()
+            "count": len(prices),
+            "missing": missing,
+            "timestamp": ticker_table.last_refresh_time,
+            "age_seconds": round(ticker_table.age, 3)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -126,15 +126,24 @@ async def get_enhanced_ml_prediction(
         timeframe_list = timeframes.split(',')
         timeframe_predictions = {}
         
+        # The model has no timeframe input: score one feature row (the collector's latest indicators)
+        # and share the result across timeframes
+        from engine_providers import InProcessIndicatorProvider, InProcessPredictionProvider
+        prediction = None
+        try:
+            indicators = await InProcessIndicatorProvider().get_indicators(symbol)
+            if indicators:
+                features = dict(indicators, price=indicators.get("current_price", 0.0))
+                prediction = await InProcessPredictionProvider().predict(symbol.upper(), features, timeframe_list)
+        except Exception:
+            prediction = None
         for tf in timeframe_list:
             try:
-                prediction = real_predict(symbol.lower())
-                # real_predict returns (direction, confidence) tuple
-                if isinstance(prediction, tuple) and len(prediction) == 2:
-                    direction, confidence = prediction
+                # predict returns {"primary_signal": BUY/SELL, "primary_confidence", ...} or None
+                if prediction is not None:
                     timeframe_predictions[tf] = {
-                        "signal": direction,
-                        "confidence": confidence,
+                        "signal": prediction["primary_signal"],
+                        "confidence": prediction["primary_confidence"],
                         "model_used": "legacy_ml"
                     }
                 else:
@@ -180,6 +189,32 @@ async def get_enhanced_ml_prediction(
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@router.post("/predict/batch")
+async def predict_ml_batch(data: dict = Body(...)):
+    """
+    Score many feature rows with one model call. Send "rows" (an N x 23 matrix, or feature dicts)
+    or "columns" ({feature: N values}); optional "symbols" labels the predictions.
+    """
+    try:
+        from ml import FEATURE_COLUMNS, predict_batch
+        X = data.get("columns") if data.get("columns") is not None else data.get("rows")
+        if not X:
+            return {"status": "error", "message": "Send 'rows' or 'columns'"}
+        predictions = predict_batch(X)
+        symbols = list(data.get("symbols") or [])
+        symbols += [None] * (len(predictions) - len(symbols))
+        return {
+            "status": "success",
+            "count": len(predictions),
+            "feature_columns": FEATURE_COLUMNS,
+            "predictions": [
+                {"symbol": symbol, "signal": signal, "confidence": confidence}
+                for symbol, (signal, confidence) in zip(symbols, predictions)
+            ]
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
 @router.get("/current_signal")
 async def get_current_trading_signal():
     """Get current AI trading signal for dashboard display - REAL DATA ONLY"""
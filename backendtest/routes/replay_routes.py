@@ -0,0 +1,123 @@
+"""
+Tick Recording & Replay API Routes
+Controls the tick recorder and replays recorded segments into the trading engines
+"""
+
+import logging
+from fastapi import APIRouter, Body
+from typing import Dict, Any, Optional
+
+from tick_recorder import tick_recorder, tick_store, replay_engine
+from advanced_auto_trading import get_advanced_auto_trading_engine
+from futures_trading import futures_engine
+from .hft_analysis_routes import ingest_tick as hft_ingest_tick
+
+# Create router
+router = APIRouter(prefix="/replay", tags=["Tick Replay"])
+
+# Logger
+logger = logging.getLogger(__name__)
+
+REPLAY_TARGETS = ["advanced", "futures", "hft"]
+
+@router.get("/recorder/status")
+async def get_recorder_status():
+    """Get tick recorder status"""
+    return {"status": "success", "recorder": tick_recorder.get_status()}
+
+@router.post("/recorder/start")
+async def start_recorder(data: dict = Body(None)):
+    """Start recording price and kline events (optionally only some symbols)"""
+    try:
+        symbols = (data or {}).get("symbols")
+        tick_recorder.start(symbols)
+        return {"status": "success", "recorder": tick_recorder.get_status()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/recorder/stop")
+async def stop_recorder():
+    """Stop recording and flush the current segment"""
+    try:
+        tick_recorder.stop()
+        return {"status": "success", "recorder": tick_recorder.get_status()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/segments")
+async def list_segments():
+    """List recorded segments with their time ranges"""
+    try:
+        tick_recorder.flush()
+        segments = tick_store.list_segments()
+        return {
+            "status": "success",
+            "segments": segments,
+            "total_records": sum(s["records"] for s in segments)
+        }
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/start")
+async def start_replay(data: dict = Body(None)):
+    """
+    Replay recorded ticks.
+    Body: speed (1 = real time, N = N× faster, 0 = as fast as possible), start_ts, end_ts,
+    symbols, targets (subset of "advanced", "futures", "hft").
+    The engine targets are the live paper-trading engines, so they are refused while they hold
+    open positions (replayed prices would close them and journal the closes).
+    """
+    try:
+        data = data or {}
+        targets = data.get("targets", REPLAY_TARGETS)
+        speed = float(data.get("speed", 1.0))
+
+        if replay_engine.is_running:
+            return {"status": "error", "message": "A replay is already running"}
+
+        advanced_engine = get_advanced_auto_trading_engine() if "advanced" in targets else None
+        busy = []
+        if advanced_engine is not None and len(advanced_engine.positions):
+            busy.append("advanced")
+        if "futures" in targets and futures_engine.positions:
+            busy.append("futures")
+        if busy:
+            return {
+                "status": "error",
+                "message": f"Replay targets with open positions: {', '.join(busy)}; close them or replay into other targets"
+            }
+
+        for name in REPLAY_TARGETS:
+            replay_engine.remove_consumer(name)
+
+        if advanced_engine is not None:
+            replay_engine.add_consumer("advanced", advanced_engine.ingest_tick)
+        if "futures" in targets:
+            replay_engine.add_consumer(
+                "futures", lambda tick: futures_engine.update_positions(tick["symbol"], tick["price"])
+            )
+        if "hft" in targets:
+            replay_engine.add_consumer("hft", hft_ingest_tick)
+
+        if not replay_engine.consumers:
+            return {"status": "error", "message": "No replay targets available"}
+
+        tick_recorder.flush()
+        replay_engine.start(speed, data.get("start_ts"), data.get("end_ts"), data.get("symbols"))
+        return {"status": "success", "replay": replay_engine.get_status()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.post("/stop")
+async def stop_replay():
+    """Stop a running replay"""
+    try:
+        await replay_engine.stop()
+        return {"status": "success", "replay": replay_engine.get_status()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+@router.get("/status")
+async def get_replay_status():
+    """Get replay progress"""
+    return {"status": "success", "replay": replay_engine.get_status()}
@@ -6,8 +6,14 @@ from datetime import datetime
 import json
 import os
 
+import numpy as np
+
+from portfolio_ledger import get_portfolio_ledger
+
 router = APIRouter(prefix="/risk", tags=["Risk Management"])
 
+INITIAL_BALANCE = 10000.0
+
 # Risk settings storage
 risk_settings = {
     "max_drawdown": 10.0,
@@ -15,26 +21,71 @@ risk_settings = {
     "max_daily_loss": 5.0
 }
 
-@router.get("/portfolio_metrics")
-async def get_portfolio_risk_metrics():
-    """Get comprehensive portfolio-level risk metrics"""
+def load_virtual_balance() -> float:
+    """Paper-trading balance (data/virtual_balance.json), 10000 when there is none"""
     try:
-        return {
-            "status": "success",
-            "risk_metrics": {
-                "portfolio_value": 10000.0,
-                "total_exposure": 0.0,
-                "portfolio_risk_percent": 0.0,
-                "position_concentration": 0.0,
-                "current_drawdown": 0.0,
-                "risk_score": 0.0,
-                "can_trade": True,
-                "risk_warnings": []
-            }
+        if os.path.exists("data/virtual_balance.json"):
+            with open("data/virtual_balance.json", "r") as f:
+                return float(json.load(f).get("balance", INITIAL_BALANCE))
+    except (OSError, ValueError):
+        pass
+    return INITIAL_BALANCE
+
+def portfolio_risk_metrics() -> dict:
+    """Portfolio risk from the portfolio ledger's running exposure / PnL aggregates"""
+    try:
+        ledger = get_portfolio_ledger()
+        exposure = ledger.snapshot()["total"]
+        open_positions = ledger.get_positions()
+        portfolio_value = load_virtual_balance()
+        
+        # Risk calculations
+        total_exposure = exposure["gross_exposure"]
+        portfolio_risk_percent = (total_exposure / portfolio_value * 100) if portfolio_value > 0 else 0
+        max_single_position = max([pos["notional"] for pos in open_positions], default=0)
+        position_concentration = (max_single_position / portfolio_value * 100) if portfolio_value > 0 else 0
+        
+        # Drawdown calculation
+        current_drawdown = (INITIAL_BALANCE - portfolio_value) / INITIAL_BALANCE * 100
+        max_drawdown_threshold = risk_settings.get("max_drawdown", 10.0)
+        
+        # Value at Risk (VaR) estimation - simplified
+        unrealized_pnl_values = [pos["unrealized_pnl"] for pos in open_positions if pos["unrealized_pnl"]]
+        var_95 = float(np.percentile(unrealized_pnl_values, 5)) if unrealized_pnl_values else 0
+        
+        risk_metrics = {
+            "portfolio_value": portfolio_value,
+            "total_exposure": total_exposure,
+            "portfolio_risk_percent": portfolio_risk_percent,
+            "position_concentration": position_concentration,
+            "current_drawdown": current_drawdown,
+            "max_drawdown_threshold": max_drawdown_threshold,
+            "drawdown_remaining": max(0, max_drawdown_threshold - current_drawdown),
+            "var_95": var_95,
+            "open_positions_count": exposure["positions"],
+            "unrealized_pnl": exposure["unrealized_pnl"],
+            "risk_score": min(100, portfolio_risk_percent + position_concentration + abs(current_drawdown)),
+            "can_trade": current_drawdown < max_drawdown_threshold,
+            "risk_warnings": []
         }
+        
+        # Risk warnings
+        if current_drawdown > max_drawdown_threshold * 0.8:
+            risk_metrics["risk_warnings"].append("Approaching maximum drawdown limit")
+        if portfolio_risk_percent > 80:
+            risk_metrics["risk_warnings"].append("High portfolio exposure")
+        if position_concentration > 50:
+            risk_metrics["risk_warnings"].append("High position concentration risk")
+        
+        return {"status": "success", "risk_metrics": risk_metrics}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@router.get("/portfolio_metrics")
+async def get_portfolio_risk_metrics():
+    """Get comprehensive portfolio-level risk metrics"""
+    return portfolio_risk_metrics()
+
 @router.post("/calculate_position_size")
 async def calculate_dynamic_position_size(data: dict = Body(...)):
     """Calculate optimal position size based on risk parameters"""
@@ -4,12 +4,13 @@ Handles health checks, pricing, model management, and risk settings
 """
 
 import time
-import requests
 import logging
 from datetime import datetime
 from fastapi import APIRouter, Body
 from typing import Dict, Any
 
+from price_service import price_service
+
 # Global references - will be set by main.py
 get_trades = None
 futures_engine = None
@@ -196,44 +197,24 @@ def set_active_version(data: dict = Body(...)):
     return {"status": "error", "message": "Invalid version"}
 
 @router.get("/price")
-def get_price(symbol: str = "BTCUSDT"):
-    """Get current price with retry logic and better error handling"""
-    max_retries = 3
-    retry_delay = 0.5
-    
-    for attempt in range(max_retries):
-        try:
-            url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol.upper()}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                price = float(data["price"])
-                logger.info(f"Successfully fetched price for {symbol}: ${price}")
-                return {"symbol": symbol.upper(), "price": price, "status": "success"}
-            elif response.status_code == 429:
-                logger.warning(f"Rate limited for {symbol}, retrying in {retry_delay}s")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-                continue
-            else:
-                logger.error(f"Binance API error for {symbol}: {response.status_code}")
-                break
-        except Exception as e:
-            logger.error(f"Error fetching price for {symbol}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2
-                continue
-            break
-    
-    # Return error response if all retries failed
-    return {"symbol": symbol.upper(), "price": 0.0, "status": "error", "message": "Failed to fetch price"}
+async def get_price(symbol: str = "BTCUSDT"):
+    """Get current price through the shared price service (coalesced, short-TTL cached)"""
+    try:
+        price = await price_service.get_price(symbol)
+        return {"symbol": symbol.upper(), "price": price, "status": "success"}
+    except Exception as e:
+        logger.error(f"Error fetching price for {symbol}: {e}")
+        return {"symbol": symbol.upper(), "price": 0.0, "status": "error", "message": "Failed to fetch price"}
+
+@router.get("/price/stats")
+def get_price_stats():
+    """Get price cache hit ratio and upstream call rate"""
+    return {"status": "success", "stats": price_service.get_stats()}
 
 @router.get("/price/{symbol}")
-def get_price_by_path(symbol: str):
+async def get_price_by_path(symbol: str):
     """Get current price using path parameter (required by dashboard)"""
-    return get_price(symbol)
+    return await get_price(symbol)
 
 @router.get("/model/analytics")
 def get_model_analytics():
@@ -0,0 +1,97 @@
+"""
+Signal Book
+Latest trading signal per symbol between signal generation and execution.
+A newer signal supersedes the pending one for its symbol, signals expire after a TTL,
+and execution takes the highest-priority signal first — the backlog is bounded by the symbol count.
+"""
+
+import heapq
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("symbol", "signal", "priority", "origin_ts", "expires_at", "seq")
+
+    def __init__(self, symbol: str, signal: Any, priority: float, origin_ts: float, expires_at: float, seq: int):
+        self.symbol = symbol
+        self.signal = signal
+        self.priority = priority
+        self.origin_ts = origin_ts
+        self.expires_at = expires_at
+        self.seq = seq
+
+
+class SignalBook:
+    """Heap ordered by priority with lazy invalidation of superseded/expired entries"""
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._pending: Dict[str, _Entry] = {}
+        self._heap: List[Tuple[float, int, _Entry]] = []
+        self._seq = itertools.count()
+        self.stats = {"received": 0, "superseded": 0, "expired": 0, "executed": 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, symbol: str, signal: Any, priority: float, origin_ts: Optional[float] = None) -> bool:
+        """Store the latest signal for a symbol; returns True if it superseded a pending one"""
+        now = time.monotonic()
+        entry = _Entry(symbol, signal, priority, origin_ts if origin_ts is not None else time.perf_counter(),
+                       now + self.ttl_seconds, next(self._seq))
+        superseded = symbol in self._pending
+        self._pending[symbol] = entry
+        heapq.heappush(self._heap, (-priority, entry.seq, entry))
+        self.stats["received"] += 1
+        if superseded:
+            self.stats["superseded"] += 1
+        if len(self._heap) > 4 * len(self._pending) + 64:
+            self._rebuild()
+        return superseded
+
+    def pop(self) -> Optional[_Entry]:
+        """Highest-priority live signal, or None"""
+        now = time.monotonic()
+        while self._heap:
+            _, _, entry = heapq.heappop(self._heap)
+            if self._pending.get(entry.symbol) is not entry:
+                continue  # superseded
+            del self._pending[entry.symbol]
+            if entry.expires_at < now:
+                self.stats["expired"] += 1
+                continue
+            self.stats["executed"] += 1
+            return entry
+        return None
+
+    def expire(self) -> List[_Entry]:
+        """Drop and return signals past their TTL"""
+        now = time.monotonic()
+        expired = [entry for entry in self._pending.values() if entry.expires_at < now]
+        for entry in expired:
+            del self._pending[entry.symbol]
+        if expired:
+            self.stats["expired"] += len(expired)
+            self._rebuild()
+        return expired
+
+    def clear(self):
+        self._pending.clear()
+        self._heap.clear()
+
+    def _rebuild(self):
+        self._heap = [(-e.priority, e.seq, e) for e in self._pending.values()]
+        heapq.heapify(self._heap)
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "pending": [
+                {"symbol": e.symbol, "priority": round(e.priority, 4), "expires_in": round(e.expires_at - now, 1)}
+                for e in sorted(self._pending.values(), key=lambda e: -e.priority)
+            ],
+            "ttl_seconds": self.ttl_seconds,
+            **self.stats
+        }
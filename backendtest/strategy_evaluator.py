@@ -0,0 +1,199 @@
+"""
+Multi-Strategy Evaluator
+Paper-trades many parameter variants of the auto trading rules side by side on the engine's
+shared feed, indicators and signal batch. Variant parameters and ledgers are NumPy arrays and
+all variants' positions share one PositionBook (tagged by variant), so each tick/signal costs
+one vectorised pass instead of one engine per variant.
+"""
+
+import itertools
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from position_book import PositionBook
+
+logger = logging.getLogger(__name__)
+
+# Any other sizing_method uses the fixed base_amount, as in the engine
+SIZING_METHODS = ["fixed_risk", "kelly"]
+
+# Parameters a variant may override (defaults mirror AdvancedAutoTradingEngine's config)
+VARIANT_DEFAULTS = {
+    "min_confidence": 0.7,
+    "max_risk_score": 0.8,
+    "stop_loss_pct": 2.0,
+    "take_profit_pct": 4.0,
+    "sizing_method": "fixed_risk",
+    "risk_per_trade": 2.0,
+    "base_amount": 100.0,
+    "max_position_size": 1000.0,
+    "max_positions": 3,
+    "balance": 10000.0
+}
+
+MIN_POSITION_SIZE = 10.0
+
+
+def expand_grid(base: Optional[Dict[str, Any]] = None, grid: Optional[Dict[str, List[Any]]] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of ``grid`` values on top of ``base`` -> list of named variants"""
+    base = dict(base or {})
+    grid = grid or {}
+    keys = list(grid)
+    variants = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        variant = dict(base, **dict(zip(keys, values)))
+        variant.setdefault("name", ",".join(f"{k}={v}" for k, v in zip(keys, values)) or "base")
+        variants.append(variant)
+    return variants
+
+
+class StrategyEvaluator:
+    def __init__(self, variants: List[Dict[str, Any]]):
+        self.configure(variants)
+
+    def configure(self, variants: List[Dict[str, Any]]):
+        """(Re)build all variants; existing virtual ledgers are discarded"""
+        params = [dict(VARIANT_DEFAULTS, **v) for v in variants]
+        for i, p in enumerate(params):
+            p.setdefault("name", f"variant_{i}")
+        self.params = params
+        self.names = [p["name"] for p in params]
+        count = len(params)
+
+        def column(key):
+            return np.array([float(p[key]) for p in params]) if count else np.zeros(0)
+
+        self.min_confidence = column("min_confidence")
+        self.max_risk_score = column("max_risk_score")
+        self.stop_loss_pct = column("stop_loss_pct")
+        self.take_profit_pct = column("take_profit_pct")
+        self.risk_per_trade = column("risk_per_trade")
+        self.base_amount = column("base_amount")
+        self.max_position_size = column("max_position_size")
+        self.max_positions = column("max_positions")
+        self.balance = column("balance")
+        self.sizing = np.array([SIZING_METHODS.index(p["sizing_method"]) if p["sizing_method"] in SIZING_METHODS
+                                else len(SIZING_METHODS) for p in params], dtype=np.int8)
+
+        # Virtual ledgers
+        self.open_count = np.zeros(count, dtype=np.int64)
+        self.trades = np.zeros(count, dtype=np.int64)
+        self.closed = np.zeros(count, dtype=np.int64)
+        self.wins = np.zeros(count, dtype=np.int64)
+        self.realized_pnl = np.zeros(count)
+        self.peak_equity = self.balance.copy()
+        self.max_drawdown_pct = np.zeros(count)
+
+        self.book = PositionBook()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def on_signal(self, symbol: str, side: int, confidence: float, risk_score: float, price: float) -> int:
+        """Open a position in every variant whose rules accept the signal; returns how many opened"""
+        if not len(self) or side == 0 or price <= 0:
+            return 0
+
+        eligible = (
+            (confidence >= self.min_confidence)
+            & (risk_score <= self.max_risk_score)
+            & (self.open_count < self.max_positions)
+        )
+        if not eligible.any():
+            return 0
+
+        # Position sizing for all variants at once (same rules as the engine)
+        win_rate = np.where(self.trades > 10, self.wins / np.maximum(self.closed, 1), 0.6)
+        kelly = np.clip((win_rate * 1.04 - (1 - win_rate) * 0.98) / 1.04, 0.0, 0.25)
+        size = np.select(
+            [self.sizing == 0, self.sizing == 1],
+            [self.balance * self.risk_per_trade / 100 * confidence * (1.0 - risk_score * 0.5),
+             self.balance * kelly * confidence],
+            self.base_amount
+        )
+        size = np.minimum(size, self.max_position_size)
+        eligible &= size >= MIN_POSITION_SIZE
+
+        variants = np.flatnonzero(eligible)
+        stop_loss = price * (1 - side * self.stop_loss_pct / 100)
+        take_profit = price * (1 + side * self.take_profit_pct / 100)
+        for v in variants.tolist():
+            self._next_id += 1
+            self.book.add(symbol, f"{v}:{self._next_id}", price, size[v] / price, side,
+                          stop_loss[v], take_profit[v], tag=v)
+        self.open_count[variants] += 1
+        self.trades[variants] += 1
+        return len(variants)
+
+    def on_price(self, symbol: str, price: float) -> int:
+        """Revalue the symbol's positions across all variants, close those hitting SL/TP and mark equity"""
+        exits = self.book.revalue(symbol, price)
+        if not exits:
+            self.mark_equity()
+            return 0
+        variants = np.empty(len(exits), dtype=np.intp)
+        pnl = np.empty(len(exits))
+        for i, (position_id, reason) in enumerate(exits):
+            variants[i] = int(position_id.split(":", 1)[0])
+            pnl[i] = self.book.snapshot(position_id)[1]
+            self.book.remove(position_id)
+        np.add.at(self.realized_pnl, variants, pnl)
+        np.add.at(self.closed, variants, 1)
+        np.add.at(self.wins, variants, (pnl > 0).astype(np.int64))
+        np.subtract.at(self.open_count, variants, 1)
+        self.mark_equity()
+        return len(exits)
+
+    def equity(self) -> np.ndarray:
+        return self.balance + self.realized_pnl + self.book.unrealized_by_tag(len(self))
+
+    def mark_equity(self):
+        """Update per-variant peak equity and max drawdown"""
+        if not len(self):
+            return
+        equity = self.equity()
+        np.maximum(self.peak_equity, equity, out=self.peak_equity)
+        drawdown = (self.peak_equity - equity) / self.peak_equity * 100
+        np.maximum(self.max_drawdown_pct, drawdown, out=self.max_drawdown_pct)
+
+    def ranking(self, limit: Optional[int] = None, sort_by: str = "total_pnl") -> List[Dict[str, Any]]:
+        if not len(self):
+            return []
+        self.mark_equity()
+        unrealized = self.book.unrealized_by_tag(len(self))
+        total = self.realized_pnl + unrealized
+        keys = {
+            "total_pnl": total,
+            "realized_pnl": self.realized_pnl,
+            "win_rate": self.wins / np.maximum(self.closed, 1),
+            "max_drawdown_pct": -self.max_drawdown_pct  # smaller drawdown ranks higher
+        }
+        order = np.argsort(-keys.get(sort_by, total), kind="stable")
+        if limit:
+            order = order[:limit]
+        return [
+            {
+                "rank": rank + 1,
+                "name": self.names[v],
+                "params": self.params[v],
+                "total_pnl": float(total[v]),
+                "total_pnl_pct": float(total[v] / self.balance[v] * 100) if self.balance[v] else 0.0,
+                "realized_pnl": float(self.realized_pnl[v]),
+                "unrealized_pnl": float(unrealized[v]),
+                "trades": int(self.trades[v]),
+                "open_positions": int(self.open_count[v]),
+                "win_rate": float(self.wins[v] / self.closed[v]) if self.closed[v] else 0.0,
+                "max_drawdown_pct": float(self.max_drawdown_pct[v])
+            }
+            for rank, v in enumerate(order.tolist())
+        ]
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "variants": len(self),
+            "open_positions": len(self.book),
+            "total_trades": int(self.trades.sum()) if len(self) else 0
+        }
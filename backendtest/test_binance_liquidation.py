@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Binance Futures Liquidation Test
+Checks that the reported liquidationPrice is where the engine actually liquidates,
+for isolated (position margin) and cross (wallet) positions
+"""
+
+import sys
+import os
+import tempfile
+
+# Add backend directory to path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from binance_futures_exact import BinanceFuturesTradingEngine, OrderSide, OrderType
+
+SYMBOL = "BTCUSDT"
+ENTRY_PRICE = 50000.0
+LIQUIDATION_TOLERANCE = 0.0005  # 0.05% of the price
+
+
+def open_long(margin_type: str):
+    """Fresh engine (own data directory) with a 50x 1 BTC long at 50000 on a 10000 wallet"""
+    os.chdir(tempfile.mkdtemp(prefix="binance_liquidation_"))
+    engine = BinanceFuturesTradingEngine()
+    engine.change_margin_type(SYMBOL, margin_type)
+    engine.change_leverage(SYMBOL, 50)
+    engine.update_price(SYMBOL, ENTRY_PRICE)
+    order = engine.new_order(SYMBOL, OrderSide.BUY, OrderType.MARKET, "1")
+    assert order.get("status") == "FILLED", f"Order not filled: {order}"
+    position = engine.get_position_risk(SYMBOL)[0]
+    return engine, float(position["liquidationPrice"])
+
+
+def position_amount(engine) -> float:
+    positions = engine.get_position_risk(SYMBOL)
+    return float(positions[0]["positionAmt"]) if positions else 0.0
+
+
+def check_liquidates_at_reported_price(margin_type: str, margin_balance: float):
+    engine, liquidation_price = open_long(margin_type)
+    # Binance formula with the bracket of the entry notional: (balance + cum - notional) / (mmr - 1)
+    maint_margin_rate, cum = engine.get_maintenance_margin_rate(SYMBOL, ENTRY_PRICE)
+    expected_price = (margin_balance + cum - ENTRY_PRICE) / (maint_margin_rate - 1)
+    print(f"📊 {margin_type}: liquidationPrice {liquidation_price:.2f} (expected {expected_price:.2f})")
+    assert abs(liquidation_price - expected_price) < 0.01, \
+        f"{margin_type} liquidationPrice {liquidation_price:.2f}, expected {expected_price:.2f}"
+
+    # Within LIQUIDATION_TOLERANCE above the reported price the position survives, below it is liquidated
+    # (the reported price uses the entry notional's bracket, the engine the bracket at the mark)
+    engine.update_price(SYMBOL, liquidation_price * (1 + LIQUIDATION_TOLERANCE))
+    assert position_amount(engine) == 1.0, f"{margin_type} liquidated above its liquidationPrice"
+    filled = engine.update_price(SYMBOL, liquidation_price * (1 - LIQUIDATION_TOLERANCE))
+    assert filled and position_amount(engine) == 0.0, f"{margin_type} not liquidated below its liquidationPrice"
+
+
+def test_isolated_liquidation_price():
+    """Isolated positions are backed by their own margin: 50000 / 50 = 1000 (liquidates near 49196, not 40150)"""
+    check_liquidates_at_reported_price("ISOLATED", ENTRY_PRICE / 50)
+
+
+def test_cross_liquidation_price():
+    """Cross positions are backed by the 10000 wallet"""
+    check_liquidates_at_reported_price("CROSSED", 10000.0)
+
+
+if __name__ == "__main__":
+    print("🚀 Testing Binance futures liquidation prices...")
+    failed = 0
+    for check in (test_isolated_liquidation_price, test_cross_liquidation_price):
+        try:
+            check()
+            print(f"✅ {check.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {check.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Order Book Replay Test
+Replays the recorded BTCUSDT depth fixture (buffered pre-snapshot diffs, a sequence gap and a
+resync snapshot) and compares the rebuilt book with the fixture's "expected" block
+"""
+
+import sys
+import os
+import json
+
+# Add backend directory to path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from order_book import replay_fixture
+
+FIXTURE_PATH = os.path.join(backend_dir, "data", "orderbook_replay_btcusdt.json")
+
+
+def test_order_book_replay_fixture():
+    with open(FIXTURE_PATH, "r") as f:
+        expected = json.load(f)["expected"]
+
+    book = replay_fixture(FIXTURE_PATH)
+    print(f"📊 last_update_id {book.last_update_id}, best bid {book.bids.best()}, "
+          f"best ask {book.asks.best()}, stats {book.stats}")
+
+    assert book.synced, "Book not in sync after the resync snapshot"
+    assert book.last_update_id == expected["last_update_id"], \
+        f"last_update_id {book.last_update_id}, expected {expected['last_update_id']}"
+    assert book.bids.best()[0] == expected["best_bid"], f"best bid {book.bids.best()}, expected {expected['best_bid']}"
+    assert book.asks.best()[0] == expected["best_ask"], f"best ask {book.asks.best()}, expected {expected['best_ask']}"
+    assert book.stats["gaps"] == expected["gaps"], f"gaps {book.stats['gaps']}, expected {expected['gaps']}"
+
+
+if __name__ == "__main__":
+    print("🚀 Testing order book fixture replay...")
+    try:
+        test_order_book_replay_fixture()
+        print("✅ test_order_book_replay_fixture")
+    except AssertionError as e:
+        print(f"❌ test_order_book_replay_fixture: {e}")
+        sys.exit(1)
@@ -0,0 +1,354 @@
+"""
+Tick Recorder and Replay Engine
+Append-only segmented binary log of price and kline events (fixed-width records,
+memory-mappable, per-segment time index) and an accelerated replay into the trading engines
+"""
+
+import asyncio
+import bisect
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 64-byte little-endian record: ts, kind, interval, symbol, open, high, low, close, volume
+RECORD_STRUCT = struct.Struct("<dBB14s5d")
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("kind", "u1"),
+    ("interval", "u1"),
+    ("symbol", "S14"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8")
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+# Sparse time index entry: timestamp of record N, record number N
+INDEX_STRUCT = struct.Struct("<dq")
+INDEX_DTYPE = np.dtype([("ts", "<f8"), ("record", "<i8")])
+
+KIND_PRICE = 1
+KIND_KLINE = 2
+
+KLINE_INTERVALS = ["", "1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d", "1w"]
+_INTERVAL_CODES = {interval: code for code, interval in enumerate(KLINE_INTERVALS)}
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+
+class TickRecorder:
+    """
+    Appends price/kline events to segment files under ``directory``.
+    A segment rolls over after ``segment_records`` records; every ``index_stride``-th
+    record's timestamp goes into the segment's sidecar ``.idx`` file.
+    Writes are buffered and flushed every ``flush_every`` records (or on ``flush()``).
+    """
+
+    def __init__(self, directory: str = "data/ticks", segment_records: int = 250_000,
+                 index_stride: int = 1024, flush_every: int = 256):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.index_stride = index_stride
+        self.flush_every = flush_every
+        self.enabled = False
+        self.symbols: Optional[set] = None  # None = record every symbol
+
+        self._lock = threading.Lock()
+        self._segment_file = None
+        self._index_file = None
+        self._segment_path: Optional[str] = None
+        self._segment_count = 0
+        self._buffer = bytearray()
+        self._buffered = 0
+
+        self.stats = {"records": 0, "segments": 0, "bytes": 0, "dropped": 0}
+
+    def start(self, symbols: Optional[List[str]] = None):
+        """Enable recording, optionally restricted to a set of symbols"""
+        self.symbols = {s.upper() for s in symbols} if symbols else None
+        self.enabled = True
+        logger.info(f"Tick recording started ({self.directory})")
+
+    def stop(self):
+        self.enabled = False
+        self.close()
+        logger.info("Tick recording stopped")
+
+    def record_price(self, symbol: str, price: float, volume: float = 0.0, ts: Optional[float] = None):
+        self._append(KIND_PRICE, 0, symbol, price, price, price, price, volume, ts)
+
+    def record_kline(self, symbol: str, interval: str, open_: float, high: float, low: float,
+                     close: float, volume: float, ts: Optional[float] = None):
+        self._append(KIND_KLINE, _INTERVAL_CODES.get(interval, 0), symbol, open_, high, low, close, volume, ts)
+
+    def _append(self, kind: int, interval: int, symbol: str, open_: float, high: float,
+                low: float, close: float, volume: float, ts: Optional[float]):
+        if not self.enabled:
+            return
+        symbol = symbol.upper()
+        if self.symbols is not None and symbol not in self.symbols:
+            return
+
+        ts = ts if ts is not None else time.time()
+        try:
+            record = RECORD_STRUCT.pack(ts, kind, interval, symbol.encode("ascii")[:14],
+                                        float(open_), float(high), float(low), float(close), float(volume))
+        except (struct.error, UnicodeEncodeError, TypeError, ValueError) as e:
+            self.stats["dropped"] += 1
+            logger.debug(f"Dropped tick for {symbol}: {e}")
+            return
+
+        with self._lock:
+            if self._segment_file is None or self._segment_count >= self.segment_records:
+                self._roll_segment(ts)
+
+            if self._segment_count % self.index_stride == 0:
+                self._index_file.write(INDEX_STRUCT.pack(ts, self._segment_count))
+
+            self._buffer += record
+            self._buffered += 1
+            self._segment_count += 1
+            self.stats["records"] += 1
+            self.stats["bytes"] += RECORD_SIZE
+
+            if self._buffered >= self.flush_every:
+                self._flush_locked()
+
+    def _roll_segment(self, ts: float):
+        self._close_locked()
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"ticks_{int(ts * 1000)}")
+        self._segment_path = base + SEGMENT_SUFFIX
+        self._segment_file = open(self._segment_path, "ab")
+        self._index_file = open(base + INDEX_SUFFIX, "ab")
+        self._segment_count = os.path.getsize(self._segment_path) // RECORD_SIZE
+        self.stats["segments"] += 1
+
+    def _flush_locked(self):
+        if self._segment_file is not None and self._buffer:
+            self._segment_file.write(self._buffer)
+            self._segment_file.flush()
+            self._index_file.flush()
+        self._buffer = bytearray()
+        self._buffered = 0
+
+    def _close_locked(self):
+        self._flush_locked()
+        for f in (self._segment_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._segment_file = None
+        self._index_file = None
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "symbols": sorted(self.symbols) if self.symbols else "all",
+            "current_segment": self._segment_path,
+            "record_size_bytes": RECORD_SIZE,
+            **self.stats
+        }
+
+
+class TickStore:
+    """Read side: memory-maps segments and uses their time indexes to seek to a time range"""
+
+    def __init__(self, directory: str = "data/ticks"):
+        self.directory = directory
+
+    def segment_paths(self) -> List[str]:
+        paths = glob.glob(os.path.join(self.directory, f"ticks_*{SEGMENT_SUFFIX}"))
+        return sorted(paths, key=lambda p: int(os.path.basename(p)[6:-len(SEGMENT_SUFFIX)]))
+
+    @staticmethod
+    def open_segment(path: str) -> np.ndarray:
+        records = os.path.getsize(path) // RECORD_SIZE
+        if records == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(records,))
+
+    @staticmethod
+    def load_index(segment_path: str) -> np.ndarray:
+        index_path = segment_path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.fromfile(index_path, dtype=INDEX_DTYPE)
+
+    def list_segments(self) -> List[Dict[str, Any]]:
+        segments = []
+        for path in self.segment_paths():
+            records = self.open_segment(path)
+            segments.append({
+                "path": path,
+                "records": len(records),
+                "start_ts": float(records["ts"][0]) if len(records) else None,
+                "end_ts": float(records["ts"][-1]) if len(records) else None,
+                "size_bytes": len(records) * RECORD_SIZE
+            })
+        return segments
+
+    def _slice(self, path: str, start_ts: Optional[float], end_ts: Optional[float]) -> np.ndarray:
+        records = self.open_segment(path)
+        if not len(records):
+            return records
+
+        # Narrow to the indexed window, then binary-search the timestamps inside it
+        lo, hi = 0, len(records)
+        index = self.load_index(path)
+        if len(index):
+            index_ts = index["ts"].tolist()
+            if start_ts is not None:
+                i = bisect.bisect_right(index_ts, start_ts) - 1
+                lo = int(index["record"][i]) if i >= 0 else 0
+            if end_ts is not None:
+                j = bisect.bisect_right(index_ts, end_ts)
+                hi = int(index["record"][j]) if j < len(index) else len(records)
+
+        window = records[lo:hi]
+        if start_ts is not None:
+            window = window[int(np.searchsorted(window["ts"], start_ts, side="left")):]
+        if end_ts is not None:
+            window = window[:int(np.searchsorted(window["ts"], end_ts, side="right"))]
+        return window
+
+    def read(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+             symbols: Optional[List[str]] = None) -> Iterator[np.ndarray]:
+        """Yield per-segment record arrays (memmap views when unfiltered) in time order"""
+        wanted = np.array([s.upper().encode("ascii") for s in symbols], dtype="S14") if symbols else None
+        for path in self.segment_paths():
+            window = self._slice(path, start_ts, end_ts)
+            if wanted is not None and len(window):
+                window = window[np.isin(window["symbol"], wanted)]
+            if len(window):
+                yield window
+
+
+def record_to_dict(record) -> Dict[str, Any]:
+    return {
+        "ts": float(record["ts"]),
+        "kind": "kline" if record["kind"] == KIND_KLINE else "price",
+        "interval": KLINE_INTERVALS[record["interval"]] if record["interval"] < len(KLINE_INTERVALS) else "",
+        "symbol": record["symbol"].decode("ascii"),
+        "open": float(record["open"]),
+        "high": float(record["high"]),
+        "low": float(record["low"]),
+        "price": float(record["close"]),
+        "volume": float(record["volume"])
+    }
+
+
+class ReplayEngine:
+    """
+    Pushes recorded ticks back into consumers at real time (speed=1), N× speed,
+    or as fast as possible (speed=0). Consumers are async or sync callables taking a tick dict.
+    """
+
+    def __init__(self, store: TickStore):
+        self.store = store
+        self.consumers: Dict[str, Callable] = {}
+        self.speed = 1.0
+        self.is_running = False
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"replayed": 0, "consumer_errors": 0, "started_at": None,
+                      "finished_at": None, "first_ts": None, "last_ts": None}
+
+    def add_consumer(self, name: str, consumer: Callable):
+        self.consumers[name] = consumer
+
+    def remove_consumer(self, name: str):
+        self.consumers.pop(name, None)
+
+    def start(self, speed: float = 1.0, start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+              symbols: Optional[List[str]] = None) -> bool:
+        """Start a replay in the background; returns False if one is already running"""
+        if self.is_running:
+            return False
+        self._task = asyncio.ensure_future(self.run(speed, start_ts, end_ts, symbols))
+        return True
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.is_running = False
+
+    async def run(self, speed: float = 1.0, start_ts: Optional[float] = None, end_ts: Optional[float] = None,
+                  symbols: Optional[List[str]] = None):
+        self.speed = speed
+        self.is_running = True
+        self.stats.update({"replayed": 0, "consumer_errors": 0, "started_at": time.time(),
+                           "finished_at": None, "first_ts": None, "last_ts": None})
+        wall_start = time.monotonic()
+        first_ts = None
+
+        try:
+            for segment in self.store.read(start_ts, end_ts, symbols):
+                for record in segment:
+                    tick = record_to_dict(record)
+                    if first_ts is None:
+                        first_ts = tick["ts"]
+                        self.stats["first_ts"] = first_ts
+
+                    if speed > 0:
+                        delay = (tick["ts"] - first_ts) / speed - (time.monotonic() - wall_start)
+                        if delay > 0.001:
+                            await asyncio.sleep(delay)
+
+                    await self._dispatch(tick)
+                    self.stats["replayed"] += 1
+                    self.stats["last_ts"] = tick["ts"]
+
+                    # Yield to the event loop periodically when replaying flat out
+                    if speed <= 0 and self.stats["replayed"] % 1000 == 0:
+                        await asyncio.sleep(0)
+        finally:
+            self.is_running = False
+            self.stats["finished_at"] = time.time()
+            logger.info(f"Replay finished: {self.stats['replayed']} ticks")
+
+    async def _dispatch(self, tick: Dict[str, Any]):
+        for name, consumer in self.consumers.items():
+            try:
+                result = consumer(tick)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.stats["consumer_errors"] += 1
+                logger.debug(f"Replay consumer {name} failed: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "is_running": self.is_running,
+            "speed": self.speed,
+            "consumers": list(self.consumers.keys()),
+            **self.stats
+        }
+
+
+# Global recorder / store / replay instances
+tick_recorder = TickRecorder()
+tick_store = TickStore(tick_recorder.directory)
+replay_engine = ReplayEngine(tick_store)
@@ -3,24 +3,18 @@
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, WebSocketException
 import asyncio
-import httpx
 import json
 import logging
 import time
 from typing import Dict, Optional
 
+from price_service import price_service
+from ws_codec import MessageCodec, negotiate_codec
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.websocket("/ws/price")
-async def prices_ws(websocket: WebSocket):
-    await websocket.accept()
-    while True:
-        # Fetch real price data here
-        await websocket.send_json({"symbol": "BTCUSDT", "price": 12345.67})
-        await asyncio.sleep(1)
-
 # Global connection manager to enforce one connection per client IP
 import threading
 active_connections = {}
@@ -31,6 +25,7 @@ class WebSocketConnectionManager:
     
     def __init__(self):
         self.connections: Dict[str, WebSocket] = {}
+        self.codecs: Dict[str, MessageCodec] = {}
         self.connection_states: Dict[str, str] = {}
         self.heartbeat_intervals: Dict[str, float] = {}
         
@@ -39,6 +34,7 @@ class WebSocketConnectionManager:
         try:
             await websocket.accept()
             self.connections[client_id] = websocket
+            self.codecs[client_id] = negotiate_codec(websocket)
             self.connection_states[client_id] = "connected"
             self.heartbeat_intervals[client_id] = time.time()
             logger.info(f"WebSocket client {client_id} connected")
@@ -58,6 +54,7 @@ class WebSocketConnectionManager:
                 logger.warning(f"Error closing WebSocket for {client_id}: {e}")
             finally:
                 self.connections.pop(client_id, None)
+                self.codecs.pop(client_id, None)
                 self.connection_states.pop(client_id, None) 
                 self.heartbeat_intervals.pop(client_id, None)
                 logger.info(f"WebSocket client {client_id} disconnected")
@@ -68,7 +65,7 @@ class WebSocketConnectionManager:
             return False
             
         try:
-            await self.connections[client_id].send_text(json.dumps(message))
+            await self.codecs[client_id].send(self.connections[client_id], message)
             return True
         except WebSocketDisconnect:
             logger.info(f"Client {client_id} disconnected during send")
@@ -108,6 +105,7 @@ class PriceStreamerManager:
         self.stream_version = 0  # Increments on every symbol switch
         self.max_retries = 3
         self.retry_delay = 1.0
+        self.codec = MessageCodec()
 
     async def stop_streamer(self):
         async with self.lock:
@@ -148,15 +146,19 @@ class PriceStreamerManager:
                 print(f"[WS DEBUG] ABORT streamer for {symbol} (version {version}), current version is {self.stream_version}")
                 break
             try:
-                async with httpx.AsyncClient() as client:
-                    r = await client.get(f"https://api.binance.com/api/v3/ticker/price?symbol={symbol.upper()}")
-                    price = r.json()["price"] if r.status_code == 200 else "N/A"
+                # Shared, coalesced lookup: many clients on the same symbol cost one upstream call
+                try:
+                    price = await price_service.get_price(symbol)
+                except RuntimeError:
+                    price = None
                 # Guard: do not send if stop_event set or version changed after HTTP request
                 if self.stop_event.is_set() or version != self.stream_version:
                     print(f"[WS DEBUG] ABORT send for {symbol} (version {version}) due to stop_event or version change")
                     break
-                print(f"[WS DEBUG] SENDING ONLY {symbol}: {price}")
-                await websocket.send_text(json.dumps({"symbol": symbol.upper(), "price": price}))
+                if price is None:
+                    await self.codec.send(websocket, {"symbol": symbol.upper(), "price": "N/A"})
+                else:
+                    await self.codec.send_price_tick(websocket, symbol, price)
             except Exception as e:
                 print(f"[WS DEBUG] Error fetching price for {symbol}: {e}")
             # Responsive sleep: check stop_event every 50ms, total 0.5s
@@ -173,6 +175,7 @@ async def websocket_price(websocket: WebSocket):
     client_ip = websocket.client.host if hasattr(websocket, 'client') and websocket.client else None
     print(f"[WS DEBUG] Client IP: {client_ip}")
     manager = PriceStreamerManager()
+    manager.codec = negotiate_codec(websocket)
     # Enforce only one connection per client IP
     if client_ip:
         old_manager = None
@@ -202,7 +205,10 @@ async def websocket_price(websocket: WebSocket):
                     try:
                         # Try to parse as JSON first
                         parsed_msg = json.loads(msg)
-                        if isinstance(parsed_msg, dict) and 'symbol' in parsed_msg:
+                        if isinstance(parsed_msg, dict) and 'encoding' in parsed_msg:
+                            manager.codec.set_encoding(parsed_msg['encoding'])
+                            symbol = parsed_msg.get('symbol', manager.symbol)
+                        elif isinstance(parsed_msg, dict) and 'symbol' in parsed_msg:
                             symbol = parsed_msg['symbol']
                         elif isinstance(parsed_msg, str):
                             symbol = parsed_msg
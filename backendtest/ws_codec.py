@@ -0,0 +1,174 @@
+"""
+WebSocket Message Codecs
+Per-connection encoding negotiation (json, msgpack, packed struct price ticks)
+and delta encoding for snapshot-then-changes streams
+"""
+
+import json
+import logging
+import struct
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+# Packed price tick: message type, symbol (12 bytes, NUL padded), price, unix timestamp
+PRICE_TICK_STRUCT = struct.Struct("<B12sdd")
+PRICE_TICK_TYPE = 1
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+ENCODING_STRUCT = "struct"
+SUPPORTED_ENCODINGS = (ENCODING_JSON, ENCODING_MSGPACK, ENCODING_STRUCT)
+
+
+def encode_price_tick(symbol: str, price: float, timestamp: Optional[float] = None) -> bytes:
+    """Pack a price tick into a fixed 29-byte binary frame"""
+    return PRICE_TICK_STRUCT.pack(
+        PRICE_TICK_TYPE,
+        symbol.upper().encode("ascii")[:12],
+        float(price),
+        timestamp if timestamp is not None else time.time()
+    )
+
+
+def decode_price_tick(data: bytes) -> Dict[str, Any]:
+    """Unpack a binary price tick frame (for clients and tests)"""
+    msg_type, symbol, price, timestamp = PRICE_TICK_STRUCT.unpack(data)
+    if msg_type != PRICE_TICK_TYPE:
+        raise ValueError(f"Not a price tick frame (type {msg_type})")
+    return {"symbol": symbol.rstrip(b"\x00").decode("ascii"), "price": price, "timestamp": timestamp}
+
+
+class MessageCodec:
+    """
+    Encodes outgoing messages for one connection.
+    - json: compact text frames (default)
+    - msgpack: binary frames, falls back to json if msgpack is not installed
+    - struct: price ticks as fixed binary frames, everything else as msgpack/json
+    """
+
+    def __init__(self, encoding: str = ENCODING_JSON):
+        self.encoding = ENCODING_JSON
+        self.set_encoding(encoding)
+        self.bytes_sent = 0
+        self.messages_sent = 0
+
+    def set_encoding(self, encoding: Optional[str]) -> str:
+        """Switch encoding; unknown or unavailable encodings fall back to json"""
+        encoding = (encoding or ENCODING_JSON).lower()
+        if encoding not in SUPPORTED_ENCODINGS:
+            logger.warning(f"Unsupported WebSocket encoding '{encoding}', using json")
+            encoding = ENCODING_JSON
+        self.encoding = encoding
+        return self.encoding
+
+    @property
+    def _use_msgpack(self) -> bool:
+        return self.encoding in (ENCODING_MSGPACK, ENCODING_STRUCT) and MSGPACK_AVAILABLE
+
+    def encode(self, message: Dict[str, Any]):
+        """Encode a message to str (text frame) or bytes (binary frame)"""
+        if self._use_msgpack:
+            return msgpack.packb(message, use_bin_type=True, default=str)
+        return json.dumps(message, separators=(",", ":"), default=str)
+
+    async def send(self, websocket: WebSocket, message: Dict[str, Any]):
+        await self._send_frame(websocket, self.encode(message))
+
+    async def send_price_tick(self, websocket: WebSocket, symbol: str, price: float,
+                              timestamp: Optional[float] = None, **extra):
+        """Send a price tick, as a packed struct frame when the connection negotiated it"""
+        if self.encoding == ENCODING_STRUCT:
+            await self._send_frame(websocket, encode_price_tick(symbol, price, timestamp))
+        else:
+            message = {"symbol": symbol.upper(), "price": price, **extra}
+            if timestamp is not None:
+                message["timestamp"] = timestamp
+            await self.send(websocket, message)
+
+    async def _send_frame(self, websocket: WebSocket, frame):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+        self.bytes_sent += len(frame)
+        self.messages_sent += 1
+
+
+def negotiate_codec(websocket: WebSocket) -> MessageCodec:
+    """Pick a connection's codec from the ``encoding`` query parameter (ws://.../path?encoding=msgpack)"""
+    return MessageCodec(websocket.query_params.get("encoding", ENCODING_JSON))
+
+
+class DeltaEncoder:
+    """
+    Turns successive full states into a snapshot followed by field-level deltas.
+    State is a dict (nested dicts are diffed recursively); unchanged states produce no message.
+
+    Snapshot: {"type": "snapshot", "seq": n, "data": {...}}
+    Delta:    {"type": "delta", "seq": n, "changed": {...changed fields only...}, "removed": [[key, ...], ...]}
+    """
+
+    def __init__(self, stream: str, full_snapshot_every: int = 0):
+        self.stream = stream
+        self.full_snapshot_every = full_snapshot_every
+        self._previous: Optional[Dict[str, Any]] = None
+        self._deltas_since_snapshot = 0
+        self.seq = 0
+
+    def reset(self):
+        """Force the next message to be a full snapshot (e.g. on client resubscribe)"""
+        self._previous = None
+
+    def encode(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._previous is None or (
+            self.full_snapshot_every and self._deltas_since_snapshot >= self.full_snapshot_every
+        ):
+            self._previous = _copy_state(state)
+            self._deltas_since_snapshot = 0
+            self.seq += 1
+            return {"type": "snapshot", "stream": self.stream, "seq": self.seq, "data": state}
+
+        removed: List[List[str]] = []
+        changed = _diff(self._previous, state, [], removed)
+        if not changed and not removed:
+            return None
+
+        self._previous = _copy_state(state)
+        self._deltas_since_snapshot += 1
+        self.seq += 1
+        message = {"type": "delta", "stream": self.stream, "seq": self.seq, "changed": changed}
+        if removed:
+            message["removed"] = removed
+        return message
+
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: _copy_state(v) if isinstance(v, dict) else v for k, v in state.items()}
+
+
+def _diff(previous: Dict[str, Any], current: Dict[str, Any], path: List[str], removed: List[List[str]]) -> Dict[str, Any]:
+    changed = {}
+    for key, value in current.items():
+        if key not in previous:
+            changed[key] = value
+        elif isinstance(value, dict) and isinstance(previous[key], dict):
+            nested = _diff(previous[key], value, path + [key], removed)
+            if nested:
+                changed[key] = nested
+        elif value != previous[key]:
+            changed[key] = value
+    for key in previous:
+        if key not in current:
+            removed.append(path + [key])
+    return changed